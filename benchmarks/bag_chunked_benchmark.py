@@ -0,0 +1,49 @@
+"""
+Lock hold times of a list-backed ConcurrentBag versus ConcurrentBag.chunked()
+as the bag grows to millions of items:
+- extend() latency: a growing list occasionally reallocates itself under the lock,
+  while the chunked storage never moves existing items;
+- latency of the first append() made while an iteration is in progress: the
+  bag then copies its storage (copy-on-write), which is all the items for a
+  list but only the list of chunks for the chunked storage.
+
+Usage:
+    python benchmarks/bag_chunked_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from concurrent_collections import ConcurrentBag
+
+ITEMS = 10_000_000
+BATCH = 1000
+
+
+def run(bag):
+    latencies = []
+    batch = list(range(BATCH))
+    for _ in range(ITEMS // BATCH):
+        start = time.perf_counter()
+        bag.extend(batch)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    iterator = iter(bag)
+    start = time.perf_counter()
+    bag.append(0)
+    snapshot = time.perf_counter() - start
+    del iterator
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.999)], latencies[-1], snapshot
+
+
+def main():
+    print(f"Growing to {ITEMS:,} items with extend({BATCH}), then append() during an iteration (microseconds)")
+    print(f"{'storage':>8} {'extend p50':>11} {'p99.9':>9} {'max':>9} {'COW append':>11}")
+    for name, factory in (("list", ConcurrentBag), ("chunked", ConcurrentBag.chunked)):
+        p50, p999, worst, snapshot = run(factory())
+        print(f"{name:>8} {p50 * 1e6:>11.1f} {p999 * 1e6:>9.1f} {worst * 1e6:>9.1f} {snapshot * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
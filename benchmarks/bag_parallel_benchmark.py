@@ -0,0 +1,52 @@
+"""
+Serial processing of list(bag) versus ConcurrentBag.parallel_map() on thread and
+process pools, for a CPU-bound and an I/O-bound function.
+
+Usage:
+    python benchmarks/bag_parallel_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent_collections import ConcurrentBag
+
+WORKERS = 4
+
+
+def cpu_bound(n: int) -> int:
+    total = 0
+    for i in range(2000):
+        total += (n * i) % 7
+    return total
+
+
+def io_bound(n: int) -> int:
+    time.sleep(0.001)
+    return n
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    cases = (("CPU-bound", cpu_bound, ConcurrentBag(range(4000))),
+             ("I/O-bound", io_bound, ConcurrentBag(range(2000))))
+    print(f"{'function':>10} {'serial':>9} {'threads':>9} {'processes':>10}  (seconds, {WORKERS} workers)")
+    for name, fn, bag in cases:
+        serial = timed(lambda: [fn(item) for item in list(bag)])
+        with ThreadPoolExecutor(WORKERS) as pool:
+            threads = timed(lambda: list(bag.parallel_map(fn, executor=pool)))
+        with ProcessPoolExecutor(WORKERS) as pool:
+            pool.submit(abs, 0).result()  # start the worker processes before timing
+            processes = timed(lambda: list(bag.parallel_map(fn, executor=pool)))
+        print(f"{name:>10} {serial:>9.3f} {threads:>9.3f} {processes:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Throughput of ConcurrentBag versus ConcurrentWorkStealingBag when every thread
+both produces and consumes items (e.g. a pool of reusable buffers).
+
+Usage:
+    python benchmarks/bag_work_stealing_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+from concurrent_collections import ConcurrentBag, ConcurrentWorkStealingBag
+
+OPERATIONS = 200_000
+
+
+def run(bag, threads: int) -> float:
+    per_thread = OPERATIONS // threads
+
+    def worker():
+        for i in range(per_thread):
+            bag.append(i)
+            try:
+                bag.pop()
+            except IndexError:
+                pass
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed
+
+
+def main():
+    print(f"{'threads':>7} {'ConcurrentBag':>16} {'WorkStealingBag':>16}  (append+pop pairs per second)")
+    for threads in (1, 2, 4, 8):
+        plain = run(ConcurrentBag(), threads)
+        stealing = run(ConcurrentWorkStealingBag(), threads)
+        print(f"{threads:>7} {plain:>16,.0f} {stealing:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Miss-path latency of ConcurrentDictionary lookups, with and without the lookup filter.
+
+Three scenarios are measured:
+- no other threads;
+- writer threads doing short assign_atomic() calls;
+- one thread repeatedly taking keys() snapshots, i.e. holding the lock for long stretches.
+
+Usage:
+    python benchmarks/dict_lookup_filter_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+from typing import Callable, List
+from concurrent_collections import ConcurrentDictionary
+
+KEYS = 200_000
+LOOKUPS = 100_000
+
+
+def writers(d: ConcurrentDictionary, stop: threading.Event) -> List[threading.Thread]:
+    def writer(offset: int):
+        i = 0
+        while not stop.is_set():
+            d.assign_atomic(offset + 2 * (i % 1000), i)
+            i += 1
+    return [threading.Thread(target=writer, args=(n * 1000,)) for n in range(4)]
+
+
+def snapshotter(d: ConcurrentDictionary, stop: threading.Event) -> List[threading.Thread]:
+    def snapshot():
+        while not stop.is_set():
+            d.keys()
+    return [threading.Thread(target=snapshot)]
+
+
+def measure_misses(d: ConcurrentDictionary, background: Callable[..., List[threading.Thread]]) -> float:
+    stop = threading.Event()
+    threads = background(d, stop)
+    for t in threads:
+        t.start()
+    try:
+        start = time.perf_counter()
+        # Odd keys, interleaved with the (even) stored keys
+        for i in range(1, 2 * LOOKUPS, 2):
+            d.get(i)
+        elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+    return elapsed / LOOKUPS * 1e9
+
+
+def main():
+    d = ConcurrentDictionary({i: i for i in range(0, 2 * KEYS, 2)})
+    scenarios = [
+        ("uncontended", lambda d, stop: []),
+        ("4 writer threads", writers),
+        ("keys() snapshot thread", snapshotter),
+    ]
+    for name, background in scenarios:
+        d.disable_lookup_filter()
+        plain = measure_misses(d, background)
+        d.enable_lookup_filter(capacity=2 * KEYS, false_positive_rate=0.01)
+        filtered = measure_misses(d, background)
+        print(f"{name:24} get() miss: without filter {plain:9.0f} ns, with filter {filtered:9.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Consumer throughput of ConcurrentQueue with repeated popleft() versus popleft_many(),
+on a pre-filled queue and with a concurrent producer.
+
+Usage:
+    python benchmarks/queue_batch_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+from concurrent_collections import CollectionClosedError, ConcurrentQueue
+
+ITEMS = 1_000_000
+BATCH = 256
+
+
+def drain_one_by_one(queue: ConcurrentQueue) -> int:
+    count = 0
+    try:
+        while True:
+            queue.popleft(block=True)
+            count += 1
+    except CollectionClosedError:
+        return count
+
+
+def drain_in_batches(queue: ConcurrentQueue) -> int:
+    count = 0
+    try:
+        while True:
+            count += len(queue.popleft_many(BATCH, block=True))
+    except CollectionClosedError:
+        return count
+
+
+def prefilled(consume) -> float:
+    queue : ConcurrentQueue[int] = ConcurrentQueue(range(ITEMS))
+    queue.close()
+    start = time.perf_counter()
+    assert consume(queue) == ITEMS
+    return ITEMS / (time.perf_counter() - start)
+
+
+def with_producer(consume) -> float:
+    queue : ConcurrentQueue[int] = ConcurrentQueue()
+
+    def produce():
+        for i in range(0, ITEMS, 100):
+            queue.extend(range(i, i + 100))
+        queue.close()
+
+    producer = threading.Thread(target=produce)
+    start = time.perf_counter()
+    producer.start()
+    assert consume(queue) == ITEMS
+    producer.join()
+    return ITEMS / (time.perf_counter() - start)
+
+
+def main():
+    print(f"{'scenario':>14} {'popleft()':>12} {'popleft_many(' + str(BATCH) + ')':>18}  (items per second)")
+    for name, scenario in (("pre-filled", prefilled), ("with producer", with_producer)):
+        one = scenario(drain_one_by_one)
+        many = scenario(drain_in_batches)
+        print(f"{name:>14} {one:>12,.0f} {many:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Producer/consumer throughput of ConcurrentLinkedQueue (two locks) versus
+ConcurrentQueue (deque + RLock) and queue.SimpleQueue, for growing numbers of
+producer and consumer threads.
+
+On GIL builds of CPython the threads do not run in parallel, so this mostly
+measures the per-operation cost; run it on a free-threaded build (python3.13t
+or later) to see producers and consumers proceed in parallel.
+
+Usage:
+    python benchmarks/queue_two_lock_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import queue
+import sysconfig
+import threading
+import time
+from concurrent_collections import ConcurrentLinkedQueue, ConcurrentQueue
+
+ITEMS = 400_000
+
+
+def run(put, get, threads: int) -> float:
+    per_thread = ITEMS // threads
+
+    def produce():
+        for i in range(per_thread):
+            put(i)
+
+    def consume():
+        for _ in range(per_thread):
+            get()
+
+    workers = [threading.Thread(target=produce) for _ in range(threads)]
+    workers += [threading.Thread(target=consume) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    print(f"Python {sys.version.split()[0]}{' (free-threaded)' if free_threaded else ''}, {os.cpu_count()} CPUs")
+    print(f"{'producers x consumers':>22} {'ConcurrentQueue':>16} {'ConcurrentLinkedQueue':>22} {'SimpleQueue':>12}"
+          f"  (items per second)")
+    for threads in (1, 2, 4, 8):
+        deque_queue : ConcurrentQueue[int] = ConcurrentQueue()
+        linked_queue : ConcurrentLinkedQueue[int] = ConcurrentLinkedQueue()
+        simple_queue : "queue.SimpleQueue[int]" = queue.SimpleQueue()
+        results = (
+            run(deque_queue.append, lambda: deque_queue.popleft(block=True), threads),
+            run(linked_queue.append, lambda: linked_queue.popleft(block=True), threads),
+            run(simple_queue.put, simple_queue.get, threads),
+        )
+        print(f"{f'{threads} x {threads}':>22} {results[0]:>16,.0f} {results[1]:>22,.0f} {results[2]:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Percentile and top-k queries on a ConcurrentSortedBag versus sorted(bag) on a
+ConcurrentBag, for growing numbers of items.
+
+Usage:
+    python benchmarks/sorted_bag_benchmark.py
+"""
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import math
+import random
+import time
+from concurrent_collections import ConcurrentBag, ConcurrentSortedBag
+
+QUERIES = 100
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    print(f"{'items':>10} {'add (bag)':>10} {'add (sorted)':>13} {'p99+top10 (sorted(bag))':>24} "
+          f"{'p99+top10 (sorted bag)':>23}  (microseconds per operation)")
+    for n in (10_000, 100_000, 1_000_000):
+        values = [random.random() for _ in range(n)]
+        bag : ConcurrentBag[float] = ConcurrentBag()
+        sorted_bag : ConcurrentSortedBag[float] = ConcurrentSortedBag()
+        start = time.perf_counter()
+        for value in values:
+            bag.append(value)
+        add_bag = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        for value in values:
+            sorted_bag.add(value)
+        add_sorted = (time.perf_counter() - start) / n
+
+        def query_bag():
+            items = sorted(bag)
+            return items[max(0, math.ceil(0.99 * len(items)) - 1)], items[-10:]
+
+        def query_sorted():
+            return sorted_bag.percentile(99), sorted_bag.top_k(10)
+
+        repeat = max(1, QUERIES * 10_000 // n)
+        print(f"{n:>10} {add_bag * 1e6:>10.2f} {add_sorted * 1e6:>13.2f} {timed(query_bag, repeat) * 1e6:>24.0f} "
+              f"{timed(query_sorted, QUERIES) * 1e6:>23.1f}")
+
+
+if __name__ == "__main__":
+    main()
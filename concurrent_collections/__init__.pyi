@@ -1,5 +1,32 @@
 from .concurrent_bag import ConcurrentBag
 from .concurrent_dict import ConcurrentDictionary
+from .concurrent_default_dict import ConcurrentDefaultDictionary
+from .concurrent_dict_replication import ReplicationFollower, ReplicationLeader
 from .concurrent_deque import ConcurrentQueue
+from .concurrent_linked_queue import ConcurrentLinkedQueue
+from .concurrent_object_pool import ConcurrentObjectPool
+from .concurrent_reservoir_bag import ConcurrentReservoirBag
+from .concurrent_set import ConcurrentSet
+from .concurrent_sorted_bag import ConcurrentSortedBag
+from .concurrent_work_stealing_bag import ConcurrentWorkStealingBag
+from .concurrent_weak_dict import ConcurrentWeakKeyDictionary, ConcurrentWeakValueDictionary
+from .exceptions import CollectionClosedError, CollectionFullError
 
-__all__ = ["ConcurrentBag", "ConcurrentDictionary", "ConcurrentQueue"]
\ No newline at end of file
+__all__ = [
+    "CollectionClosedError",
+    "CollectionFullError",
+    "ConcurrentBag",
+    "ConcurrentDefaultDictionary",
+    "ConcurrentDictionary",
+    "ConcurrentLinkedQueue",
+    "ConcurrentObjectPool",
+    "ConcurrentQueue",
+    "ConcurrentReservoirBag",
+    "ConcurrentSet",
+    "ConcurrentSortedBag",
+    "ConcurrentWeakKeyDictionary",
+    "ConcurrentWeakValueDictionary",
+    "ConcurrentWorkStealingBag",
+    "ReplicationFollower",
+    "ReplicationLeader",
+]
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Set
+
+
+class AsyncWaiters:
+    """
+    Coroutines waiting for a condition (items to take, room to add) on a thread-safe
+    collection, woken up from any thread without polling.
+
+    Each waiting coroutine awaits a future of its event loop. When the collection
+    changes, notify() schedules a single wakeup callback per event loop with
+    loop.call_soon_threadsafe(), unless one is already pending: a burst of changes
+    from other threads costs one cross-thread call, after which the callback wakes
+    up as many coroutines as can proceed, i.e. available() of them.
+
+    All the methods except _wake() must be called with the collection's lock held.
+    """
+    def __init__(self, lock: "threading.RLock", available: Callable[[], int]) -> None:
+        self._lock = lock
+        self._available = available
+        self._waiters: Dict[asyncio.AbstractEventLoop, Deque["asyncio.Future[None]"]] = {}
+        self._scheduled: Set[asyncio.AbstractEventLoop] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self._waiters)
+
+    def wait(self, loop: asyncio.AbstractEventLoop) -> "asyncio.Future[None]":
+        """Register a waiter in loop, returning the future to await outside the lock."""
+        future = loop.create_future()
+        self._waiters.setdefault(loop, deque()).append(future)
+        return future
+
+    def cancel(self, loop: asyncio.AbstractEventLoop, future: "asyncio.Future[None]") -> None:
+        """
+        Unregister a waiter that gives up (timeout, cancellation). If it had already
+        been woken up, the wakeup is passed on to another waiter.
+        """
+        if future.done() and not future.cancelled():
+            self._schedule(loop)
+            return
+        waiters = self._waiters.get(loop)
+        if waiters is not None:
+            try:
+                waiters.remove(future)
+            except ValueError:
+                pass
+            if not waiters:
+                del self._waiters[loop]
+
+    def notify(self) -> None:
+        """Schedule a wakeup in each event loop with waiters, unless one is already pending."""
+        for loop in list(self._waiters):
+            self._schedule(loop)
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if loop in self._scheduled:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake, loop)
+        except RuntimeError:
+            # The event loop is closed: its waiters will never run again
+            self._waiters.pop(loop, None)
+            return
+        self._scheduled.add(loop)
+
+    def _wake(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Runs in loop
+        with self._lock:
+            self._scheduled.discard(loop)
+            waiters = self._waiters.get(loop)
+            if waiters is None:
+                return
+            count = self._available()
+            while waiters and count > 0:
+                future = waiters.popleft()
+                if not future.done():
+                    future.set_result(None)
+                    count -= 1
+            if not waiters:
+                del self._waiters[loop]
+
+
+async def wait_for(future: "asyncio.Future[None]", timeout: Any) -> bool:
+    """Await future for at most timeout seconds (None waits forever). Returns False on timeout."""
+    if timeout is None:
+        await future
+        return True
+    try:
+        await asyncio.wait_for(future, max(0.0, timeout))
+        return True
+    except asyncio.TimeoutError:
+        return False
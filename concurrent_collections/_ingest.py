@@ -0,0 +1,59 @@
+import time
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Union
+
+# Number of items read from a stream before they are published to a collection
+# (taking its lock once), when extending a collection from an iterator.
+DEFAULT_BATCH_SIZE = 1024
+
+
+def is_stream(iterable: Any) -> bool:
+    """
+    True for iterables that are produced on the fly (generators, iterators, files...),
+    as opposed to collections whose items are already in memory.
+    """
+    return not hasattr(iterable, "__len__")
+
+
+def batches(source: Iterable[Any], batch_size: int, max_delay: Optional[float] = None) -> Iterator[List[Any]]:
+    """
+    Read source and yield its items in lists of at most batch_size items. With
+    max_delay, a partial batch is also yielded once its first item has waited for
+    max_delay seconds (checked whenever an item arrives).
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    batch: List[Any] = []
+    started = 0.0
+    for item in source:
+        if not batch and max_delay is not None:
+            started = time.monotonic()
+        batch.append(item)
+        if len(batch) >= batch_size or (max_delay is not None and time.monotonic() - started >= max_delay):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def async_batches(source: Union[Iterable[Any], Any], batch_size: int,
+                        max_delay: Optional[float] = None) -> AsyncIterator[List[Any]]:
+    """
+    Like batches(), for an async iterable (or a plain iterable, read in the event loop).
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if not hasattr(source, "__aiter__"):
+        for batch in batches(source, batch_size, max_delay):
+            yield batch
+        return
+    batch: List[Any] = []
+    started = 0.0
+    async for item in source:
+        if not batch and max_delay is not None:
+            started = time.monotonic()
+        batch.append(item)
+        if len(batch) >= batch_size or (max_delay is not None and time.monotonic() - started >= max_delay):
+            yield batch
+            batch = []
+    if batch:
+        yield batch
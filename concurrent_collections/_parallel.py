@@ -0,0 +1,99 @@
+import functools
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Iterator, List, Optional, Tuple
+
+# Adaptive chunking: chunks are sized so that each one takes about this long to process,
+# which keeps the per-chunk overhead (submission, pickling for process pools) negligible
+# while leaving enough chunks to balance the load between workers.
+_TARGET_CHUNK_SECONDS = 0.01
+_INITIAL_CHUNK_SIZE = 8
+_MAX_CHUNK_SIZE = 65536
+
+
+# The chunk tasks are module-level functions so that they can be sent to process pools.
+# Each returns its result along with the time it took, used to size the next chunks.
+
+def _map_chunk(fn: Callable[[Any], Any], items: List[Any]) -> Tuple[List[Any], float]:
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def _filter_chunk(predicate: Callable[[Any], Any], items: List[Any]) -> Tuple[List[Any], float]:
+    start = time.perf_counter()
+    results = [item for item in items if predicate(item)]
+    return results, time.perf_counter() - start
+
+
+def _reduce_chunk(fn: Callable[[Any, Any], Any], items: List[Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = functools.reduce(fn, items)
+    return result, time.perf_counter() - start
+
+
+def _for_each_chunk(fn: Callable[[Any], Any], items: List[Any]) -> Tuple[None, float]:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return None, time.perf_counter() - start
+
+
+def run_chunks(items: Iterator[Any], task: Callable[..., Tuple[Any, float]], fn: Callable[..., Any],
+               executor: Optional[Executor], chunk_size: Optional[int], max_workers: Optional[int]) -> Iterator[Any]:
+    """
+    Apply task(fn, chunk) to consecutive chunks of items on executor, yielding the
+    chunk results in order, as they become available.
+
+    At most two chunks per worker are in flight at any time, so neither the input
+    nor the results are ever fully materialised. With chunk_size=None, the chunk
+    size adapts to the measured processing time per item.
+    If executor is None, a ThreadPoolExecutor of max_workers threads is used for
+    the duration of the call.
+    """
+    if chunk_size is not None and chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    own_executor = executor is None
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers)
+    workers = max_workers or getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+    size = chunk_size or _INITIAL_CHUNK_SIZE
+    pending: Deque[Tuple["Future[Tuple[Any, float]]", int]] = deque()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = list(islice(items, size))
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.append((executor.submit(task, fn, chunk), len(chunk)))
+            if not pending:
+                return
+            future, count = pending.popleft()
+            result, elapsed = future.result()
+            if chunk_size is None:
+                per_item = elapsed / count
+                size = _MAX_CHUNK_SIZE if per_item <= 0 else int(_TARGET_CHUNK_SECONDS / per_item)
+                size = max(1, min(_MAX_CHUNK_SIZE, size))
+            yield result
+    finally:
+        for future, _ in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True)
+
+
+def flatten(chunks: Iterator[List[Any]]) -> Iterator[Any]:
+    """
+    Yield the items of the chunk results of run_chunks(). Closing this generator
+    closes run_chunks() too, which cancels the chunks still in flight.
+    """
+    try:
+        for chunk in chunks:
+            yield from chunk
+    finally:
+        chunks.close()  # type: ignore
@@ -1,60 +1,1429 @@
+import array
+import mmap
+import os
+import pickle
+import random
+import tempfile
 import threading
-from typing import Generic, Iterable, Iterator, List, Optional, TypeVar, Any
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import Executor
+from itertools import chain, islice
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar, Any, Union
+
+from . import _ingest, _parallel
+from .exceptions import CollectionClosedError
 
 T = TypeVar('T')
+R = TypeVar('R')
+
+_MISSING: Any = object()
+
+
+class _CountedStorage(Generic[T]):
+    """
+    Multiset storage for ConcurrentBag.hashed(): a map of element -> count.
+
+    append, remove, count and membership are O(1). Iteration yields equal elements
+    together, in the order in which they were first added. Positional access
+    walks the counts and is O(number of distinct elements).
+    Not thread-safe on its own: it is only accessed under the bag's lock.
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
+        self._counts: Dict[T, int] = {}
+        self._len = 0
+        if iterable is not None:
+            self.extend(iterable)
+
+    def append(self, item: T) -> None:
+        self._counts[item] = self._counts.get(item, 0) + 1
+        self._len += 1
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        for item in iterable:
+            self.append(item)
+
+    def _decrement(self, item: T) -> None:
+        count = self._counts[item]
+        if count == 1:
+            del self._counts[item]
+        else:
+            self._counts[item] = count - 1
+        self._len -= 1
+
+    def _at(self, index: int) -> T:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("bag index out of range")
+        for item, count in self._counts.items():
+            if index < count:
+                return item
+            index -= count
+        raise IndexError("bag index out of range")
+
+    def pop(self, index: int = -1) -> T:
+        if not self._len:
+            raise IndexError("pop from empty bag")
+        item = next(reversed(self._counts)) if index == -1 else self._at(index)
+        self._decrement(item)
+        return item
+
+    def remove(self, value: T) -> None:
+        if value not in self._counts:
+            raise ValueError("ConcurrentBag.remove(x): x not in bag")
+        self._decrement(value)
+
+    def count(self, value: Any) -> int:
+        return self._counts.get(value, 0)
+
+    def counts(self) -> Dict[T, int]:
+        return self._counts
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self._counts
+
+    def __getitem__(self, index: int) -> T:
+        return self._at(index)
+
+    def __setitem__(self, index: int, value: T) -> None:
+        self._decrement(self._at(index))
+        self.append(value)
+
+    def __delitem__(self, index: int) -> None:
+        self._decrement(self._at(index))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[T]:
+        for item, count in self._counts.items():
+            for _ in range(count):
+                yield item
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self._len = 0
+
+    def copy(self) -> "_CountedStorage[T]":
+        storage: _CountedStorage[T] = _CountedStorage()
+        storage._counts = self._counts.copy()
+        storage._len = self._len
+        return storage
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class _OrderedCountedStorage(Generic[T]):
+    """
+    Multiset storage for ConcurrentBag.hashed(ordered=True).
+
+    Same O(1) append, remove, count and membership as _CountedStorage, but
+    iteration follows insertion order, like a list. Each item gets a sequence
+    number; the items are kept in a seq -> item map and each element keeps the
+    (ordered) set of its sequence numbers.
+    Not thread-safe on its own: it is only accessed under the bag's lock.
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
+        self._order: Dict[int, T] = {}
+        self._seqs: Dict[T, Dict[int, None]] = {}
+        self._next_seq = 0
+        if iterable is not None:
+            self.extend(iterable)
+
+    def append(self, item: T) -> None:
+        seq = self._next_seq
+        self._next_seq += 1
+        seqs = self._seqs.get(item)
+        if seqs is None:
+            seqs = self._seqs[item] = {}
+        seqs[seq] = None
+        self._order[seq] = item
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        for item in iterable:
+            self.append(item)
+
+    def _forget(self, seq: int, item: T) -> None:
+        seqs = self._seqs[item]
+        del seqs[seq]
+        if not seqs:
+            del self._seqs[item]
+
+    def _seq_at(self, index: int) -> int:
+        size = len(self._order)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("bag index out of range")
+        if index == size - 1:
+            return next(reversed(self._order))
+        return next(islice(self._order, index, None))
+
+    def pop(self, index: int = -1) -> T:
+        if not self._order:
+            raise IndexError("pop from empty bag")
+        if index == -1:
+            seq, item = self._order.popitem()
+        else:
+            seq = self._seq_at(index)
+            item = self._order.pop(seq)
+        self._forget(seq, item)
+        return item
+
+    def remove(self, value: T) -> None:
+        seqs = self._seqs.get(value)
+        if seqs is None:
+            raise ValueError("ConcurrentBag.remove(x): x not in bag")
+        seq = next(iter(seqs))
+        del self._order[seq]
+        self._forget(seq, value)
+
+    def count(self, value: Any) -> int:
+        seqs = self._seqs.get(value)
+        return len(seqs) if seqs is not None else 0
+
+    def counts(self) -> Dict[T, int]:
+        return {item: len(seqs) for item, seqs in self._seqs.items()}
+
+    def __contains__(self, value: Any) -> bool:
+        return value in self._seqs
+
+    def __getitem__(self, index: int) -> T:
+        return self._order[self._seq_at(index)]
+
+    def __setitem__(self, index: int, value: T) -> None:
+        seq = self._seq_at(index)
+        self._forget(seq, self._order[seq])
+        self._order[seq] = value
+        seqs = self._seqs.get(value)
+        if seqs is None:
+            seqs = self._seqs[value] = {}
+        seqs[seq] = None
+
+    def __delitem__(self, index: int) -> None:
+        seq = self._seq_at(index)
+        self._forget(seq, self._order.pop(seq))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._order.values())
+
+    def clear(self) -> None:
+        self._order.clear()
+        self._seqs.clear()
+
+    def copy(self) -> "_OrderedCountedStorage[T]":
+        storage: _OrderedCountedStorage[T] = _OrderedCountedStorage()
+        storage._order = self._order.copy()
+        storage._seqs = {item: seqs.copy() for item, seqs in self._seqs.items()}
+        storage._next_seq = self._next_seq
+        return storage
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+_DEFAULT_CHUNK_SIZE = 4096
+
+
+class _ChunkedStorage(Generic[T]):
+    """
+    List-like storage for ConcurrentBag.chunked(): a list of chunks of at most
+    chunk_size items each.
+
+    Appending never moves existing items: when the last chunk is full, a new one
+    is started. Only the (much shorter) list of chunks is ever reallocated.
+
+    copy() is O(number of chunks): the copy shares the chunks with the original,
+    and whichever of them later modifies a shared chunk copies that chunk first
+    (copy-on-write at chunk granularity), so the other keeps an unchanged snapshot.
+    Positional access and removal walk the chunks.
+    Not thread-safe on its own: it is only accessed under the bag's lock.
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None, chunk_size: int = _DEFAULT_CHUNK_SIZE) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.chunk_size = chunk_size
+        self._chunks: List[List[T]] = []
+        self._owned: List[bool] = []  # False for chunks shared with a copy
+        self._len = 0
+        if iterable is not None:
+            self.extend(iterable)
+
+    def _read(self, chunk: List[T]) -> List[T]:
+        return chunk
+
+    def _writable(self, index: int) -> List[T]:
+        if not self._owned[index]:
+            self._chunks[index] = list(self._chunks[index])
+            self._owned[index] = True
+        return self._chunks[index]
+
+    def _drop_if_empty(self, index: int) -> None:
+        if not self._chunks[index]:
+            del self._chunks[index]
+            del self._owned[index]
+
+    def append(self, item: T) -> None:
+        if self._chunks and len(self._chunks[-1]) < self.chunk_size:
+            self._writable(-1).append(item)
+        else:
+            self._chunks.append([item])
+            self._owned.append(True)
+        self._len += 1
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        items = iterable if isinstance(iterable, list) else list(iterable)
+        start = 0
+        if self._chunks and items:
+            room = self.chunk_size - len(self._chunks[-1])
+            if room > 0:
+                self._writable(-1).extend(items[:room])
+                start = room
+        for offset in range(start, len(items), self.chunk_size):
+            self._chunks.append(items[offset:offset + self.chunk_size])
+            self._owned.append(True)
+        self._len += len(items)
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("bag index out of range")
+        if index >= self._len - len(self._chunks[-1]):
+            return len(self._chunks) - 1, index - (self._len - len(self._chunks[-1]))
+        for chunk_index, chunk in enumerate(self._chunks):
+            if index < len(chunk):
+                return chunk_index, index
+            index -= len(chunk)
+        raise IndexError("bag index out of range")
+
+    def pop(self, index: int = -1) -> T:
+        if not self._len:
+            raise IndexError("pop from empty bag")
+        chunk_index, offset = self._locate(index)
+        item = self._writable(chunk_index).pop(offset)
+        self._drop_if_empty(chunk_index)
+        self._len -= 1
+        return item
+
+    def remove(self, value: T) -> None:
+        for chunk_index, chunk in enumerate(self._chunks):
+            if value in self._read(chunk):
+                self._writable(chunk_index).remove(value)
+                self._drop_if_empty(chunk_index)
+                self._len -= 1
+                return
+        raise ValueError("ConcurrentBag.remove(x): x not in bag")
+
+    def count(self, value: Any) -> int:
+        return sum(self._read(chunk).count(value) for chunk in self._chunks)
+
+    def __contains__(self, value: Any) -> bool:
+        return any(value in self._read(chunk) for chunk in self._chunks)
+
+    def __getitem__(self, index: int) -> T:
+        chunk_index, offset = self._locate(index)
+        return self._read(self._chunks[chunk_index])[offset]
+
+    def __setitem__(self, index: int, value: T) -> None:
+        chunk_index, offset = self._locate(index)
+        self._writable(chunk_index)[offset] = value
+
+    def __delitem__(self, index: int) -> None:
+        self.pop(index)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[T]:
+        return chain.from_iterable(map(self._read, self._chunks))
+
+    def clear(self) -> None:
+        self._chunks = []
+        self._owned = []
+        self._len = 0
+
+    def copy(self) -> "_ChunkedStorage[T]":
+        storage = self.empty_copy()
+        storage._chunks = list(self._chunks)
+        storage._owned = [False] * len(self._chunks)
+        storage._len = self._len
+        self._owned = [False] * len(self._chunks)
+        return storage
+
+    def items_at(self, indices: List[int]) -> List[T]:
+        # indices must be sorted: the chunks are walked once
+        items: List[T] = []
+        chunks = iter(self._chunks)
+        chunk: List[T] = []
+        chunk_start = 0
+        for index in indices:
+            while index >= chunk_start + len(chunk):
+                chunk_start += len(chunk)
+                chunk = self._read(next(chunks))
+            items.append(chunk[index - chunk_start])
+        return items
+
+    def empty_copy(self) -> "_ChunkedStorage[T]":
+        return _ChunkedStorage(chunk_size=self.chunk_size)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _release_export(bagref: "weakref.ref[ConcurrentBag[Any]]", generation: int) -> None:
+    # Called when a view returned by ConcurrentBag.to_memoryview() is garbage collected:
+    # unless a write has already copied the storage it shared, it no longer needs to.
+    bag = bagref()
+    if bag is not None:
+        with bag._lock:
+            if bag._generation == generation:
+                bag._readers -= 1
+
+
+class _SpilledChunk:
+    """
+    A chunk of a spilling bag saved to a segment file, read back through mmap.
+    The chunk is immutable; the file is deleted when the chunk is no longer
+    referenced by any storage or snapshot.
+    """
+    __slots__ = ("path", "length", "_finalizer", "__weakref__")
+
+    def __init__(self, path: str, length: int) -> None:
+        self.path = path
+        self.length = length
+        self._finalizer = weakref.finalize(self, _remove_file, path)
+
+    def load(self) -> List[Any]:
+        with open(self.path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return pickle.loads(data)
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class _Spiller:
+    """
+    Writes the cold chunks of a spilling bag to segment files, in a background
+    thread started whenever the bag goes over its in-memory budget.
+
+    The lock is only held to pick a chunk and, once its file is written, to swap
+    the chunk for a _SpilledChunk; pickling and disk I/O happen outside of it.
+    A chunk modified in the meantime is copied by the writer (copy-on-write), so
+    the swap is skipped and the file discarded.
+    """
+    def __init__(self, bag: "ConcurrentBag[Any]", max_items_in_memory: int, directory: Optional[str]) -> None:
+        self._bag = weakref.ref(bag)
+        self.max_items_in_memory = max_items_in_memory
+        self.directory = directory
+        self._running = False
+        self.error: Optional[BaseException] = None  # set if an item could not be pickled
+
+    def request(self) -> None:
+        # Called by the storage, with the bag's lock held
+        if not self._running and self.error is None:
+            self._running = True
+            threading.Thread(target=self._run, daemon=True).start()
+
+    def _pick(self) -> Optional[List[Any]]:
+        # Called with the bag's lock held: the oldest chunk still in memory, except the last one
+        bag = self._bag()
+        if bag is None:
+            return None
+        storage = bag._items
+        if not isinstance(storage, _SpillingStorage) or storage.items_in_memory() <= self.max_items_in_memory:
+            return None
+        for index in range(len(storage._chunks) - 1):
+            chunk = storage._chunks[index]
+            if not isinstance(chunk, _SpilledChunk):
+                storage._owned[index] = False  # writers must now copy it before changing it
+                return chunk
+        return None
+
+    def _run(self) -> None:
+        while True:
+            bag = self._bag()
+            if bag is None:
+                return
+            with bag._lock:
+                chunk = self._pick()
+                if chunk is None:
+                    self._running = False
+                    return
+            del bag
+            fd, path = tempfile.mkstemp(prefix="concurrent_bag_", suffix=".seg", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                _remove_file(path)
+                bag = self._bag()
+                if bag is not None:
+                    with bag._lock:
+                        self.error = e
+                        self._running = False
+                return
+            spilled = _SpilledChunk(path, len(chunk))
+            bag = self._bag()
+            if bag is None:
+                return
+            with bag._lock:
+                storage = bag._items
+                if isinstance(storage, _SpillingStorage):
+                    storage._install(chunk, spilled)
+            del bag
+
+
+class _ChunkNotLoaded(Exception):
+    """
+    Raised, under the bag's lock, by a spilling storage that needs a spilled chunk
+    in memory, before it changes anything. The bag loads the chunk after releasing
+    the lock, swaps it in and retries (see ConcurrentBag._swap_in).
+    """
+    def __init__(self, chunk: _SpilledChunk) -> None:
+        super().__init__()
+        self.chunk = chunk
+
+
+class _SpillingStorage(_ChunkedStorage[T]):
+    """
+    Storage for ConcurrentBag.spilling(): chunked storage whose cold chunks (the
+    oldest ones) are moved to segment files when more than max_items_in_memory
+    items are held in memory.
+
+    Segment files are never read under the bag's lock. The bag's storage raises
+    _ChunkNotLoaded when an operation needs a spilled chunk; modifying operations
+    then load it without the lock, swap it back into memory for good and try again.
+    Read-only operations and iteration work on a detached copy of the storage,
+    taken under the lock in O(number of chunks) and read without it: only
+    detached storages load spilled chunks, one at a time, when reading them.
+    Not thread-safe on its own: it is only accessed under the bag's lock.
+    """
+    def __init__(self, spiller: _Spiller, iterable: Optional[Iterable[T]] = None,
+                 chunk_size: int = _DEFAULT_CHUNK_SIZE) -> None:
+        self._spiller = spiller
+        self._spilled_items = 0
+        self.detached = False  # True once no longer the bag's storage, see ConcurrentBag._detached_view()
+        super().__init__(iterable, chunk_size)
+
+    def items_in_memory(self) -> int:
+        return self._len - self._spilled_items
+
+    def spilled_items(self) -> int:
+        return self._spilled_items
+
+    def _read(self, chunk: Any) -> List[T]:
+        if isinstance(chunk, _SpilledChunk):
+            if not self.detached:
+                raise _ChunkNotLoaded(chunk)
+            return chunk.load()
+        return chunk
+
+    def _writable(self, index: int) -> List[T]:
+        chunk = self._chunks[index]
+        if isinstance(chunk, _SpilledChunk):
+            raise _ChunkNotLoaded(chunk)
+        return super()._writable(index)
+
+    def _install(self, chunk: List[T], spilled: _SpilledChunk) -> None:
+        for index, current in enumerate(self._chunks):
+            if current is chunk:
+                self._chunks[index] = spilled  # type: ignore
+                self._spilled_items += len(spilled)
+                break
+
+    def _restore(self, spilled: _SpilledChunk, chunk: List[T]) -> None:
+        # The reverse of _install(), for a chunk loaded without the bag's lock
+        for index, current in enumerate(self._chunks):
+            if current is spilled:
+                self._chunks[index] = chunk
+                self._owned[index] = True
+                self._spilled_items -= len(spilled)
+                break
+
+    def remove(self, value: T, checked: Optional[List[_SpilledChunk]] = None) -> None:
+        # Chunks in memory are searched first. Then each spilled chunk not in checked
+        # (already loaded by the bag and found not to hold value) is asked for in turn.
+        for chunk_index, chunk in enumerate(self._chunks):
+            if not isinstance(chunk, _SpilledChunk) and value in chunk:
+                self._writable(chunk_index).remove(value)
+                self._drop_if_empty(chunk_index)
+                self._len -= 1
+                return
+        for chunk in self._chunks:
+            if isinstance(chunk, _SpilledChunk) and (checked is None or chunk not in checked):
+                raise _ChunkNotLoaded(chunk)
+        raise ValueError("ConcurrentBag.remove(x): x not in bag")
+
+    def check_last(self, n: int) -> None:
+        # Raises _ChunkNotLoaded before popping the last n items one by one would reach a spilled chunk
+        for chunk in reversed(self._chunks):
+            if n <= 0:
+                return
+            if isinstance(chunk, _SpilledChunk):
+                raise _ChunkNotLoaded(chunk)
+            n -= len(chunk)
+
+    def _check_budget(self) -> None:
+        if self._len - self._spilled_items > self._spiller.max_items_in_memory:
+            self._spiller.request()
+
+    def _start_chunk_after_spilled(self) -> None:
+        # Items are never added to a spilled chunk, which would have to be loaded
+        # first: once pops have reached one, a new chunk is started after it.
+        if self._chunks and isinstance(self._chunks[-1], _SpilledChunk):
+            self._chunks.append([])
+            self._owned.append(True)
+
+    def append(self, item: T) -> None:
+        self._start_chunk_after_spilled()
+        super().append(item)
+        self._check_budget()
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        items = iterable if isinstance(iterable, list) else list(iterable)
+        if items:
+            self._start_chunk_after_spilled()
+        super().extend(items)
+        self._check_budget()
+
+    def clear(self) -> None:
+        super().clear()
+        self._spilled_items = 0
+
+    def copy(self) -> "_SpillingStorage[T]":
+        storage: _SpillingStorage[T] = super().copy()  # type: ignore
+        storage._spilled_items = self._spilled_items
+        return storage
+
+    def empty_copy(self) -> "_SpillingStorage[T]":
+        return _SpillingStorage(self._spiller, chunk_size=self.chunk_size)
+
+
+class _TypedStorage(array.array):
+    """
+    Storage for ConcurrentBag.typed(): an array.array holding unboxed numbers.
+    Adds the copy() and clear() methods used by the bag, and accepts any iterable
+    of numbers (not only arrays) in slice assignments.
+    Not thread-safe on its own: it is only accessed under the bag's lock.
+    """
+    def copy(self) -> "_TypedStorage":
+        return _TypedStorage(self.typecode, self)
+
+    def clear(self) -> None:
+        del self[:]
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice) and not isinstance(value, array.array):
+            value = array.array(self.typecode, value)
+        super().__setitem__(index, value)
+
+
+def _to_array(typecode: str, iterable: Iterable[Any]) -> "array.array[Any]":
+    """
+    Convert iterable to an array of the given typecode, copying raw bytes when
+    iterable exposes a contiguous buffer of the same item type (e.g. an array,
+    or a NumPy array of the matching dtype) instead of boxing every item.
+    """
+    if isinstance(iterable, array.array) and iterable.typecode == typecode:
+        return iterable
+    try:
+        view = memoryview(iterable)  # type: ignore
+    except TypeError:
+        return array.array(typecode, iterable)
+    items = array.array(typecode)
+    if view.format.lstrip("@") == typecode and view.c_contiguous:
+        items.frombytes(view.cast("B"))
+    else:
+        items.fromlist(view.tolist())
+    return items
+
+
+_MASK64 = (1 << 64) - 1
+
+# Number of items shown by ConcurrentBag.__repr__ before eliding the rest
+_REPR_LIMIT = 100
+
+
+def _fingerprint_of(items: Iterable[Any]) -> Optional[int]:
+    """
+    Order-independent fingerprint of a multiset: the sum of a mix of each element's hash.
+    Equal multisets always have equal fingerprints. None if an element is unhashable.
+    Hashing a 1-tuple mixes the element's hash non-linearly, so that e.g. {1, 4}
+    and {2, 3} do not sum to the same value.
+    """
+    try:
+        return sum(hash((item,)) for item in items) & _MASK64
+    except TypeError:
+        return None
+
+
+def _element_counts(items: Any) -> Dict[Any, int]:
+    if isinstance(items, (_CountedStorage, _OrderedCountedStorage)):
+        return items.counts()
+    return Counter(items)
+
+
+def _hashable_fingerprint(items: Any) -> int:
+    fingerprint = _fingerprint_of(items)
+    if fingerprint is None:
+        # Unhashable elements: this raises TypeError, as for the elements themselves
+        _element_counts(items)
+        raise TypeError("unhashable element in ConcurrentBag")
+    return fingerprint
+
+
+def _empty_like(items: Any) -> Any:
+    if isinstance(items, _ChunkedStorage):
+        return items.empty_copy()
+    if isinstance(items, _TypedStorage):
+        return _TypedStorage(items.typecode)
+    return type(items)()
+
 
 class ConcurrentBag(Generic[T]):
     """
     A thread-safe, list-like collection.
     All mutating and reading operations are protected by a lock.
+
+    Use ConcurrentBag.hashed() for a multiset representation with O(1)
+    remove, count and membership tests, ConcurrentBag.chunked() for very
+    large bags that must not stall other threads while growing,
+    ConcurrentBag.spilling() for bags that may outgrow the available memory, and
+    ConcurrentBag.typed() for compact storage of numbers.
+
+    The bag keeps a fingerprint of its contents up to date on every mutation,
+    so that __hash__ is O(1) and __eq__ can reject most unequal bags in O(1).
+
+    take() and take_many(block=True) wait for items to be added, which makes the
+    bag usable as an unordered work pool; close() releases the waiting consumers.
+
+    Iteration does not copy the items: an iterator keeps a reference to the current
+    storage, and the first write made while iterators are active replaces the
+    storage with a copy (copy-on-write), leaving the iterated one unchanged.
     """
     def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
         self._lock: threading.RLock = threading.RLock()
-        self._items: List[T] = list(iterable) if iterable is not None else []
+        self._items: Union[List[T], _CountedStorage[T], _OrderedCountedStorage[T], _ChunkedStorage[T],
+                           _TypedStorage] = \
+            list(iterable) if iterable is not None else []
+        # Multiset fingerprint of self._items (see _fingerprint_of), updated under self._lock.
+        # None once an unhashable item has been added: it is then recomputed on clear().
+        # Typed bags don't maintain it, as hashing every number would dominate bulk inserts.
+        self._fingerprint: Optional[int] = _fingerprint_of(self._items)
+        self._typecode: Optional[str] = None  # array typecode of typed bags
+        self._not_empty = threading.Condition(self._lock)
+        self._waiting = 0  # number of threads blocked in take()/take_many()
+        self._closed = False
+        # Copy-on-write iteration: number of active iterators over the current storage,
+        # and a generation number bumped whenever the storage is replaced by a copy.
+        self._readers = 0
+        self._generation = 0
+
+    @classmethod
+    def hashed(cls, iterable: Optional[Iterable[T]] = None, ordered: bool = False) -> "ConcurrentBag[T]":
+        """
+        Create a bag stored as a hashed multiset (element -> count) instead of a list.
+
+        append, remove, discard, count and `in` are O(1), instead of O(n) for the
+        list representation. Elements must be hashable. Iteration yields equal
+        elements together, unless ordered=True, which keeps insertion order
+        at the cost of some extra memory per item.
+        Positional access (bag[i], pop(i) with i != -1) is O(n).
+
+        Example:
+            bag = ConcurrentBag.hashed(['a', 'b', 'a'])
+            bag.count('a')  # 2
+            bag.remove('a')  # O(1)
+        """
+        bag = cls()
+        bag._items = _OrderedCountedStorage(iterable) if ordered else _CountedStorage(iterable)
+        bag._fingerprint = _fingerprint_of(bag._items)
+        return bag
+
+    @classmethod
+    def chunked(cls, iterable: Optional[Iterable[T]] = None,
+                chunk_size: int = _DEFAULT_CHUNK_SIZE) -> "ConcurrentBag[T]":
+        """
+        Create a bag stored in fixed-size chunks instead of a single list.
+
+        A growing list occasionally reallocates and copies all its items while the
+        lock is held; chunked storage only ever starts a new chunk, so append and
+        extend latency stays flat however large the bag gets. Iteration snapshots
+        the list of chunks (not the items) and copies a chunk only if it is
+        modified during the iteration.
+        Positional access walks the chunks: O(n / chunk_size).
+
+        Example:
+            events = ConcurrentBag.chunked(chunk_size=8192)
+            events.extend(batch)
+        """
+        bag = cls()
+        bag._items = _ChunkedStorage(iterable, chunk_size)
+        bag._fingerprint = _fingerprint_of(bag._items)
+        return bag
+
+    @classmethod
+    def spilling(cls, max_items_in_memory: int, iterable: Optional[Iterable[T]] = None,
+                 chunk_size: int = _DEFAULT_CHUNK_SIZE, directory: Optional[str] = None) -> "ConcurrentBag[T]":
+        """
+        Create a chunked bag that moves its oldest chunks to temporary segment files
+        once it holds more than max_items_in_memory items in memory.
+
+        Chunks are pickled and written by a background thread: appending threads
+        never wait for the disk. Spilled chunks are read back (memory-mapped)
+        transparently and without holding the bag's lock: one at a time when
+        reading, and for good when they are modified, e.g. when pop() reaches them. Segment files are created in
+        directory (the system's temporary directory by default) and deleted as
+        soon as they are no longer needed. Items must be picklable; if one is
+        not, spilling stops and the items stay in memory.
+
+        Example:
+            pending = ConcurrentBag.spilling(max_items_in_memory=1_000_000)
+            pending.extend(records)
+        """
+        if max_items_in_memory < 0:
+            raise ValueError("max_items_in_memory must be non-negative")
+        bag = cls()
+        bag._items = _SpillingStorage(_Spiller(bag, max_items_in_memory, directory), chunk_size=chunk_size)
+        if iterable is not None:
+            bag.extend(iterable)
+        return bag
+
+    @classmethod
+    def typed(cls, typecode: str, iterable: Optional[Iterable[Any]] = None) -> "ConcurrentBag[Any]":
+        """
+        Create a bag of numbers stored unboxed in an array.array of the given typecode
+        (e.g. "d" for floats, "q" for 64-bit ints), using several times less memory
+        than a list of Python objects.
+
+        extend() copies raw bytes from objects exposing a buffer of the same type
+        (arrays, NumPy arrays, memoryviews), without creating Python objects.
+        to_memoryview() and to_numpy() export a snapshot without copying it.
+
+        Example:
+            latencies = ConcurrentBag.typed("d")
+            latencies.append(0.0132)
+            latencies.extend(numpy_batch)
+            view = latencies.to_memoryview()
+        """
+        bag = cls()
+        bag._typecode = typecode
+        bag._items = _TypedStorage(typecode)
+        bag._fingerprint = None
+        if iterable is not None:
+            bag._items.extend(_to_array(typecode, iterable))
+        return bag
+
+    def to_memoryview(self) -> memoryview:
+        """
+        Return a read-only memoryview of a snapshot of a typed bag, without copying it.
+
+        The view shares memory with the bag's current storage: while it is alive,
+        the next modification of the bag copies the storage first (see __iter__),
+        once. Modifications made after the view (and any NumPy array over it) has
+        been garbage collected don't copy anything.
+
+        Example:
+            view = latencies.to_memoryview()
+            total = sum(view)
+        """
+        with self._lock:
+            if self._typecode is None:
+                raise TypeError("to_memoryview() requires a bag created with ConcurrentBag.typed()")
+            # Like an iterator that lasts as long as the view: the storage stays shared
+            # with it until the view is garbage collected
+            self._readers += 1
+            view = memoryview(self._items).toreadonly()
+            weakref.finalize(view, _release_export, weakref.ref(self), self._generation)
+            return view
+
+    def to_numpy(self) -> Any:
+        """
+        Return a read-only NumPy array over a snapshot of a typed bag, without copying it.
+        Requires NumPy.
+
+        Example:
+            p99 = numpy.percentile(latencies.to_numpy(), 99)
+        """
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError("to_numpy() requires NumPy to be installed") from e
+        view = self.to_memoryview()
+        return numpy.frombuffer(view, dtype=view.format)
+
+    def _fingerprint_add(self, item: Any) -> None:
+        # Must be called with self._lock held
+        if self._fingerprint is not None:
+            try:
+                self._fingerprint = (self._fingerprint + hash((item,))) & _MASK64
+            except TypeError:
+                self._fingerprint = None
+
+    def _fingerprint_remove(self, item: Any) -> None:
+        # Must be called with self._lock held
+        if self._fingerprint is not None:
+            try:
+                self._fingerprint = (self._fingerprint - hash((item,))) & _MASK64
+            except TypeError:
+                self._fingerprint = None
+
+    def _fingerprint_add_all(self, items: Iterable[Any]) -> None:
+        if self._fingerprint is not None:
+            delta = _fingerprint_of(items)
+            self._fingerprint = None if delta is None else (self._fingerprint + delta) & _MASK64
+
+    def _fingerprint_remove_all(self, items: Iterable[Any]) -> None:
+        if self._fingerprint is not None:
+            delta = _fingerprint_of(items)
+            self._fingerprint = None if delta is None else (self._fingerprint - delta) & _MASK64
+
+    def _copy_on_write(self) -> None:
+        # Must be called with self._lock held, before modifying self._items while
+        # iterators are active: they keep the current storage, writers get a copy.
+        self._items = self._items.copy()
+        self._readers = 0
+        self._generation += 1
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise CollectionClosedError("The bag has been closed")
+
+    def _swap_in(self, spilled: _SpilledChunk, chunk: Optional[List[T]] = None) -> None:
+        # Called without the lock by the methods that got _ChunkNotLoaded, before
+        # they try again: loads spilled (unless already loaded as chunk) and swaps it in.
+        if chunk is None:
+            chunk = spilled.load()
+        with self._lock:
+            storage = self._items
+            if isinstance(storage, _SpillingStorage):
+                storage._restore(spilled, chunk)
+
+    def _detached_view(self, spilled_only: bool = True) -> Optional[_SpillingStorage[T]]:
+        # Must be called with self._lock held. For a spilling bag (with spilled chunks,
+        # if spilled_only), returns a copy of the storage to read after releasing the
+        # lock, loading the spilled chunks as it goes; None for the other bags.
+        items = self._items
+        if not isinstance(items, _SpillingStorage) or (spilled_only and not items.spilled_items()):
+            return None
+        view = items.copy()
+        view.detached = True
+        return view
 
     def append(self, item: T) -> None:
         with self._lock:
+            self._check_open()
+            if self._readers:
+                self._copy_on_write()
             self._items.append(item)
+            self._fingerprint_add(item)
+            if self._waiting:
+                self._not_empty.notify()
 
     def extend(self, iterable: Iterable[T]) -> None:
+        """
+        Add the items of iterable. The iterable is read before taking the lock.
+
+        Collections (lists, tuples, sets, arrays...) are added atomically. Streams
+        (generators, iterators, files...) are read in batches, each added as soon
+        as it is read, so that memory use and lock hold times stay bounded (see ingest()).
+        """
+        if _ingest.is_stream(iterable):
+            self.ingest(iterable)
+            return
+        items = list(iterable) if self._typecode is None else _to_array(self._typecode, iterable)
         with self._lock:
-            self._items.extend(iterable)
+            self._check_open()
+            if self._readers:
+                self._copy_on_write()
+            self._items.extend(items)
+            self._fingerprint_add_all(items)
+            if self._waiting:
+                # Wake only as many consumers as there are new items
+                self._not_empty.notify(len(items))
+
+    def ingest(self, source: Iterable[T], batch_size: int = _ingest.DEFAULT_BATCH_SIZE,
+               max_delay: Optional[float] = None) -> int:
+        """
+        Add the items of source, read outside the lock and added in batches of
+        batch_size items, each in a single lock acquisition. With max_delay, a
+        partial batch is also added once its first item has waited max_delay
+        seconds (checked when the next item arrives). Returns the number of items added.
+
+        Example:
+            bag.ingest(parse(line) for line in open('events.log'))
+        """
+        count = 0
+        for batch in _ingest.batches(source, batch_size, max_delay):
+            self.extend(batch)
+            count += len(batch)
+        return count
+
+    async def async_ingest(self, source: Any, batch_size: int = _ingest.DEFAULT_BATCH_SIZE,
+                           max_delay: Optional[float] = None) -> int:
+        """
+        Like ingest(), for an async iterable (e.g. an asyncio stream reader).
+
+        Example:
+            await bag.async_ingest(read_records(reader), batch_size=256, max_delay=0.1)
+        """
+        count = 0
+        async for batch in _ingest.async_batches(source, batch_size, max_delay):
+            self.extend(batch)
+            count += len(batch)
+        return count
 
     def pop(self, index: int = -1) -> T:
-        with self._lock:
-            return self._items.pop(index)
+        try:
+            with self._lock:
+                if self._readers:
+                    self._copy_on_write()
+                item = self._items.pop(index)
+                self._fingerprint_remove(item)
+                return item
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            return self.pop(index)
 
     def remove(self, value: T) -> None:
+        try:
+            with self._lock:
+                if self._readers:
+                    self._copy_on_write()
+                self._items.remove(value)
+                self._fingerprint_remove(value)
+        except _ChunkNotLoaded as e:
+            self._remove_spilled(value, e.chunk)
+
+    def _remove_spilled(self, value: T, spilled: _SpilledChunk) -> None:
+        # remove() for spilling bags whose chunks in memory do not hold value: the
+        # spilled chunks are loaded without the lock, one at a time, and only the
+        # one holding value is swapped back in.
+        checked: List[_SpilledChunk] = []
+        while True:
+            chunk = spilled.load()
+            if value in chunk:
+                self._swap_in(spilled, chunk)
+            else:
+                checked.append(spilled)
+            try:
+                with self._lock:
+                    self._items.remove(value, checked)  # type: ignore
+                    self._fingerprint_remove(value)
+                    return
+            except _ChunkNotLoaded as e:
+                spilled = e.chunk
+
+    def try_take(self, default: Optional[T] = None) -> Optional[T]:
+        """
+        Remove and return an arbitrary item, or return default if the bag is empty.
+
+        Unlike pop(), an empty bag is not an error, so consumers don't need
+        exception handling on their fast path.
+
+        Example:
+            item = bag.try_take()
+            if item is not None:
+                process(item)
+        """
+        try:
+            with self._lock:
+                if not self._items:
+                    return default
+                if self._readers:
+                    self._copy_on_write()
+                item = self._items.pop()
+                self._fingerprint_remove(item)
+                return item
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            return self.try_take(default)
+
+    def take_many(self, n: int, block: bool = False, timeout: Optional[float] = None) -> List[T]:
+        """
+        Remove and return up to n arbitrary items in a single lock acquisition.
+
+        Returns fewer than n items (possibly none) if the bag holds fewer.
+        The items are taken from wherever removal is cheapest (the end of the list).
+
+        With block=True, waits until at least one item is available (for at most
+        timeout seconds, if given; an empty list is returned on timeout).
+        Raises CollectionClosedError if the bag is closed while empty.
+
+        Example:
+            batch = bag.take_many(100)
+            batch = bag.take_many(100, block=True, timeout=1.0)
+        """
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        try:
+            with self._lock:
+                if block and n and not self._wait_for_items(timeout):
+                    return []
+                if self._readers:
+                    self._copy_on_write()
+                items = self._items
+                if isinstance(items, (list, _TypedStorage)):
+                    start = max(0, len(items) - n)
+                    taken = items[start:]
+                    del items[start:]
+                    if isinstance(taken, array.array):
+                        taken = taken.tolist()
+                else:
+                    if isinstance(items, _SpillingStorage):
+                        items.check_last(n)
+                    taken = [items.pop() for _ in range(min(n, len(items)))]
+                self._fingerprint_remove_all(taken)
+                return taken
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            return self.take_many(n, block, timeout)
+
+    def _wait_for_items(self, timeout: Optional[float]) -> bool:
+        # Must be called with self._lock held. Returns False on timeout.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._items:
+            if self._closed:
+                raise CollectionClosedError("The bag has been closed")
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._waiting += 1
+            try:
+                self._not_empty.wait(remaining)
+            finally:
+                self._waiting -= 1
+        return True
+
+    def take(self, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return an arbitrary item, waiting for one to be added if the bag is empty.
+
+        Raises TimeoutError if no item arrives within timeout seconds (None waits
+        forever), and CollectionClosedError if the bag is closed while empty.
+
+        Example:
+            while True:
+                try:
+                    job = pool.take(timeout=1.0)
+                except CollectionClosedError:
+                    break
+        """
+        try:
+            with self._lock:
+                if not self._wait_for_items(timeout):
+                    raise TimeoutError("No item was added to the bag in time")
+                if self._readers:
+                    self._copy_on_write()
+                item = self._items.pop()
+                self._fingerprint_remove(item)
+                return item
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            return self.take(timeout)
+
+    def close(self) -> None:
+        """
+        Close the bag: further appends raise CollectionClosedError, and consumers
+        blocked in take()/take_many() are woken up. Items already in the bag can
+        still be taken; once it is empty, take() raises CollectionClosedError.
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def drain(self) -> List[T]:
+        """
+        Remove and return all items.
+
+        The contents are swapped out for an empty storage in O(1) under the lock;
+        for the list representation the removed list is returned as is, otherwise
+        it is converted to a list after the lock has been released.
+
+        Example:
+            for item in bag.drain():
+                process(item)
+        """
+        with self._lock:
+            items = self._items
+            self._items = _empty_like(items)
+            self._fingerprint = 0 if self._typecode is None else None
+            if isinstance(items, _SpillingStorage):
+                items.detached = True  # its spilled chunks are loaded by list() below
+            # Active iterators keep the old storage, so it must not be handed out as is
+            shared = self._readers > 0
+            self._readers = 0
+            self._generation += 1
+        if isinstance(items, array.array):
+            return items.tolist()
+        return items if isinstance(items, list) and not shared else list(items)
+
+    def sample(self, k: int) -> List[T]:
+        """
+        Return k distinct items (by position) chosen at random, without copying the bag.
+
+        Only the k chosen items are read under the lock: O(k) for the list and
+        typed representations, O(k log k + n / chunk_size) for chunked bags.
+        Hashed bags are walked once, O(n). Raises ValueError if k > len(bag).
+
+        Example:
+            for latency in samples.sample(100):
+                print(latency)
+        """
+        if k < 0:
+            raise ValueError("k must be non-negative")
+        with self._lock:
+            items = self._items
+            size = len(items)
+            if k > size:
+                raise ValueError("Sample larger than the bag")
+            indices = random.sample(range(size), k)
+            if isinstance(items, (list, _TypedStorage)):
+                return [items[i] for i in indices]
+            indices.sort()
+            view = self._detached_view()
+            if view is not None:
+                chosen = []  # read below, without the lock
+            elif isinstance(items, _ChunkedStorage):
+                chosen = items.items_at(indices)
+            else:
+                wanted = iter(indices)
+                target = next(wanted, size)
+                chosen = []
+                for position, item in enumerate(items):
+                    if position == target:
+                        chosen.append(item)
+                        target = next(wanted, size)
+        if view is not None:
+            chosen = view.items_at(indices)
+        # The positions were sorted to walk the storage once: restore a random order
+        random.shuffle(chosen)
+        return chosen
+
+    def parallel_map(self, fn: Callable[[T], R], executor: Optional[Executor] = None,
+                     chunk_size: Optional[int] = None, max_workers: Optional[int] = None) -> Iterator[R]:
+        """
+        Apply fn to every item of a snapshot of the bag, in parallel, and return an
+        iterator over the results, in the snapshot's order.
+
+        The snapshot (taken when parallel_map is called, see __iter__) is split into
+        chunks that run on executor: a concurrent.futures thread pool of max_workers
+        threads by default, or any given Executor (use a ProcessPoolExecutor for
+        CPU-bound functions, which must then be picklable, as must the items).
+        Unless chunk_size is given, chunks are sized from the measured time per
+        item. Results are yielded as soon as they are ready, and at most two chunks
+        per worker are in flight, so memory use does not grow with the bag.
+
+        Example:
+            with ProcessPoolExecutor() as pool:
+                for digest in bag.parallel_map(compute_digest, executor=pool):
+                    store(digest)
+        """
+        items = iter(self)
+        chunks = _parallel.run_chunks(items, _parallel._map_chunk, fn, executor, chunk_size, max_workers)
+        return _parallel.flatten(chunks)
+
+    def parallel_filter(self, predicate: Callable[[T], Any], executor: Optional[Executor] = None,
+                        chunk_size: Optional[int] = None, max_workers: Optional[int] = None) -> Iterator[T]:
+        """
+        Return an iterator over the items of a snapshot of the bag for which predicate
+        is true, evaluating predicate in parallel. See parallel_map() for the arguments.
+
+        Example:
+            errors = list(bag.parallel_filter(is_error))
+        """
+        items = iter(self)
+        chunks = _parallel.run_chunks(items, _parallel._filter_chunk, predicate, executor, chunk_size, max_workers)
+        return _parallel.flatten(chunks)
+
+    def parallel_reduce(self, fn: Callable[[Any, Any], Any], initializer: Any = _MISSING,
+                        combine: Optional[Callable[[Any, Any], Any]] = None, executor: Optional[Executor] = None,
+                        chunk_size: Optional[int] = None, max_workers: Optional[int] = None) -> Any:
+        """
+        Reduce a snapshot of the bag with fn, like functools.reduce, in parallel.
+
+        Each chunk is reduced with fn, then the chunk results are combined, in order,
+        with combine (fn by default), starting from initializer if given. fn must
+        therefore be associative, and initializer should be its neutral element
+        (it is used once, not once per chunk). See parallel_map() for the other
+        arguments. Like functools.reduce, raises TypeError for an empty bag
+        without initializer.
+
+        Example:
+            total = bag.parallel_reduce(operator.add, 0)
+            longest = bag.parallel_reduce(lambda a, b: a if len(a) >= len(b) else b)
+        """
+        combine = combine or fn
+        result = initializer
+        chunks = _parallel.run_chunks(iter(self), _parallel._reduce_chunk, fn, executor, chunk_size, max_workers)
+        for partial in chunks:
+            result = partial if result is _MISSING else combine(result, partial)
+        if result is _MISSING:
+            raise TypeError("parallel_reduce() of an empty bag with no initializer")
+        return result
+
+    def for_each(self, fn: Callable[[T], Any], executor: Optional[Executor] = None,
+                 chunk_size: Optional[int] = None, max_workers: Optional[int] = None) -> None:
+        """
+        Call fn on every item of a snapshot of the bag, in parallel, and wait for
+        all calls to complete. See parallel_map() for the arguments.
+
+        Example:
+            bag.for_each(send_notification, max_workers=32)
+        """
+        for _ in _parallel.run_chunks(iter(self), _parallel._for_each_chunk, fn, executor, chunk_size, max_workers):
+            pass
+
+    def discard(self, value: T) -> bool:
+        """
+        Remove one occurrence of value if present.
+        Returns True if an item was removed, False otherwise.
+        """
+        try:
+            with self._lock:
+                if self._readers:
+                    self._copy_on_write()
+                self._items.remove(value)
+                self._fingerprint_remove(value)
+                return True
+        except ValueError:
+            return False
+        except _ChunkNotLoaded as e:
+            try:
+                self._remove_spilled(value, e.chunk)
+            except ValueError:
+                return False
+            return True
+
+    def count(self, value: T) -> int:
+        with self._lock:
+            view = self._detached_view()
+            if view is None:
+                return self._items.count(value)
+        return view.count(value)
+
+    def __contains__(self, value: Any) -> bool:
         with self._lock:
-            self._items.remove(value)
+            view = self._detached_view()
+            if view is None:
+                return value in self._items
+        return value in view
 
     def __getitem__(self, index: int) -> T:
         with self._lock:
-            return self._items[index]
+            view = self._detached_view()
+            if view is None:
+                return self._items[index]
+        return view[index]
 
     def __setitem__(self, index: int, value: T) -> None:
-        with self._lock:
-            self._items[index] = value
+        try:
+            with self._lock:
+                old = self._items[index]
+                if self._readers:
+                    self._copy_on_write()
+                if isinstance(index, slice):
+                    values = list(value)  # type: ignore
+                    self._items[index] = values  # type: ignore
+                    self._fingerprint_remove_all(old)  # type: ignore
+                    self._fingerprint_add_all(values)
+                else:
+                    self._items[index] = value
+                    self._fingerprint_remove(old)
+                    self._fingerprint_add(value)
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            self.__setitem__(index, value)
 
     def __delitem__(self, index: int) -> None:
-        with self._lock:
-            del self._items[index]
+        try:
+            with self._lock:
+                old = self._items[index]
+                if self._readers:
+                    self._copy_on_write()
+                del self._items[index]
+                if isinstance(index, slice):
+                    self._fingerprint_remove_all(old)  # type: ignore
+                else:
+                    self._fingerprint_remove(old)
+        except _ChunkNotLoaded as e:
+            self._swap_in(e.chunk)
+            self.__delitem__(index)
 
     def __len__(self) -> int:
         with self._lock:
             return len(self._items)
 
     def __iter__(self) -> Iterator[T]:
+        """
+        Iterate over a snapshot of the bag, taken in O(1).
+
+        The iterator reads the current storage without holding the lock. The storage
+        is only copied if the bag is modified before the iteration ends; an iterator
+        that is abandoned before being exhausted costs at most one such copy.
+        """
         with self._lock:
-            return iter(self._items.copy())
+            # Spilling bags are read from a copy: the background spiller changes their storage in place
+            view = self._detached_view(spilled_only=False)
+            if view is not None:
+                return iter(view)
+            items = self._items
+            generation = self._generation
+            self._readers += 1
+        return self._iterate(items, generation)
+
+    def _iterate(self, items: Iterable[T], generation: int) -> Iterator[T]:
+        try:
+            yield from items
+        finally:
+            with self._lock:
+                if self._generation == generation:
+                    self._readers -= 1
 
     def clear(self) -> None:
         with self._lock:
-            self._items.clear()
+            if self._readers:
+                # No need to copy what is about to be discarded
+                items = self._items
+                self._items = _empty_like(items)
+                self._readers = 0
+                self._generation += 1
+            else:
+                self._items.clear()
+            self._fingerprint = 0 if self._typecode is None else None
 
     def __repr__(self) -> str:
+        # Only the first _REPR_LIMIT items are collected under the lock; formatting happens outside it
         with self._lock:
-            return f"ConcurrentBag({self._items!r})"
+            size = len(self._items)
+            view = self._detached_view()
+            if view is None:
+                head = list(islice(self._items, _REPR_LIMIT))
+        if view is not None:
+            head = list(islice(view, _REPR_LIMIT))
+        if size <= _REPR_LIMIT:
+            return f"{type(self).__name__}({head!r})"
+        shown = ", ".join(repr(item) for item in head)
+        return f"{type(self).__name__}([{shown}, ...], size={size})"
 
     def __eq__(self, other: Any) -> bool:
         """
@@ -69,23 +1438,50 @@ class ConcurrentBag(Generic[T]):
         """
         if not isinstance(other, ConcurrentBag):
             return False
-        
-        with self._lock:
-            with other._lock:
-                # Compare as multisets by counting element frequencies
-                from collections import Counter
-                return Counter(self._items) == Counter(other._items)
+        if other is self:
+            return True
+
+        # Lock in a consistent order, so that a == b and b == a cannot deadlock
+        first, second = (self, other) if id(self) < id(other) else (other, self)
+        with first._lock:
+            with second._lock:
+                if len(self._items) != len(other._items):
+                    return False
+                if (self._fingerprint is not None and other._fingerprint is not None
+                        and self._fingerprint != other._fingerprint):
+                    return False
+                views = (self._detached_view(), other._detached_view())
+                if views == (None, None):
+                    # Same fingerprint: compare as multisets by counting element frequencies
+                    return _element_counts(self._items) == _element_counts(other._items)
+                mine, theirs = (view if view is not None else bag._items.copy()
+                                for view, bag in zip(views, (self, other)))
+        # Spilled chunks are read without the locks, from copies taken while holding both
+        return _element_counts(mine) == _element_counts(theirs)
 
     def __hash__(self) -> int:
         """
         Thread-safe hash computation.
         
         The hash is computed based on the multiset content (element frequencies).
+        It is derived from the incrementally maintained fingerprint, so it is O(1).
+        Bags that do not maintain it (typed bags, bags that held unhashable elements)
+        compute the same fingerprint from their elements, so equal bags always hash
+        the same.
         Note: The hash will change if the bag is modified.
         """
         with self._lock:
-            # Convert to frozenset of (element, count) pairs for consistent hashing
-            from collections import Counter
-            counter = Counter(self._items)
-            items = frozenset(counter.items())
-            return hash(items)
\ No newline at end of file
+            fingerprint = self._fingerprint
+            size = len(self._items)
+            view = None
+            if fingerprint is None:
+                view = self._detached_view()
+                if view is None:
+                    fingerprint = _hashable_fingerprint(self._items)
+                    if self._typecode is None:
+                        # All the elements are hashable again: resume incremental maintenance
+                        self._fingerprint = fingerprint
+        if view is not None:
+            # Spilled chunks are read without the lock, from a copy
+            fingerprint = _hashable_fingerprint(view)
+        return hash((fingerprint, size))
\ No newline at end of file
@@ -0,0 +1,100 @@
+from typing import Any, Callable, Optional, TypeVar
+
+from .concurrent_dict import ConcurrentDictionary, _MISSING
+
+K = TypeVar('K')
+V = TypeVar('V')
+R = TypeVar('R')
+
+
+class ConcurrentDefaultDictionary(ConcurrentDictionary[K, V]):
+    """
+    A thread-safe equivalent of collections.defaultdict.
+
+    Missing keys are filled with default_factory() on first access. The factory is
+    called only on a real miss and at most once per key, even when many threads
+    request the same missing key at the same time. It runs under that key's lock,
+    not under the dictionary lock, so a slow factory does not block other keys.
+
+    The mutate() family applies in-place changes to the stored containers under the
+    key's lock, which makes grouping workloads safe without allocating throwaway
+    defaults (as setdefault(key, []) does) and without holding the dictionary lock
+    while the container is modified.
+
+    Example:
+        groups = ConcurrentDefaultDictionary(list)
+        groups.append_to('errors', record)
+        size = groups.mutate('errors', len)
+    """
+    def __init__(self, default_factory: Optional[Callable[[], V]] = None, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.default_factory = default_factory
+
+    def _get_or_create(self, key: K) -> V:
+        with self._lock:
+            value = self._dict.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.default_factory is None:
+            raise KeyError(key)
+        with self._get_key_lock(key):
+            with self._lock:
+                value = self._dict.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            default = self.default_factory()
+            with self._lock:
+                # The key may have been assigned directly (without its key lock) meanwhile
+                value = self._dict.get(key, _MISSING)
+                if value is _MISSING:
+                    self._store(key, default)
+                    value = default
+            return value
+
+    def __getitem__(self, key: K) -> V:
+        if self.default_factory is None:
+            return super().__getitem__(key)
+        return self._get_or_create(key)
+
+    def mutate(self, key: K, func: Callable[[V], R]) -> R:
+        """
+        Atomically apply func to the value stored under key, creating it with
+        default_factory() if missing, and return func's result.
+
+        func runs under the key's lock, so it may modify the value in place
+        (e.g. append to a list) safely with respect to other mutate() calls
+        on the same key. Other keys are not blocked.
+
+        Example:
+            d = ConcurrentDefaultDictionary(list)
+            d.mutate('x', lambda items: items.extend([1, 2]))
+            snapshot = d.mutate('x', list.copy)
+        """
+        with self._get_key_lock(key):
+            return func(self._get_or_create(key))
+
+    def append_to(self, key: K, item: Any) -> None:
+        """
+        Atomically append item to the container stored under key, creating it if missing.
+
+        Example:
+            d = ConcurrentDefaultDictionary(list)
+            d.append_to('x', 1)  # d['x'] == [1]
+        """
+        with self._get_key_lock(key):
+            self._get_or_create(key).append(item)  # type: ignore
+
+    def add_to(self, key: K, item: Any) -> None:
+        """
+        Atomically add item to the set stored under key, creating it if missing.
+
+        Example:
+            d = ConcurrentDefaultDictionary(set)
+            d.add_to('x', 1)  # d['x'] == {1}
+        """
+        with self._get_key_lock(key):
+            self._get_or_create(key).add(item)  # type: ignore
+
+    def __repr__(self) -> str:
+        with self._lock:
+            return f"ConcurrentDefaultDictionary({self.default_factory!r}, {self._dict!r})"
@@ -1,29 +1,430 @@
+import asyncio
+import sys
 import threading
+import time
 from collections import deque
-from typing import Generic, Iterable, Iterator, Optional, TypeVar, Any
+from typing import AsyncIterator, Callable, Generic, Iterable, Iterator, List, Optional, TypeVar, Any, Union
+
+from . import _async_waiters, _ingest
+from .exceptions import CollectionClosedError, CollectionFullError
 
 T = TypeVar('T')
 
+_OVERFLOW_POLICIES = ("block", "drop_newest", "drop_oldest", "raise")
+
 class ConcurrentQueue(Generic[T]):
-    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
-        self._deque: deque[T] = deque(iterable) if iterable is not None else deque()
+    def __init__(self, iterable: Optional[Iterable[T]] = None, maxsize: Optional[int] = None,
+                 overflow: str = "block") -> None:
+        """
+        With maxsize, the queue holds at most maxsize items, and overflow tells what
+        happens when items are added to a full queue:
+        - "block": wait for consumers to make room (see append() for the timeout);
+        - "drop_newest": discard the items being added;
+        - "drop_oldest": discard items from the other end of the queue to make room;
+        - "raise": raise CollectionFullError, adding nothing.
+        Items discarded by the drop policies are counted in the dropped property.
+
+        Example:
+            queue = ConcurrentQueue(maxsize=10_000, overflow="drop_oldest")
+        """
+        if maxsize is not None and maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(_OVERFLOW_POLICIES)}")
+        self._deque: deque[T] = deque()
         self._lock: threading.RLock = threading.RLock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._waiting = 0  # number of threads blocked in pop()/popleft()
+        self._waiting_producers = 0  # number of threads blocked waiting for room
+        self._lingering = 0  # number of threads in popleft_many()/pop_many() waiting for min_n items
+        # Coroutines waiting in async_popleft()/async_append()
+        self._async_getters = _async_waiters.AsyncWaiters(self._lock, self._items_available)
+        self._async_putters = _async_waiters.AsyncWaiters(self._lock, self._room_available)
+        self._closed = False
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._dropped = 0
+        if iterable is not None:
+            items = list(iterable)
+            with self._lock:
+                self._put(items, False, timeout=0)
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise CollectionClosedError("The queue has been closed")
+
+    def _added(self, count: int) -> None:
+        # Must be called with self._lock held: wake up one waiting consumer per item added.
+        # Lingering batch consumers may go back to waiting, so everyone is woken up then.
+        if self._lingering:
+            self._not_empty.notify_all()
+        elif self._waiting:
+            self._not_empty.notify(count)
+        if self._async_getters:
+            self._async_getters.notify()
+
+    def _removed(self, count: int) -> None:
+        # Must be called with self._lock held: wake up one waiting producer per item removed
+        if self._waiting_producers:
+            self._not_full.notify(count)
+        if self._async_putters:
+            self._async_putters.notify()
+
+    def _items_available(self) -> int:
+        # Number of waiting coroutines that can proceed: all of them once closed
+        return sys.maxsize if self._closed else len(self._deque)
+
+    def _room_available(self) -> int:
+        if self._closed or self._maxsize is None:
+            return sys.maxsize
+        return self._maxsize - len(self._deque)
 
-    def append(self, item: T) -> None:
+    def _put(self, items: List[T], left: bool, timeout: Optional[float]) -> None:
+        # Must be called with self._lock held. Adds items to one end, applying the overflow policy.
+        self._check_open()
+        queue = self._deque
+        add = queue.extendleft if left else queue.extend
+        maxsize = self._maxsize
+        if maxsize is None or len(queue) + len(items) <= maxsize:
+            add(items)
+            self._added(len(items))
+            return
+        if self._overflow == "raise":
+            raise CollectionFullError(f"The queue is full (maxsize={maxsize})")
+        if self._overflow == "drop_newest":
+            free = max(0, maxsize - len(queue))
+            self._dropped += len(items) - free
+            items = items[:free]
+        elif self._overflow == "drop_oldest":
+            excess = len(queue) + len(items) - maxsize
+            self._dropped += excess
+            if len(items) > maxsize:
+                items = items[len(items) - maxsize:]
+            remove = queue.pop if left else queue.popleft
+            for _ in range(len(queue) + len(items) - maxsize):
+                remove()
+        else:
+            self._put_blocking(items, add, timeout)
+            return
+        add(items)
+        self._added(len(items))
+
+    def _put_blocking(self, items: List[T], add: Any, timeout: Optional[float]) -> None:
+        # Must be called with self._lock held. Adds items as room is made, in order.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        maxsize = self._maxsize
+        assert maxsize is not None
+        done = 0
+        while done < len(items):
+            free = maxsize - len(self._deque)
+            if free > 0:
+                chunk = items[done:done + free]
+                add(chunk)
+                self._added(len(chunk))
+                done += len(chunk)
+                continue
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise CollectionFullError(
+                    f"The queue is full (maxsize={maxsize}): {done} of {len(items)} items were added")
+            self._waiting_producers += 1
+            try:
+                self._not_full.wait(remaining)
+            finally:
+                self._waiting_producers -= 1
+            self._check_open()
+
+    def append(self, item: T, timeout: Optional[float] = None) -> None:
+        """
+        Append item to the right end. If the queue is bounded, full, and its overflow
+        policy is "block", waits for room for at most timeout seconds (None waits
+        forever), then raises CollectionFullError.
+        """
         with self._lock:
-            self._deque.append(item)
+            if self._maxsize is None and not self._closed:
+                self._deque.append(item)
+                self._added(1)
+                return
+            self._put([item], False, timeout)
 
-    def appendleft(self, item: T) -> None:
+    def appendleft(self, item: T, timeout: Optional[float] = None) -> None:
         with self._lock:
-            self._deque.appendleft(item)
+            self._put([item], True, timeout)
+
+    @property
+    def maxsize(self) -> Optional[int]:
+        return self._maxsize
 
-    def pop(self) -> T:
+    @property
+    def dropped(self) -> int:
+        """Number of items discarded by the "drop_newest" or "drop_oldest" overflow policy."""
+        return self._dropped
+
+    def pop(self, block: bool = False, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return the rightmost item (see popleft() for block and timeout).
+        """
         with self._lock:
-            return self._deque.pop()
+            if block and not self._wait_for_items(timeout):
+                raise TimeoutError("No item was added to the queue in time")
+            item = self._deque.pop()
+            self._removed(1)
+            return item
+
+    def popleft(self, block: bool = False, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return the leftmost item.
 
-    def popleft(self) -> T:
+        By default, raises IndexError if the queue is empty. With block=True, waits
+        for an item to be added instead: raises TimeoutError if none arrives within
+        timeout seconds (None waits forever), and CollectionClosedError if the queue
+        is closed while empty.
+
+        Example:
+            while True:
+                try:
+                    job = queue.popleft(block=True, timeout=1.0)
+                except CollectionClosedError:
+                    break
+        """
+        with self._lock:
+            if block and not self._wait_for_items(timeout):
+                raise TimeoutError("No item was added to the queue in time")
+            item = self._deque.popleft()
+            self._removed(1)
+            return item
+
+    def try_pop(self, default: Optional[T] = None) -> Optional[T]:
+        """Remove and return the rightmost item, or return default if the queue is empty."""
+        with self._lock:
+            if not self._deque:
+                return default
+            item = self._deque.pop()
+            self._removed(1)
+            return item
+
+    def try_popleft(self, default: Optional[T] = None) -> Optional[T]:
+        """
+        Remove and return the leftmost item, or return default if the queue is empty.
+
+        Example:
+            item = queue.try_popleft()
+            if item is not None:
+                process(item)
+        """
         with self._lock:
-            return self._deque.popleft()
+            if not self._deque:
+                return default
+            item = self._deque.popleft()
+            self._removed(1)
+            return item
+
+    def _wait_for_items(self, timeout: Optional[float]) -> bool:
+        # Must be called with self._lock held. Returns False on timeout.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._deque:
+            if self._closed:
+                raise CollectionClosedError("The queue has been closed")
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._waiting += 1
+            try:
+                self._not_empty.wait(remaining)
+            finally:
+                self._waiting -= 1
+        return True
+
+    def _take(self, max_n: int, left: bool) -> List[T]:
+        # Must be called with self._lock held. Removes up to max_n items from one end.
+        queue = self._deque
+        n = min(max_n, len(queue))
+        if n == len(queue):
+            items = list(queue) if left else list(reversed(queue))
+            queue.clear()
+        else:
+            take = queue.popleft if left else queue.pop
+            items = [take() for _ in range(n)]
+        self._removed(n)
+        return items
+
+    def _take_many(self, max_n: int, left: bool, block: bool, timeout: Optional[float],
+                   min_n: int, linger: Optional[float]) -> List[T]:
+        if max_n < 0:
+            raise ValueError("max_n must be non-negative")
+        if not 1 <= min_n <= max(max_n, 1):
+            raise ValueError("min_n must be between 1 and max_n")
+        with self._lock:
+            if not block or not max_n:
+                return self._take(max_n, left)
+            start = time.monotonic()
+            if not self._wait_for_items(timeout):
+                return []
+            if len(self._deque) < min_n:
+                # Wait for more items, up to linger seconds and within the timeout
+                end = None if timeout is None else start + timeout
+                if linger is not None:
+                    linger_end = time.monotonic() + linger
+                    end = linger_end if end is None else min(end, linger_end)
+                self._lingering += 1
+                try:
+                    while len(self._deque) < min_n and not self._closed:
+                        remaining = None if end is None else end - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            break
+                        self._not_empty.wait(remaining)
+                finally:
+                    self._lingering -= 1
+            return self._take(max_n, left)
+
+    def popleft_many(self, max_n: int, block: bool = False, timeout: Optional[float] = None,
+                     min_n: int = 1, linger: Optional[float] = None) -> List[T]:
+        """
+        Remove and return up to max_n items from the left end, in order, in a single
+        lock acquisition. Returns fewer items (possibly none) if the queue holds fewer.
+
+        With block=True, waits for at least one item (for at most timeout seconds;
+        an empty list is returned on timeout). Then, if fewer than min_n items are
+        available, waits for more for at most linger seconds (None: until the
+        timeout), so that consumers can trade a little latency for larger batches.
+        Raises CollectionClosedError if the queue is closed while empty.
+
+        Example:
+            while True:
+                batch = queue.popleft_many(500, block=True, min_n=100, linger=0.01)
+                db.insert_many(batch)
+        """
+        return self._take_many(max_n, True, block, timeout, min_n, linger)
+
+    def pop_many(self, max_n: int, block: bool = False, timeout: Optional[float] = None,
+                 min_n: int = 1, linger: Optional[float] = None) -> List[T]:
+        """
+        Remove and return up to max_n items from the right end, rightmost first
+        (see popleft_many() for the other arguments).
+        """
+        return self._take_many(max_n, False, block, timeout, min_n, linger)
+
+    def drain_to(self, target: Union[List[T], Callable[[T], Any]], max_n: Optional[int] = None) -> int:
+        """
+        Remove up to max_n items (all of them by default) from the left end in a
+        single lock acquisition, and hand them over to target: a list, which is
+        extended with them, or a callable, called with each item in order once the
+        lock has been released. Returns the number of items removed.
+
+        Example:
+            batch = []
+            queue.drain_to(batch, max_n=1000)
+        """
+        if max_n is not None and max_n < 0:
+            raise ValueError("max_n must be non-negative")
+        with self._lock:
+            items = self._take(len(self._deque) if max_n is None else max_n, True)
+        if isinstance(target, list):
+            target.extend(items)
+        else:
+            for item in items:
+                target(item)
+        return len(items)
+
+    def close(self) -> None:
+        """
+        Close the queue: further appends raise CollectionClosedError, and consumers
+        blocked in pop()/popleft() and producers waiting for room are woken up.
+        Items already in the queue can still be popped; once it is empty, blocking
+        pops raise CollectionClosedError.
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            self._async_getters.notify()
+            self._async_putters.notify()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def async_popleft(self, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return the leftmost item, waiting without blocking the event loop
+        for an item to be added (from any thread or coroutine) if the queue is empty.
+
+        Raises TimeoutError if no item arrives within timeout seconds (None waits
+        forever), and CollectionClosedError if the queue is closed while empty.
+        The event loop is woken up with loop.call_soon_threadsafe(), once per burst
+        of items appended by other threads, never by polling.
+
+        Example:
+            job = await queue.async_popleft(timeout=5)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                if self._deque:
+                    item = self._deque.popleft()
+                    self._removed(1)
+                    return item
+                if self._closed:
+                    raise CollectionClosedError("The queue has been closed")
+                future = self._async_getters.wait(loop)
+            if not await self._wait_async(self._async_getters, loop, future, deadline):
+                raise TimeoutError("No item was added to the queue in time")
+
+    async def async_append(self, item: T, timeout: Optional[float] = None) -> None:
+        """
+        Append item to the right end. If the queue is bounded, full, and its overflow
+        policy is "block", waits without blocking the event loop for room to be made,
+        for at most timeout seconds (None waits forever), then raises CollectionFullError.
+        Other overflow policies apply immediately, as with append().
+
+        Example:
+            await queue.async_append(reading)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                if (self._maxsize is None or self._overflow != "block" or self._closed
+                        or len(self._deque) < self._maxsize):
+                    self._put([item], False, 0)
+                    return
+                future = self._async_putters.wait(loop)
+            if not await self._wait_async(self._async_putters, loop, future, deadline):
+                raise CollectionFullError(f"The queue is full (maxsize={self._maxsize})")
+
+    async def _wait_async(self, waiters: _async_waiters.AsyncWaiters, loop: asyncio.AbstractEventLoop,
+                          future: "asyncio.Future[None]", deadline: Optional[float]) -> bool:
+        # Returns False on timeout
+        try:
+            woken = await _async_waiters.wait_for(future, None if deadline is None else deadline - loop.time())
+        except BaseException:
+            with self._lock:
+                waiters.cancel(loop, future)
+            raise
+        if not woken:
+            with self._lock:
+                waiters.cancel(loop, future)
+        return woken
+
+    async def stream(self) -> AsyncIterator[T]:
+        """
+        Iterate asynchronously over the items popped from the left end, waiting for
+        new items when the queue is empty, until the queue is closed and empty.
+        Items already in the queue are taken without waiting, so a single wakeup
+        of the event loop serves a whole burst of items.
+
+        Example:
+            async for message in queue.stream():
+                await websocket.send(message)
+        """
+        while True:
+            try:
+                item = await self.async_popleft()
+            except CollectionClosedError:
+                return
+            yield item
 
     def __len__(self) -> int:
         with self._lock:
@@ -36,15 +437,74 @@ class ConcurrentQueue(Generic[T]):
 
     def clear(self) -> None:
         with self._lock:
+            count = len(self._deque)
             self._deque.clear()
+            self._removed(count)
+
+    def extend(self, iterable: Iterable[T], timeout: Optional[float] = None) -> None:
+        """
+        Append the items of iterable. The iterable is read before taking the lock.
+
+        Collections (lists, tuples...) are appended atomically. Streams (generators,
+        iterators, files...) are read in batches, each appended as soon as it is
+        read, so that memory use and lock hold times stay bounded (see ingest()).
 
-    def extend(self, iterable: Iterable[T]) -> None:
+        If the queue is bounded and there is not enough room for all the items:
+        - "block" appends the items that fit, then the others in order as room is
+          made; on timeout, CollectionFullError is raised and the items already
+          appended stay in the queue;
+        - "drop_newest" appends the items that fit and discards the rest;
+        - "drop_oldest" discards the oldest items (including new ones, if there are
+          more than maxsize) so that the last maxsize items are kept;
+        - "raise" raises CollectionFullError without appending any item.
+        """
+        if _ingest.is_stream(iterable):
+            for batch in _ingest.batches(iterable, _ingest.DEFAULT_BATCH_SIZE):
+                self.extend(batch, timeout)
+            return
+        items = list(iterable)
         with self._lock:
-            self._deque.extend(iterable)
+            self._put(items, False, timeout)
 
-    def extendleft(self, iterable: Iterable[T]) -> None:
+    def extendleft(self, iterable: Iterable[T], timeout: Optional[float] = None) -> None:
+        if _ingest.is_stream(iterable):
+            for batch in _ingest.batches(iterable, _ingest.DEFAULT_BATCH_SIZE):
+                self.extendleft(batch, timeout)
+            return
+        items = list(iterable)
         with self._lock:
-            self._deque.extendleft(iterable)
+            self._put(items, True, timeout)
+
+    def ingest(self, source: Iterable[T], batch_size: int = _ingest.DEFAULT_BATCH_SIZE,
+               max_delay: Optional[float] = None) -> int:
+        """
+        Append the items of source, read outside the lock and appended in batches of
+        batch_size items, each in a single lock acquisition. With max_delay, a
+        partial batch is also appended once its first item has waited max_delay
+        seconds (checked when the next item arrives). Returns the number of items appended.
+
+        Example:
+            queue.ingest(iter(socket_reader), batch_size=64, max_delay=0.05)
+        """
+        count = 0
+        for batch in _ingest.batches(source, batch_size, max_delay):
+            self.extend(batch)
+            count += len(batch)
+        return count
+
+    async def async_ingest(self, source: Any, batch_size: int = _ingest.DEFAULT_BATCH_SIZE,
+                           max_delay: Optional[float] = None) -> int:
+        """
+        Like ingest(), for an async iterable (e.g. an asyncio stream reader).
+
+        Example:
+            await queue.async_ingest(websocket, batch_size=32, max_delay=0.01)
+        """
+        count = 0
+        async for batch in _ingest.async_batches(source, batch_size, max_delay):
+            self.extend(batch)
+            count += len(batch)
+        return count
 
     def __repr__(self) -> str:
         with self._lock:
@@ -1,3 +1,5 @@
+import math
+import sys
 import threading
 from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, Generic, Tuple, ContextManager
 import warnings
@@ -6,6 +8,91 @@ T = TypeVar('T')
 K = TypeVar('K')
 V = TypeVar('V')
 
+_MISSING: Any = object()
+
+def _deep_sizeof(obj: Any) -> int:
+    """
+    Approximate size of obj in bytes, including the direct elements of built-in containers.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in list(obj.items()):  # type: ignore
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in list(obj):  # type: ignore
+            size += sys.getsizeof(item)
+    return size
+
+class _CountingBloomFilter:
+    """
+    Counting Bloom filter over the keys of a ConcurrentDictionary.
+
+    Writers (add/remove/reset) must hold the owning dictionary's lock.
+    Readers (might_contain) take no lock at all: a key is only added to the dictionary
+    after its counters are incremented, and its counters are only decremented after it
+    has been removed, so a negative answer is always correct.
+    Counters are 8-bit and saturate at 255; a saturated counter is never decremented.
+    """
+    def __init__(self, capacity: int, false_positive_rate: float, max_bytes: Optional[int] = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0.0 < false_positive_rate < 1.0:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        optimal = -capacity * math.log(false_positive_rate) / (math.log(2) ** 2)
+        # A power of two size lets positions be computed with a mask instead of a modulo
+        size = 1 << max(3, math.ceil(math.log2(optimal)))
+        if max_bytes is not None:
+            if max_bytes < 8:
+                raise ValueError("max_bytes must be at least 8")
+            size = min(size, 1 << int(math.log2(max_bytes)))
+        self._mask = size - 1
+        self._hash_count = max(1, round(size / capacity * math.log(2)))
+        self._counters = bytearray(size)
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._counters)
+
+    # Positions are derived by double hashing (h + i * step) from hash((key,)) rather
+    # than hash(key): small ints hash to themselves, so consecutive or interleaved
+    # integer keys would probe neighbouring counters. The tuple hash mixes all the bits
+    # of hash(key) in C, which is much cheaper than mixing them in Python.
+
+    def _positions(self, key: Any) -> List[int]:
+        h = hash((key,))
+        step = (h >> 32) | 1
+        mask = self._mask
+        return [(h + i * step) & mask for i in range(self._hash_count)]
+
+    def might_contain(self, key: Any) -> bool:
+        h = hash((key,))
+        mask = self._mask
+        counters = self._counters
+        # Most misses are answered by the first probe, so it is done before setting up the loop
+        if not counters[h & mask]:
+            return False
+        step = (h >> 32) | 1
+        for i in range(1, self._hash_count):
+            if not counters[(h + i * step) & mask]:
+                return False
+        return True
+
+    def add(self, key: Any) -> None:
+        counters = self._counters
+        for position in self._positions(key):
+            if counters[position] < 255:
+                counters[position] += 1
+
+    def remove(self, key: Any) -> None:
+        counters = self._counters
+        for position in self._positions(key):
+            if 0 < counters[position] < 255:
+                counters[position] -= 1
+
+    def reset(self) -> None:
+        self._counters[:] = bytes(len(self._counters))
+
+
 class ConcurrentDictionary(Generic[K, V]):
     """
     A thread-safe dictionary implementation using a re-entrant lock.
@@ -21,13 +108,139 @@ class ConcurrentDictionary(Generic[K, V]):
         self._lock = threading.RLock()
         self._dict: Dict[K, V] = dict(*args, **kwargs)  # type: ignore
         self._key_locks: Dict[K, threading.RLock] = {}
+        self._lookup_filter: Optional[_CountingBloomFilter] = None
+        # Maintained under self._lock by every insertion/removal, read without it
+        self._size = len(self._dict)
+        # Set by enable_memory_tracking(): bytes accounted for each entry when it was
+        # stored, subtracted as is on removal, and their total
+        self._entry_sizes: Optional[Dict[Any, int]] = None
+        self._entry_bytes = 0
+        # Called under self._lock with every mutation, e.g. by a ReplicationLeader
+        self._journal: Optional[Callable[[Tuple[Any, ...]], None]] = None
 
     def _get_key_lock(self, key: K) -> threading.RLock:
+        # Fast path: key locks are never replaced once created, so an existing one
+        # can be returned without taking the dictionary lock.
+        lock = self._key_locks.get(key)
+        if lock is not None:
+            return lock
         with self._lock:
             if key not in self._key_locks:
                 self._key_locks[key] = threading.RLock()
             return self._key_locks[key]
 
+    def _key_size(self, key: Any) -> int:
+        return sys.getsizeof(key)
+
+    def _value_size(self, value: Any) -> int:
+        return _deep_sizeof(value)
+
+    def _new_entry_sizes(self) -> Dict[Any, int]:
+        return {}
+
+    def _store(self, key: K, value: V, old_value: Any = _MISSING) -> None:
+        # Must be called with self._lock held. old_value is _MISSING when the key is new.
+        # Stored first: the weak stores raise TypeError for what cannot be weakly
+        # referenced, and may evict a dead entry for key, dropping its counts.
+        self._dict[key] = value
+        if old_value is _MISSING:
+            if self._lookup_filter is not None:
+                self._lookup_filter.add(key)
+            self._size += 1
+        if self._entry_sizes is not None:
+            size = self._key_size(key) + self._value_size(value)
+            self._entry_bytes += size - self._entry_sizes.get(key, 0)
+            self._entry_sizes[key] = size
+        if self._journal is not None:
+            self._journal(("s", key, value))
+
+    def _removed(self, key: Any) -> None:
+        # Must be called with self._lock held, after the entry left self._dict.
+        self._size -= 1
+        if self._entry_sizes is not None:
+            self._entry_bytes -= self._entry_sizes.pop(key, 0)
+
+    def _evict(self, key: Any, value: Any) -> None:
+        # on_evict callback of the weak stores: called under self._lock for entries
+        # dropped because their key or value was garbage collected.
+        if self._lookup_filter is not None:
+            self._lookup_filter.remove(key)
+        self._removed(key)
+        if self._journal is not None:
+            self._journal(("d", key))
+
+    def _remove(self, key: K, default: Any) -> Any:
+        # Must be called with self._lock held.
+        value = self._dict.pop(key, _MISSING)
+        if value is _MISSING:
+            return default
+        if self._lookup_filter is not None:
+            self._lookup_filter.remove(key)
+        self._removed(key)
+        if self._journal is not None:
+            self._journal(("d", key))
+        return value
+
+    def enable_lookup_filter(self, capacity: Optional[int] = None, false_positive_rate: float = 0.01,
+                             max_bytes: Optional[int] = None) -> None:
+        """
+        Put a counting Bloom filter in front of the dictionary.
+
+        With the filter enabled, `in`, get() and d[key] answer "definitely absent"
+        for most missing keys without acquiring the dictionary lock.
+        Hits (and false positives) still go through the lock as usual.
+
+        capacity is the number of keys the filter is sized for (default: twice the
+        current size, at least 1024); false_positive_rate is the target rate at that
+        capacity. max_bytes caps the memory used by the filter (one byte per counter),
+        at the cost of a higher false positive rate.
+
+        Example:
+            d = ConcurrentDictionary(routes)
+            d.enable_lookup_filter(capacity=1_000_000, false_positive_rate=0.01)
+        """
+        with self._lock:
+            if capacity is None:
+                capacity = max(1024, 2 * len(self._dict))
+            lookup_filter = _CountingBloomFilter(capacity, false_positive_rate, max_bytes)
+            for key in self._dict:
+                lookup_filter.add(key)
+            self._lookup_filter = lookup_filter
+
+    def enable_memory_tracking(self) -> None:
+        """
+        Keep the memory used by the entries in a counter, so that memory_estimate()
+        is O(1) and does not acquire the lock.
+
+        Each entry's size is measured when it is stored, including the direct
+        elements of built-in containers (list, tuple, set, dict), recorded in a map
+        alongside the dictionary, and subtracted as recorded when the entry is removed.
+        This costs one more map entry per key, and every store measures its value
+        while holding the dictionary lock: large container values make writes slower.
+        Values modified in place are not re-measured until they are stored again.
+
+        Example:
+            d = ConcurrentDictionary()
+            d.enable_memory_tracking()
+            if d.memory_estimate() > budget:
+                shed_load()
+        """
+        with self._lock:
+            if self._entry_sizes is not None:
+                return
+            entry_sizes = self._new_entry_sizes()
+            for key, value in list(self._dict.items()):
+                entry_sizes[key] = self._key_size(key) + self._value_size(value)
+            self._entry_bytes = sum(entry_sizes.values())
+            self._entry_sizes = entry_sizes
+
+    def disable_lookup_filter(self) -> None:
+        """
+        Remove the lookup filter installed by enable_lookup_filter(), if any.
+        """
+        with self._lock:
+            self._lookup_filter = None
+
     class _KeyLockContext:
         def __init__(self, outer : "ConcurrentDictionary[K,V]", key: K, default_value: Optional[V]):
             self._outer = outer
@@ -64,6 +277,9 @@ class ConcurrentDictionary(Generic[K, V]):
         return lock
 
     def __getitem__(self, key: K) -> V:
+        lookup_filter = self._lookup_filter
+        if lookup_filter is not None and not lookup_filter.might_contain(key):
+            raise KeyError(key)
         with self._lock:
             return self._dict[key]
 
@@ -79,17 +295,25 @@ class ConcurrentDictionary(Generic[K, V]):
 
     def __delitem__(self, key: K) -> None:
         with self._lock:
-            del self._dict[key]
+            if self._remove(key, _MISSING) is _MISSING:
+                raise KeyError(key)
 
 
     def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+        lookup_filter = self._lookup_filter
+        if lookup_filter is not None and not lookup_filter.might_contain(key):
+            return default
         with self._lock:
             return self._dict.get(key, default)
 
 
     def setdefault(self, key: K, default: V) -> V:
         with self._lock:
-            return self._dict.setdefault(key, default)
+            existing = self._dict.get(key, _MISSING)
+            if existing is not _MISSING:
+                return existing
+            self._store(key, default)
+            return default
 
 
     def assign_atomic(self, key: K, value: V) -> None:
@@ -115,13 +339,13 @@ class ConcurrentDictionary(Generic[K, V]):
             d.update_atomic('x', lambda v: v + 1)
         """
         with self._lock:
-            if key in self._dict:
-                old_value = self._dict[key]
+            old_value = self._dict.get(key, _MISSING)
+            if old_value is not _MISSING:
                 new_value = func(old_value)
-                self._dict[key] = new_value
+                self._store(key, new_value, old_value)
             else:
                 # If the key does not exist, we can set it directly
-                self._dict[key] = func(None) # type: ignore
+                self._store(key, func(None)) # type: ignore
 
     def remove_atomic(self, key: K) -> Optional[V]:
         """
@@ -137,7 +361,7 @@ class ConcurrentDictionary(Generic[K, V]):
             value = d.remove_atomic('x')  # Returns 1, removes 'x'
         """
         with self._lock:
-            return self._dict.pop(key, None)
+            return self._remove(key, None)
 
     def remove_if_exists(self, key: K) -> bool:
         """
@@ -151,10 +375,7 @@ class ConcurrentDictionary(Generic[K, V]):
             removed = d.remove_if_exists('y')  # Returns False
         """
         with self._lock:
-            if key in self._dict:
-                del self._dict[key]
-                return True
-            return False
+            return self._remove(key, _MISSING) is not _MISSING
 
     def get_and_remove(self, key: K, default: Optional[V] = None) -> Optional[V]:
         """
@@ -181,10 +402,11 @@ class ConcurrentDictionary(Generic[K, V]):
             existing = d.put_if_absent('y', 3)  # Returns None, adds 'y': 3
         """
         with self._lock:
-            if key in self._dict:
-                return self._dict[key]
+            existing = self._dict.get(key, _MISSING)
+            if existing is not _MISSING:
+                return existing
             else:
-                self._dict[key] = value
+                self._store(key, value)
                 return None
 
     def replace_if_present(self, key: K, value: V) -> bool:
@@ -199,8 +421,9 @@ class ConcurrentDictionary(Generic[K, V]):
             replaced = d.replace_if_present('y', 3)  # Returns False
         """
         with self._lock:
-            if key in self._dict:
-                self._dict[key] = value
+            current = self._dict.get(key, _MISSING)
+            if current is not _MISSING:
+                self._store(key, value, current)
                 return True
             return False
 
@@ -216,24 +439,39 @@ class ConcurrentDictionary(Generic[K, V]):
             replaced = d.replace_if_equal('x', 1, 3)  # Returns False (current value is 2)
         """
         with self._lock:
-            if key in self._dict and self._dict[key] == old_value:
-                self._dict[key] = new_value
+            current = self._dict.get(key, _MISSING)
+            if current is not _MISSING and current == old_value:
+                self._store(key, new_value, current)
                 return True
             return False
 
     def pop(self, key: K, default: Optional[V] = None) -> Optional[V]:
         with self._lock:
-            return self._dict.pop(key, default)
+            return self._remove(key, default)
 
 
     def popitem(self) -> tuple[K, V]:
         with self._lock:
-            return self._dict.popitem()
+            key, value = self._dict.popitem()
+            if self._lookup_filter is not None:
+                self._lookup_filter.remove(key)
+            self._removed(key)
+            if self._journal is not None:
+                self._journal(("d", key))
+            return key, value
 
 
     def clear(self) -> None:
         with self._lock:
             self._dict.clear()
+            if self._lookup_filter is not None:
+                self._lookup_filter.reset()
+            self._size = 0
+            if self._entry_sizes is not None:
+                self._entry_sizes.clear()
+            self._entry_bytes = 0
+            if self._journal is not None:
+                self._journal(("c",))
 
 
     def keys(self) -> List[K]:
@@ -252,13 +490,44 @@ class ConcurrentDictionary(Generic[K, V]):
 
 
     def __contains__(self, key: K) -> bool:
+        lookup_filter = self._lookup_filter
+        if lookup_filter is not None and not lookup_filter.might_contain(key):
+            return False
         with self._lock:
             return key in self._dict
 
 
     def __len__(self) -> int:
+        # The counter is only written under self._lock; reading it needs no lock.
+        return self._size
+
+    def estimated_size(self) -> int:
+        """
+        Return the number of entries without acquiring the lock.
+
+        The value is read from a counter maintained by every insertion and removal,
+        so it never blocks behind writers but may not yet reflect operations that
+        are in progress in other threads.
+        """
+        return self._size
+
+    def memory_estimate(self) -> int:
+        """
+        Return the approximate memory used by the dictionary, in bytes: the size of
+        the hash table plus the sizes of the keys and values, where built-in
+        containers (list, tuple, set, dict) also count their direct elements.
+
+        By default the entries are measured on each call: they are copied under the
+        lock, then measured after releasing it, in O(n). After
+        enable_memory_tracking(), the sizes recorded when the entries were stored
+        are returned instead, in O(1) and without the lock.
+        """
+        if self._entry_sizes is not None:
+            return sys.getsizeof(self._dict) + self._entry_bytes
         with self._lock:
-            return len(self._dict)
+            table = sys.getsizeof(self._dict)
+            entries = list(self._dict.items())
+        return table + sum(self._key_size(k) + self._value_size(v) for k, v in entries)
 
 
     def __iter__(self) -> Iterator[K]:
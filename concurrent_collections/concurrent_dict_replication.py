@@ -0,0 +1,310 @@
+import threading
+import time
+from typing import Any, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from .concurrent_dict import ConcurrentDictionary, _MISSING
+from .concurrent_weak_dict import ConcurrentWeakKeyDictionary
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# Wire format (every message is a tuple pickled by Connection.send):
+#   ("S", seq, {key: value, ...})          full snapshot, current as of seq
+#   ("B", first_seq, last_seq, [op, ...])  mutations first_seq..last_seq, compacted
+#   ("H", seq)                             heartbeat: everything up to seq has been sent
+#   ("R",)                                 follower -> leader: please send a snapshot
+# where op is ("s", key, value), ("d", key) or ("c",).
+# The leader's backlog records ("s", key) without the value, see ReplicationLeader._resolve().
+Op = Tuple[Any, ...]
+
+
+def _compact(ops: List[Op]) -> List[Op]:
+    """
+    Drop the operations of a batch that are overwritten by later ones in the same batch:
+    a set/delete followed by another set/delete of the same key, and anything before a clear.
+    """
+    seen: Set[Any] = set()
+    compacted: List[Op] = []
+    for op in reversed(ops):
+        if op[0] == "c":
+            compacted.append(op)
+            break
+        if op[1] in seen:
+            continue
+        seen.add(op[1])
+        compacted.append(op)
+    compacted.reverse()
+    return compacted
+
+
+class _FollowerChannel:
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self.sent_seq = -1
+        self.needs_snapshot = True
+        self.last_send = 0.0
+        self.thread: Optional[threading.Thread] = None
+
+
+class ReplicationLeader(Generic[K, V]):
+    """
+    Streams the mutations of a ConcurrentDictionary to follower processes.
+
+    Each follower is a multiprocessing.connection.Connection, obtained from
+    multiprocessing.Pipe() or from a Listener/Client pair (e.g. over a Unix socket).
+    A new follower first receives a snapshot; after that, mutations are sent as
+    sequence-numbered batches every flush_interval seconds, at most max_batch
+    operations each, with overwritten operations compacted away.
+
+    Only the last max_backlog operations are kept, without their values: a batch
+    carries the values the keys have when it is built, so the backlog never keeps
+    removed, overwritten or (weakly referenced) collected values alive. A batch may
+    therefore bring a key to a newer value than the one it had at that point of the
+    sequence; followers still converge to the leader's state. A follower that falls further
+    behind (or asks for it after detecting a gap) is resynchronised with a snapshot.
+    When there is nothing to send, a heartbeat goes out every heartbeat_interval
+    seconds so followers can tell an idle leader from a lagging one.
+
+    Only mutations made through the dictionary's methods are replicated; values
+    modified in place must be re-assigned (e.g. with update_atomic()) to be sent.
+    Entries of a ConcurrentWeakValueDictionary dropped by garbage collection are
+    replicated as deletions. A ConcurrentWeakKeyDictionary cannot be replicated:
+    once a key is collected, there is nothing left to tell followers which one.
+
+    Example:
+        leader_conn, follower_conn = multiprocessing.Pipe()
+        leader = ReplicationLeader(routes)
+        leader.add_follower(leader_conn)
+        # in the worker process:
+        follower = ReplicationFollower(follower_conn)
+        follower.dictionary.get('/api')
+    """
+    def __init__(self, dictionary: ConcurrentDictionary[K, V], flush_interval: float = 0.05,
+                 max_batch: int = 1000, max_backlog: int = 100_000, heartbeat_interval: float = 1.0) -> None:
+        if max_batch < 1 or max_backlog < 1:
+            raise ValueError("max_batch and max_backlog must be at least 1")
+        if isinstance(dictionary, ConcurrentWeakKeyDictionary):
+            raise TypeError("A ConcurrentWeakKeyDictionary cannot be replicated")
+        self._dictionary = dictionary
+        self._flush_interval = flush_interval
+        self._max_batch = max_batch
+        self._max_backlog = max_backlog
+        self._heartbeat_interval = heartbeat_interval
+        self._log: List[Op] = []
+        self._log_start = 0  # sequence number of self._log[0]
+        self._seq = -1  # sequence number of the last recorded operation
+        self._channels: List[_FollowerChannel] = []
+        self._stop = threading.Event()
+        with dictionary._lock:
+            if dictionary._journal is not None:
+                raise ValueError("The dictionary already has a replication leader")
+            dictionary._journal = self._record
+
+    def _record(self, op: Op) -> None:
+        # Called by the dictionary, under its lock. Values are dropped, see _resolve().
+        self._log.append(op[:2])
+        self._seq += 1
+        if len(self._log) > 2 * self._max_backlog:
+            drop = len(self._log) - self._max_backlog
+            del self._log[:drop]
+            self._log_start += drop
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last recorded mutation."""
+        return self._seq
+
+    def add_follower(self, conn: Any) -> None:
+        """
+        Start replicating to the follower at the other end of conn.
+        """
+        channel = _FollowerChannel(conn)
+        channel.thread = threading.Thread(target=self._serve, args=(channel,), daemon=True)
+        with self._dictionary._lock:
+            self._channels.append(channel)
+        channel.thread.start()
+
+    def _resolve(self, ops: List[Op]) -> List[Op]:
+        # Add the current values to the ("s", key) operations of a batch. Keys that
+        # have been removed since (e.g. collected weak values) are sent as deletions.
+        d = self._dictionary
+        resolved: List[Op] = []
+        with d._lock:
+            for op in ops:
+                if op[0] == "s":
+                    value = d._dict.get(op[1], _MISSING)
+                    op = ("d", op[1]) if value is _MISSING else ("s", op[1], value)
+                resolved.append(op)
+        return resolved
+
+    def _next_message(self, channel: _FollowerChannel) -> Optional[Tuple[Any, ...]]:
+        d = self._dictionary
+        with d._lock:
+            if channel.needs_snapshot or channel.sent_seq + 1 < self._log_start:
+                channel.needs_snapshot = False
+                channel.sent_seq = self._seq
+                return ("S", self._seq, dict(d._dict.items()))
+            if channel.sent_seq < self._seq:
+                start = channel.sent_seq + 1 - self._log_start
+                ops = self._log[start:start + self._max_batch]
+                first_seq = channel.sent_seq + 1
+                channel.sent_seq += len(ops)
+                return ("B", first_seq, channel.sent_seq, ops)
+        return None
+
+    def _serve(self, channel: _FollowerChannel) -> None:
+        conn = channel.conn
+        try:
+            while not self._stop.is_set():
+                while conn.poll():
+                    if conn.recv()[0] == "R":
+                        channel.needs_snapshot = True
+                message = self._next_message(channel)
+                if message is not None:
+                    if message[0] == "B":
+                        message = message[:3] + (self._resolve(_compact(message[3])),)
+                    conn.send(message)
+                    channel.last_send = time.monotonic()
+                    continue
+                if time.monotonic() - channel.last_send >= self._heartbeat_interval:
+                    conn.send(("H", channel.sent_seq))
+                    channel.last_send = time.monotonic()
+                self._stop.wait(self._flush_interval)
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._dictionary._lock:
+                if channel in self._channels:
+                    self._channels.remove(channel)
+
+    def close(self) -> None:
+        """
+        Stop replicating and detach from the dictionary. Connections are not closed.
+        """
+        self._stop.set()
+        with self._dictionary._lock:
+            if self._dictionary._journal == self._record:
+                self._dictionary._journal = None
+            channels = list(self._channels)
+        for channel in channels:
+            if channel.thread is not None:
+                channel.thread.join()
+
+    def __enter__(self) -> "ReplicationLeader[K, V]":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
+
+
+class ReplicationFollower(Generic[K, V]):
+    """
+    Applies the updates streamed by a ReplicationLeader to a local ConcurrentDictionary.
+
+    Reads go to the local dictionary (see the dictionary property) and never involve
+    the leader. Each batch is applied in a single lock acquisition, so readers never
+    see a partially applied batch. The copy lags behind the leader by roughly the
+    leader's flush_interval; staleness() reports the time since the leader was last
+    heard from. On a sequence gap the follower discards batches and requests a
+    snapshot.
+
+    Example:
+        follower = ReplicationFollower(conn)
+        follower.wait_until_synced(timeout=5)
+        follower.dictionary.get('/api')
+    """
+    def __init__(self, conn: Any, dictionary: Optional[ConcurrentDictionary[K, V]] = None) -> None:
+        self._conn = conn
+        self._dictionary: ConcurrentDictionary[K, V] = dictionary if dictionary is not None else ConcurrentDictionary()
+        self._last_seq = -1
+        self._last_contact = time.monotonic()
+        self._awaiting_snapshot = True
+        self._synced = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def dictionary(self) -> ConcurrentDictionary[K, V]:
+        """The local replica. It should only be read: local writes are not sent back to the leader."""
+        return self._dictionary
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the last mutation applied locally."""
+        return self._last_seq
+
+    def staleness(self) -> float:
+        """Seconds since the last message (data or heartbeat) from the leader."""
+        return time.monotonic() - self._last_contact
+
+    def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the first snapshot has been applied. Returns False on timeout.
+        """
+        return self._synced.wait(timeout)
+
+    def _apply_snapshot(self, seq: int, items: Dict[K, V]) -> None:
+        d = self._dictionary
+        with d._lock:
+            d.clear()
+            for key, value in items.items():
+                d._store(key, value)
+        self._last_seq = seq
+        self._awaiting_snapshot = False
+        self._synced.set()
+
+    def _apply_batch(self, ops: List[Op]) -> None:
+        d = self._dictionary
+        with d._lock:
+            for op in ops:
+                if op[0] == "s":
+                    d._store(op[1], op[2], d._dict.get(op[1], _MISSING))
+                elif op[0] == "d":
+                    d._remove(op[1], None)
+                else:
+                    d.clear()
+
+    def _request_snapshot(self) -> None:
+        if not self._awaiting_snapshot:
+            self._awaiting_snapshot = True
+            self._conn.send(("R",))
+
+    def _run(self) -> None:
+        conn = self._conn
+        try:
+            while not self._stop.is_set():
+                if not conn.poll(0.1):
+                    continue
+                message = conn.recv()
+                self._last_contact = time.monotonic()
+                kind = message[0]
+                if kind == "S":
+                    self._apply_snapshot(message[1], message[2])
+                elif kind == "B":
+                    first_seq, last_seq, ops = message[1], message[2], message[3]
+                    if self._awaiting_snapshot or last_seq <= self._last_seq:
+                        continue
+                    if first_seq != self._last_seq + 1:
+                        self._request_snapshot()
+                        continue
+                    self._apply_batch(ops)
+                    self._last_seq = last_seq
+                elif kind == "H":
+                    if message[1] > self._last_seq:
+                        self._request_snapshot()
+        except (EOFError, OSError):
+            pass
+
+    def close(self) -> None:
+        """
+        Stop applying updates. The local dictionary keeps its current contents.
+        """
+        self._stop.set()
+        self._thread.join()
+
+    def __enter__(self) -> "ReplicationFollower[K, V]":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
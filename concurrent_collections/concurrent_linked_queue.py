@@ -0,0 +1,273 @@
+import threading
+import time
+from typing import Any, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+from .exceptions import CollectionClosedError
+
+T = TypeVar('T')
+
+# Number of items per segment of the linked list
+_SEGMENT_SIZE = 128
+
+_EMPTY: Any = object()
+
+
+class _Segment:
+    __slots__ = ("items", "next")
+
+    def __init__(self) -> None:
+        # Producers only append to items; consumers only overwrite the slots they
+        # have taken with None, so the length of items is the number of items
+        # ever published to the segment.
+        self.items: List[Any] = []
+        self.next: Optional["_Segment"] = None
+
+
+class ConcurrentLinkedQueue(Generic[T]):
+    """
+    A thread-safe FIFO queue with separate locks for its two ends (the two-lock
+    queue of Michael and Scott), so that producers and consumers do not block
+    each other: append() and extend() only take the tail lock, popleft() and
+    popleft_many() only take the head lock.
+
+    Items are stored in a linked list of fixed-size segments rather than one node
+    per item, which keeps memory use and allocations close to those of a deque.
+    Only appending to the right and removing from the left are supported.
+
+    The benefit is highest when producers and consumers actually run in parallel,
+    e.g. on free-threaded CPython builds, or when they hold the queue's locks
+    while other threads do work that releases the GIL.
+
+    Example:
+        queue = ConcurrentLinkedQueue()
+        queue.append(job)                      # producers
+        job = queue.popleft(block=True)        # consumers
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
+        self._head_lock = threading.Lock()
+        self._tail_lock = threading.Lock()
+        self._not_empty = threading.Condition(self._head_lock)
+        self._head = self._tail = _Segment()
+        self._head_index = 0  # index in self._head of the next item to take
+        self._enqueued = 0  # updated under the tail lock
+        self._dequeued = 0  # updated under the head lock
+        self._waiting = 0  # number of consumers blocked in popleft(), updated under the head lock
+        self._closed = False
+        if iterable is not None:
+            self.extend(iterable)
+
+    # --- Producers (tail lock) -------------------------------------------------
+
+    def _publish(self, items: List[T]) -> None:
+        # Must be called with self._tail_lock held
+        tail = self._tail
+        start = 0
+        while start < len(items):
+            free = _SEGMENT_SIZE - len(tail.items)
+            if not free:
+                segment = _Segment()
+                tail.next = segment
+                self._tail = tail = segment
+                free = _SEGMENT_SIZE
+            tail.items.extend(items[start:start + free])
+            start += free
+        self._enqueued += len(items)
+
+    def _notify(self, count: int) -> None:
+        # Called after publishing items, without the tail lock. Consumers register
+        # in self._waiting before checking for items, so no wakeup can be lost.
+        if self._waiting:
+            with self._head_lock:
+                self._not_empty.notify(count)
+
+    def append(self, item: T) -> None:
+        with self._tail_lock:
+            if self._closed:
+                raise CollectionClosedError("The queue has been closed")
+            tail = self._tail
+            if len(tail.items) == _SEGMENT_SIZE:
+                segment = _Segment()
+                tail.next = segment
+                self._tail = tail = segment
+            tail.items.append(item)
+            self._enqueued += 1
+        self._notify(1)
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        """Append the items of iterable, read before taking the lock, atomically and in order."""
+        items = list(iterable)
+        with self._tail_lock:
+            if self._closed:
+                raise CollectionClosedError("The queue has been closed")
+            self._publish(items)
+        self._notify(len(items))
+
+    # --- Consumers (head lock) -------------------------------------------------
+
+    def _take(self, max_n: int) -> List[T]:
+        # Must be called with self._head_lock held
+        taken: List[T] = []
+        segment, index = self._head, self._head_index
+        while len(taken) < max_n:
+            if index == _SEGMENT_SIZE:
+                if segment.next is None:
+                    break
+                segment, index = segment.next, 0
+            items = segment.items
+            end = min(len(items), index + max_n - len(taken))
+            if end <= index:
+                break
+            taken.extend(items[index:end])
+            items[index:end] = [None] * (end - index)  # release the references
+            index = end
+        self._head, self._head_index = segment, index
+        self._dequeued += len(taken)
+        return taken
+
+    def _take_one(self) -> Any:
+        # Must be called with self._head_lock held. Returns _EMPTY if there is no item.
+        segment, index = self._head, self._head_index
+        if index == _SEGMENT_SIZE:
+            if segment.next is None:
+                return _EMPTY
+            segment, index = segment.next, 0
+            self._head, self._head_index = segment, 0
+        items = segment.items
+        if index >= len(items):
+            return _EMPTY
+        item = items[index]
+        items[index] = None
+        self._head_index = index + 1
+        self._dequeued += 1
+        return item
+
+    def popleft(self, block: bool = False, timeout: Optional[float] = None) -> T:
+        """
+        Remove and return the oldest item.
+
+        By default, raises IndexError if the queue is empty. With block=True, waits
+        for an item to be appended instead: raises TimeoutError if none arrives
+        within timeout seconds (None waits forever), and CollectionClosedError if
+        the queue is closed while empty.
+        """
+        with self._head_lock:
+            item = self._take_one()
+            if item is not _EMPTY:
+                return item
+            if not block:
+                raise IndexError("popleft from an empty ConcurrentLinkedQueue")
+            deadline = None if timeout is None else time.monotonic() + timeout
+            self._waiting += 1
+            try:
+                while True:
+                    item = self._take_one()
+                    if item is not _EMPTY:
+                        return item
+                    if self._closed:
+                        raise CollectionClosedError("The queue has been closed")
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No item was added to the queue in time")
+                    self._not_empty.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def try_popleft(self, default: Optional[T] = None) -> Optional[T]:
+        """Remove and return the oldest item, or return default if the queue is empty."""
+        with self._head_lock:
+            item = self._take_one()
+        return default if item is _EMPTY else item
+
+    def popleft_many(self, max_n: int) -> List[T]:
+        """
+        Remove and return up to max_n of the oldest items, in order, in a single
+        acquisition of the head lock. Returns fewer items (possibly none) if the
+        queue holds fewer.
+        """
+        if max_n < 0:
+            raise ValueError("max_n must be non-negative")
+        with self._head_lock:
+            return self._take(max_n)
+
+    def close(self) -> None:
+        """
+        Close the queue: further appends raise CollectionClosedError, and consumers
+        blocked in popleft() are woken up. Items already in the queue can still be
+        taken; once it is empty, blocking pops raise CollectionClosedError.
+        """
+        with self._tail_lock:
+            self._closed = True
+        with self._head_lock:
+            self._not_empty.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    # --- Whole-queue operations (both locks) ---------------------------------
+
+    def _lock_both(self) -> None:
+        # Always acquired in the same order: tail, then head
+        self._tail_lock.acquire()
+        self._head_lock.acquire()
+
+    def _unlock_both(self) -> None:
+        self._head_lock.release()
+        self._tail_lock.release()
+
+    def _snapshot(self) -> List[T]:
+        self._lock_both()
+        try:
+            snapshot: List[T] = []
+            segment, index = self._head, self._head_index
+            while segment is not None:
+                snapshot.extend(segment.items[index:])
+                segment, index = segment.next, 0
+            return snapshot
+        finally:
+            self._unlock_both()
+
+    def clear(self) -> None:
+        self._lock_both()
+        try:
+            self._dequeued = self._enqueued
+            self._head = self._tail = _Segment()
+            self._head_index = 0
+        finally:
+            self._unlock_both()
+
+    def __len__(self) -> int:
+        """
+        Number of items in the queue, computed without locks: exact when the queue
+        is not being modified, otherwise the size at some point during the call.
+        """
+        dequeued = self._dequeued
+        return self._enqueued - dequeued
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._snapshot())
+
+    def __repr__(self) -> str:
+        return f"ConcurrentLinkedQueue({self._snapshot()!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Thread-safe equality comparison.
+        Two ConcurrentLinkedQueue instances are equal if they have the same items in
+        the same order, compared on a snapshot of each.
+        """
+        if not isinstance(other, ConcurrentLinkedQueue):
+            return False
+        if other is self:
+            return True
+        return self._snapshot() == other._snapshot()
+
+    def __hash__(self) -> int:
+        """
+        Thread-safe hash computation, based on a snapshot of the items.
+        Note: The hash will change if the queue is modified.
+        """
+        return hash(tuple(self._snapshot()))
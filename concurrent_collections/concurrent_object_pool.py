@@ -0,0 +1,249 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from .concurrent_work_stealing_bag import ConcurrentWorkStealingBag
+from .exceptions import CollectionClosedError
+
+T = TypeVar('T')
+
+_EMPTY: Any = object()
+
+
+class _Lease(Generic[T]):
+    """Context manager returned by ConcurrentObjectPool.acquire()."""
+    def __init__(self, pool: "ConcurrentObjectPool[T]", timeout: Optional[float]) -> None:
+        self._pool = pool
+        self._timeout = timeout
+        self._obj: Any = _EMPTY
+
+    def __enter__(self) -> T:
+        self._obj = self._pool.get(self._timeout)
+        return self._obj
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        obj, self._obj = self._obj, _EMPTY
+        if obj is not _EMPTY:
+            self._pool.release(obj)
+
+
+class ConcurrentObjectPool(Generic[T]):
+    """
+    A thread-safe pool of reusable objects (parsers, compression contexts, connections...).
+
+    Idle objects are kept in a ConcurrentWorkStealingBag, so a thread usually gets
+    back the object it released last (warm in its caches, no contention with other
+    threads), and only takes other threads' idle objects when it has none.
+
+    The pool creates objects with factory() on demand, up to max_size objects in
+    total (idle and in use); min_size objects are created upfront and kept even
+    when idle. When max_size objects are in use, get() waits for one to be released.
+
+    Optionally:
+    - validate(obj) is called on checkout; objects for which it returns False are destroyed;
+    - objects idle for more than idle_timeout seconds are destroyed on checkout
+      and by evict_idle(), keeping at least min_size objects;
+    - destroy(obj) is called on every object removed from the pool (e.g. to close it).
+
+    Example:
+        pool = ConcurrentObjectPool(lambda: sqlite3.connect('cache.db', check_same_thread=False),
+                                    max_size=8, destroy=lambda conn: conn.close())
+        with pool.acquire() as conn:
+            conn.execute('SELECT 1')
+    """
+    def __init__(self, factory: Callable[[], T], min_size: int = 0, max_size: Optional[int] = None,
+                 validate: Optional[Callable[[T], bool]] = None, idle_timeout: Optional[float] = None,
+                 destroy: Optional[Callable[[T], Any]] = None) -> None:
+        if min_size < 0 or (max_size is not None and max_size < max(min_size, 1)):
+            raise ValueError("Expected 0 <= min_size <= max_size and max_size >= 1")
+        self._factory = factory
+        self._min_size = min_size
+        self._max_size = max_size
+        self._validate = validate
+        self._idle_timeout = idle_timeout
+        self._destroy = destroy
+        self._idle: ConcurrentWorkStealingBag[Tuple[T, float]] = ConcurrentWorkStealingBag()
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._release_seq = 0  # incremented on every release, to detect releases racing with a wait
+        self._closed = False
+        self._size = 0  # objects created and not destroyed (idle + in use + being created)
+        self._in_use = 0
+        self._stats: Dict[str, int] = dict.fromkeys(
+            ("created", "destroyed", "acquisitions", "waits", "timeouts", "validation_failures", "peak_in_use"), 0)
+        for _ in range(min_size):
+            with self._lock:
+                self._size += 1
+            self._idle.append((self._create(), time.monotonic()))
+
+    def _create(self) -> T:
+        # The caller has already counted the object in self._size
+        try:
+            obj = self._factory()
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._released.notify()
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+        return obj
+
+    def _discard(self, obj: T, keep_min_size: bool = False) -> bool:
+        # Returns False if the object was kept because the pool is down to min_size objects
+        with self._lock:
+            if keep_min_size and self._size <= self._min_size:
+                return False
+            self._size -= 1
+            self._stats["destroyed"] += 1
+            self._released.notify()
+        if self._destroy is not None:
+            self._destroy(obj)
+        return True
+
+    def _checked_out(self) -> None:
+        # Must be called with self._lock held
+        self._in_use += 1
+        self._stats["acquisitions"] += 1
+        if self._in_use > self._stats["peak_in_use"]:
+            self._stats["peak_in_use"] = self._in_use
+
+    def get(self, timeout: Optional[float] = None) -> T:
+        """
+        Check out an object: an idle one if any (preferably the last one released by
+        this thread), otherwise a new one if the pool is below max_size. Otherwise,
+        wait up to timeout seconds (None waits forever) for an object to be released.
+
+        Raises TimeoutError on timeout, and CollectionClosedError if the pool is closed.
+        Every object obtained with get() must be given back with release().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while True:
+            if self._closed:
+                raise CollectionClosedError("The pool has been closed")
+            seq = self._release_seq
+            entry = self._idle.try_take(_EMPTY)
+            if entry is not _EMPTY:
+                obj, released_at = entry
+                if (self._idle_timeout is not None and time.monotonic() - released_at > self._idle_timeout
+                        and self._discard(obj, keep_min_size=True)):
+                    continue
+                if self._validate is not None and not self._validate(obj):
+                    with self._lock:
+                        self._stats["validation_failures"] += 1
+                    self._discard(obj)
+                    continue
+                with self._lock:
+                    self._checked_out()
+                return obj
+            with self._lock:
+                if self._max_size is None or self._size < self._max_size:
+                    self._size += 1  # reserve the slot, the object is created outside the lock
+                elif self._release_seq != seq:
+                    continue  # an object was released since we looked: try again
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise TimeoutError("No object was released to the pool in time")
+                    if not waited:
+                        waited = True
+                        self._stats["waits"] += 1
+                    self._released.wait(remaining)
+                    continue
+            obj = self._create()
+            with self._lock:
+                self._checked_out()
+            return obj
+
+    def release(self, obj: T) -> None:
+        """
+        Give back an object obtained with get(). Objects released after close() are destroyed.
+        """
+        with self._lock:
+            self._in_use -= 1
+            if not self._closed:
+                self._idle.append((obj, time.monotonic()))
+                self._release_seq += 1
+                self._released.notify()
+                return
+        self._discard(obj)
+
+    def acquire(self, timeout: Optional[float] = None) -> _Lease[T]:
+        """
+        Check out an object for the duration of a with block (see get()).
+
+        Example:
+            with pool.acquire(timeout=5) as parser:
+                parser.feed(data)
+        """
+        return _Lease(self, timeout)
+
+    def evict_idle(self) -> int:
+        """
+        Destroy the objects idle for more than idle_timeout seconds, keeping at
+        least min_size objects in the pool. Returns the number of objects destroyed.
+        Meant to be called periodically, e.g. from a housekeeping thread.
+        """
+        if self._idle_timeout is None:
+            return 0
+        now = time.monotonic()
+        kept: List[Tuple[T, float]] = []
+        evicted = 0
+        while True:
+            entry = self._idle.try_take(_EMPTY)
+            if entry is _EMPTY:
+                break
+            if now - entry[1] > self._idle_timeout and self._discard(entry[0], keep_min_size=True):
+                evicted += 1
+            else:
+                kept.append(entry)
+        self._idle.extend(kept)
+        if kept:
+            with self._lock:
+                self._release_seq += 1
+                self._released.notify(len(kept))
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Usage statistics: current size, idle and in_use counts, max_size, the numbers of
+        objects created and destroyed, acquisitions, acquisitions that had to wait,
+        timeouts, validation failures, peak_in_use, and utilization (in_use / max_size,
+        or None for an unbounded pool).
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats.update(size=self._size, in_use=self._in_use, idle=self._size - self._in_use,
+                         max_size=self._max_size,
+                         utilization=None if self._max_size is None else self._in_use / self._max_size)
+        return stats
+
+    def close(self) -> None:
+        """
+        Destroy the idle objects and wake up the threads waiting in get(), which raise
+        CollectionClosedError. Objects still in use are destroyed when released.
+        """
+        with self._lock:
+            self._closed = True
+            self._released.notify_all()
+        while True:
+            entry = self._idle.try_take(_EMPTY)
+            if entry is _EMPTY:
+                break
+            self._discard(entry[0])
+
+    def __enter__(self) -> "ConcurrentObjectPool[T]":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of objects currently owned by the pool, idle or in use."""
+        return self._size
+
+    def __repr__(self) -> str:
+        stats = self.stats()
+        return f"ConcurrentObjectPool(size={stats['size']}, in_use={stats['in_use']}, max_size={self._max_size})"
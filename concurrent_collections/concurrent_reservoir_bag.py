@@ -0,0 +1,119 @@
+import math
+import random
+from typing import Iterable, List, Optional, TypeVar
+
+from . import _ingest
+from .concurrent_bag import ConcurrentBag
+
+T = TypeVar('T')
+
+
+class ConcurrentReservoirBag(ConcurrentBag[T]):
+    """
+    A thread-safe bag keeping a uniform random sample of at most capacity items
+    out of everything ever appended to it (reservoir sampling).
+
+    The first capacity items are kept as they come. After that, each appended item
+    replaces a random item of the reservoir with probability capacity / seen,
+    so that at any time every item appended so far has the same chance of being
+    in the bag, whatever the length of the stream. Memory stays fixed.
+
+    The number of items to skip before the next replacement is drawn in advance
+    (Li's Algorithm L), so appending an item that is not kept only increments a
+    counter, and extend() only looks at the items that are kept.
+
+    drain() and clear() also restart the stream, which makes it easy to take one
+    sample per reporting interval. Removing items in any other way (pop(), take()...)
+    leaves the reservoir smaller until the next drain() or clear().
+
+    Example:
+        latencies = ConcurrentReservoirBag(1000)
+        latencies.append(0.0132)  # called millions of times
+        window = latencies.drain()  # uniform sample of the interval's latencies
+    """
+    def __init__(self, capacity: int, iterable: Optional[Iterable[T]] = None, seed: Optional[int] = None) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        super().__init__()
+        self._capacity = capacity
+        self._random = random.Random(seed)
+        self._restart()
+        if iterable is not None:
+            self.extend(iterable)
+
+    def _restart(self) -> None:
+        # Must be called with self._lock held
+        self._seen = 0
+        self._w = 1.0
+        self._next = 0  # position in the stream (0-based) of the next item to keep
+
+    def _advance(self) -> None:
+        # Draw the position of the next item to keep (Algorithm L)
+        self._w *= math.exp(math.log(1.0 - self._random.random()) / self._capacity)
+        skip = 0
+        if self._w < 1.0:
+            skip = math.floor(math.log(1.0 - self._random.random()) / math.log1p(-self._w))
+        self._next += skip + 1
+
+    def _offer(self, item: T) -> None:
+        # Must be called with self._lock held, for the item at position self._seen
+        items = self._items
+        if self._readers:
+            self._copy_on_write()
+            items = self._items
+        if self._seen < self._capacity or not items:
+            items.append(item)
+            self._fingerprint_add(item)
+            if self._waiting:
+                self._not_empty.notify()
+        else:
+            index = self._random.randrange(len(items))
+            self._fingerprint_remove(items[index])
+            items[index] = item
+            self._fingerprint_add(item)
+        if self._seen < self._capacity - 1:
+            self._next = self._seen + 1
+        else:
+            self._advance()
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def seen(self) -> int:
+        """Number of items appended since the creation of the bag or the last drain() or clear()."""
+        return self._seen
+
+    def append(self, item: T) -> None:
+        with self._lock:
+            self._check_open()
+            if self._seen == self._next:
+                self._offer(item)
+            self._seen += 1
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        if _ingest.is_stream(iterable):
+            # Read in batches, as for ConcurrentBag: memory stays bounded whatever the stream's length
+            self.ingest(iterable)
+            return
+        items = list(iterable)
+        with self._lock:
+            self._check_open()
+            start = self._seen
+            end = start + len(items)
+            # Only the items at the drawn positions are looked at
+            while self._next < end:
+                self._seen = self._next
+                self._offer(items[self._seen - start])
+            self._seen = end
+
+    def drain(self) -> List[T]:
+        with self._lock:
+            self._restart()
+            return super().drain()
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._restart()
@@ -0,0 +1,243 @@
+import threading
+from typing import Any, Generic, Iterable, Iterator, List, Optional, Set, TypeVar
+
+T = TypeVar('T')
+
+_DEFAULT_SHARDS = 16
+
+
+class _Shard(Generic[T]):
+    __slots__ = ("lock", "items")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.items: Set[T] = set()
+
+
+class ConcurrentSet(Generic[T]):
+    """
+    A thread-safe set with striped locking.
+
+    Elements are spread over a number of shards by hash, each being a set with its
+    own lock, so that threads working on different elements rarely wait for each
+    other. add, discard, remove and `in` lock a single shard and are O(1).
+
+    Bulk operations (update, intersection_update, difference_update and the
+    union/intersection/difference methods and operators that return new sets)
+    process one shard at a time: other threads can keep using the other shards
+    meanwhile. They are therefore atomic per shard, but not for the whole set.
+    Iteration, len(), equality and copy() take a consistent snapshot, briefly
+    holding all the shard locks.
+
+    Example:
+        seen = ConcurrentSet()
+        if seen.add_if_absent(url):
+            crawl(url)
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None, shards: int = _DEFAULT_SHARDS) -> None:
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        self._shards: List[_Shard[T]] = [_Shard() for _ in range(shards)]
+        self._mask = shards - 1
+        if iterable is not None:
+            self.update(iterable)
+
+    # Shards are picked from hash((item,)) rather than hash(item): small ints hash to
+    # themselves, so multiples of the shard count would all land in the same shard.
+    # The tuple hash mixes all the bits of hash(item) in C, as in ConcurrentDictionary's
+    # lookup filter.
+
+    def _shard(self, item: Any) -> _Shard[T]:
+        return self._shards[hash((item,)) & self._mask]
+
+    def _group(self, items: Iterable[Any]) -> List[List[Any]]:
+        # Sort items by shard, so that each shard lock is taken once
+        groups: List[List[Any]] = [[] for _ in self._shards]
+        mask = self._mask
+        for item in items:
+            groups[hash((item,)) & mask].append(item)
+        return groups
+
+    def add(self, item: T) -> None:
+        shard = self._shard(item)
+        with shard.lock:
+            shard.items.add(item)
+
+    def add_if_absent(self, item: T) -> bool:
+        """
+        Atomically add item unless it is already present.
+        Returns True if it was added, False if it was already in the set.
+
+        Example:
+            if seen.add_if_absent(message_id):
+                handle(message)
+        """
+        shard = self._shard(item)
+        with shard.lock:
+            if item in shard.items:
+                return False
+            shard.items.add(item)
+            return True
+
+    def discard(self, item: T) -> None:
+        shard = self._shard(item)
+        with shard.lock:
+            shard.items.discard(item)
+
+    def remove(self, item: T) -> None:
+        shard = self._shard(item)
+        with shard.lock:
+            shard.items.remove(item)
+
+    def pop(self) -> T:
+        """Remove and return an arbitrary element. Raises KeyError if the set is empty."""
+        for shard in self._shards:
+            with shard.lock:
+                if shard.items:
+                    return shard.items.pop()
+        raise KeyError("pop from an empty set")
+
+    def __contains__(self, item: Any) -> bool:
+        try:
+            shard = self._shard(item)
+        except TypeError:
+            return False
+        with shard.lock:
+            return item in shard.items
+
+    def _lock_all(self) -> None:
+        # Acquire all shard locks, always in the same order
+        for shard in self._shards:
+            shard.lock.acquire()
+
+    def _unlock_all(self) -> None:
+        for shard in reversed(self._shards):
+            shard.lock.release()
+
+    def _snapshot(self) -> Set[T]:
+        self._lock_all()
+        try:
+            snapshot: Set[T] = set()
+            for shard in self._shards:
+                snapshot.update(shard.items)
+            return snapshot
+        finally:
+            self._unlock_all()
+
+    def __len__(self) -> int:
+        self._lock_all()
+        try:
+            return sum(len(shard.items) for shard in self._shards)
+        finally:
+            self._unlock_all()
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._snapshot())
+
+    def copy(self) -> "ConcurrentSet[T]":
+        return ConcurrentSet(self._snapshot(), len(self._shards))
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.items.clear()
+
+    @staticmethod
+    def _as_set(other: Iterable[Any]) -> Set[Any]:
+        if isinstance(other, ConcurrentSet):
+            return other._snapshot()
+        return other if isinstance(other, (set, frozenset)) else set(other)  # type: ignore
+
+    def update(self, *others: Iterable[T]) -> None:
+        """Add the elements of all others, one shard at a time."""
+        for other in others:
+            items = other._snapshot() if isinstance(other, ConcurrentSet) else other
+            for shard, group in zip(self._shards, self._group(items)):
+                if group:
+                    with shard.lock:
+                        shard.items.update(group)
+
+    def intersection_update(self, *others: Iterable[Any]) -> None:
+        """Keep only the elements found in all others, one shard at a time."""
+        sets = [self._as_set(other) for other in others]
+        for shard in self._shards:
+            with shard.lock:
+                shard.items.intersection_update(*sets)
+
+    def difference_update(self, *others: Iterable[Any]) -> None:
+        """Remove the elements of all others, one shard at a time."""
+        for other in others:
+            items = other._snapshot() if isinstance(other, ConcurrentSet) else other
+            for shard, group in zip(self._shards, self._group(items)):
+                if group:
+                    with shard.lock:
+                        shard.items.difference_update(group)
+
+    def _copy_by_shard(self) -> "ConcurrentSet[T]":
+        result: ConcurrentSet[T] = ConcurrentSet(shards=len(self._shards))
+        for shard, target in zip(self._shards, result._shards):
+            with shard.lock:
+                target.items = shard.items.copy()
+        return result
+
+    def union(self, *others: Iterable[T]) -> "ConcurrentSet[T]":
+        """Return a new ConcurrentSet with the elements of this set and all others."""
+        result = self._copy_by_shard()
+        result.update(*others)
+        return result
+
+    def intersection(self, *others: Iterable[Any]) -> "ConcurrentSet[T]":
+        """Return a new ConcurrentSet with the elements common to this set and all others."""
+        sets = [self._as_set(other) for other in others]
+        result: ConcurrentSet[T] = ConcurrentSet(shards=len(self._shards))
+        for shard, target in zip(self._shards, result._shards):
+            with shard.lock:
+                target.items = shard.items.intersection(*sets)
+        return result
+
+    def difference(self, *others: Iterable[Any]) -> "ConcurrentSet[T]":
+        """Return a new ConcurrentSet with the elements of this set that are in none of the others."""
+        result = self._copy_by_shard()
+        result.difference_update(*others)
+        return result
+
+    def isdisjoint(self, other: Iterable[Any]) -> bool:
+        other_set = self._as_set(other)
+        for shard in self._shards:
+            with shard.lock:
+                if not shard.items.isdisjoint(other_set):
+                    return False
+        return True
+
+    def __or__(self, other: Iterable[T]) -> "ConcurrentSet[T]":
+        return self.union(other)
+
+    def __and__(self, other: Iterable[Any]) -> "ConcurrentSet[T]":
+        return self.intersection(other)
+
+    def __sub__(self, other: Iterable[Any]) -> "ConcurrentSet[T]":
+        return self.difference(other)
+
+    def __repr__(self) -> str:
+        snapshot = self._snapshot()
+        return f"ConcurrentSet({snapshot!r})" if snapshot else "ConcurrentSet()"
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Thread-safe equality comparison.
+
+        Two ConcurrentSet instances are equal if they contain the same elements,
+        compared on a snapshot of each.
+        """
+        if not isinstance(other, ConcurrentSet):
+            return False
+        if other is self:
+            return True
+        return self._snapshot() == other._snapshot()
+
+    def __hash__(self) -> int:
+        """
+        Thread-safe hash computation, based on a snapshot of the elements.
+        Note: The hash will change if the set is modified.
+        """
+        return hash(frozenset(self._snapshot()))
@@ -0,0 +1,360 @@
+import math
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Sublists are split when they grow beyond twice this size, and merged with a
+# neighbour when they shrink below half of it.
+_LOAD = 1000
+
+
+class ConcurrentSortedBag(Generic[T]):
+    """
+    A thread-safe sorted multiset: items are kept in ascending order, duplicates allowed.
+
+    Items are stored in a list of sorted sublists of about a thousand items, with the
+    maximum of each sublist and a Fenwick tree of the sublist lengths, so that:
+    - add() and remove() are O(log n) searches plus a small list insertion/deletion;
+    - rank(), percentile() and indexing are O(log n), without copying the bag;
+    - top_k(k) and irange() are O(log n + k), copying only the items returned.
+
+    All the operations hold the lock only for the time of their own work: readers
+    copy what they return under the lock and never iterate while holding it.
+    Iterating over the bag takes a snapshot.
+
+    Example:
+        scores = ConcurrentSortedBag()
+        scores.add(12.5)  # from many threads
+        p99 = scores.percentile(99)
+        best = scores.top_k(10)
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
+        self._lock = threading.RLock()
+        self._lists: List[List[T]] = []
+        self._maxes: List[T] = []
+        self._tree: Optional[List[int]] = None  # Fenwick tree of the sublist lengths, rebuilt lazily
+        self._len = 0
+        if iterable is not None:
+            self.update(iterable)
+
+    # --- Fenwick tree of the sublist lengths ---------------------------------
+
+    def _build_tree(self) -> List[int]:
+        # Must be called with self._lock held
+        tree = [0] + [len(sublist) for sublist in self._lists]
+        size = len(tree)
+        for i in range(1, size):
+            parent = i + (i & -i)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, pos: int, delta: int) -> None:
+        # Must be called with self._lock held
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        size = len(tree)
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def _offset(self, pos: int) -> int:
+        # Number of items in the sublists before self._lists[pos]
+        tree = self._tree if self._tree is not None else self._build_tree()
+        total = 0
+        i = pos
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        # Sublist and position within it of the item at index (0 <= index < len)
+        tree = self._tree if self._tree is not None else self._build_tree()
+        pos = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                pos = nxt
+                index -= tree[nxt]
+            step >>= 1
+        return pos, index
+
+    # --- Structure maintenance -----------------------------------------------
+
+    def _insert(self, item: T) -> None:
+        # Must be called with self._lock held
+        lists, maxes = self._lists, self._maxes
+        if not maxes:
+            lists.append([item])
+            maxes.append(item)
+            self._tree = None
+        else:
+            pos = bisect_right(maxes, item)
+            if pos == len(maxes):
+                pos -= 1
+                lists[pos].append(item)
+                maxes[pos] = item
+            else:
+                insort(lists[pos], item)
+            self._tree_add(pos, 1)
+            if len(lists[pos]) > 2 * _LOAD:
+                self._split(pos)
+        self._len += 1
+
+    def _split(self, pos: int) -> None:
+        sublist = self._lists[pos]
+        half = sublist[_LOAD:]
+        del sublist[_LOAD:]
+        self._maxes[pos] = sublist[-1]
+        self._lists.insert(pos + 1, half)
+        self._maxes.insert(pos + 1, half[-1])
+        self._tree = None
+
+    def _delete(self, pos: int, idx: int) -> None:
+        # Must be called with self._lock held
+        lists, maxes = self._lists, self._maxes
+        sublist = lists[pos]
+        del sublist[idx]
+        self._len -= 1
+        self._tree_add(pos, -1)
+        if not sublist:
+            del lists[pos]
+            del maxes[pos]
+            self._tree = None
+            return
+        maxes[pos] = sublist[-1]
+        if len(sublist) < _LOAD // 2 and len(lists) > 1:
+            # Merge with a neighbour, splitting again if the result is too large
+            if pos == 0:
+                pos = 1
+            lists[pos - 1].extend(lists[pos])
+            maxes[pos - 1] = lists[pos - 1][-1]
+            del lists[pos]
+            del maxes[pos]
+            self._tree = None
+            if len(lists[pos - 1]) > 2 * _LOAD:
+                self._split(pos - 1)
+
+    def _find(self, item: Any) -> Tuple[int, int]:
+        # Position of an item equal to item, or (-1, -1)
+        pos = bisect_left(self._maxes, item)
+        if pos == len(self._maxes):
+            return -1, -1
+        sublist = self._lists[pos]
+        idx = bisect_left(sublist, item)
+        if sublist[idx] != item:
+            return -1, -1
+        return pos, idx
+
+    # --- Mutations -------------------------------------------------------------
+
+    def add(self, item: T) -> None:
+        with self._lock:
+            self._insert(item)
+
+    def update(self, iterable: Iterable[T]) -> None:
+        """
+        Add all the items of iterable. Large batches are merged in a single sort
+        instead of being inserted one by one.
+        """
+        items = sorted(iterable)
+        if not items:
+            return
+        with self._lock:
+            if len(items) < self._len // 8 + _LOAD:
+                for item in items:
+                    self._insert(item)
+                return
+            merged = [item for sublist in self._lists for item in sublist]
+            merged.extend(items)
+            merged.sort()
+            self._lists = [merged[i:i + _LOAD] for i in range(0, len(merged), _LOAD)]
+            self._maxes = [sublist[-1] for sublist in self._lists]
+            self._tree = None
+            self._len = len(merged)
+
+    def remove(self, item: T) -> None:
+        """Remove one occurrence of item. Raises ValueError if it is not in the bag."""
+        with self._lock:
+            pos, idx = self._find(item)
+            if pos < 0:
+                raise ValueError(f"{item!r} not in ConcurrentSortedBag")
+            self._delete(pos, idx)
+
+    def discard(self, item: T) -> bool:
+        """Remove one occurrence of item if present. Returns True if an item was removed."""
+        with self._lock:
+            pos, idx = self._find(item)
+            if pos < 0:
+                return False
+            self._delete(pos, idx)
+            return True
+
+    def pop(self, index: int = -1) -> T:
+        """Remove and return the item at index (the largest by default). Raises IndexError if out of range."""
+        with self._lock:
+            pos, idx = self._locate(self._normalize(index))
+            item = self._lists[pos][idx]
+            self._delete(pos, idx)
+            return item
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lists = []
+            self._maxes = []
+            self._tree = None
+            self._len = 0
+
+    # --- Queries -----------------------------------------------------------------
+
+    def _normalize(self, index: int) -> int:
+        # Must be called with self._lock held
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("ConcurrentSortedBag index out of range")
+        return index
+
+    def __getitem__(self, index: int) -> T:
+        with self._lock:
+            pos, idx = self._locate(self._normalize(index))
+            return self._lists[pos][idx]
+
+    def rank(self, item: Any) -> int:
+        """
+        Number of items strictly smaller than item, i.e. the index at which item
+        would be inserted before any equal items.
+
+        Example:
+            position = scores.rank(my_score)
+        """
+        with self._lock:
+            pos = bisect_left(self._maxes, item)
+            if pos == len(self._maxes):
+                return self._len
+            return self._offset(pos) + bisect_left(self._lists[pos], item)
+
+    def count(self, item: Any) -> int:
+        with self._lock:
+            end = bisect_right(self._maxes, item)
+            return self._position_right(item, end) - self.rank(item)
+
+    def _position_right(self, item: Any, pos: int) -> int:
+        # Number of items smaller than or equal to item; pos is bisect_right(self._maxes, item)
+        if pos == len(self._maxes):
+            return self._len
+        return self._offset(pos) + bisect_right(self._lists[pos], item)
+
+    def percentile(self, p: float) -> T:
+        """
+        The item at percentile p (0 to 100), using the nearest-rank method: the
+        smallest item such that at least p% of the items are smaller or equal.
+        percentile(0) is the minimum, percentile(50) the median, percentile(100) the maximum.
+        Raises IndexError if the bag is empty.
+
+        Example:
+            p99 = latencies.percentile(99)
+        """
+        if not 0 <= p <= 100:
+            raise ValueError("p must be between 0 and 100")
+        with self._lock:
+            if not self._len:
+                raise IndexError("percentile of an empty ConcurrentSortedBag")
+            index = max(0, math.ceil(p / 100 * self._len) - 1)
+            pos, idx = self._locate(index)
+            return self._lists[pos][idx]
+
+    def top_k(self, k: int) -> List[T]:
+        """Return the k largest items (or all of them if there are fewer), largest first."""
+        result: List[T] = []
+        if k <= 0:
+            return result
+        with self._lock:
+            for sublist in reversed(self._lists):
+                if len(result) + len(sublist) >= k:
+                    result.extend(reversed(sublist[len(sublist) - (k - len(result)):]))
+                    break
+                result.extend(reversed(sublist))
+        return result
+
+    def irange(self, minimum: Optional[T] = None, maximum: Optional[T] = None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator[T]:
+        """
+        Iterate in ascending order over the items between minimum and maximum (None
+        for no bound). inclusive tells whether items equal to each bound are included.
+        The matching items are copied under the lock, so the iteration is unaffected
+        by concurrent changes.
+
+        Example:
+            for score in scores.irange(90, 100, inclusive=(True, False)):
+                ...
+        """
+        with self._lock:
+            if minimum is None:
+                start = 0
+            elif inclusive[0]:
+                start = self.rank(minimum)
+            else:
+                start = self._position_right(minimum, bisect_right(self._maxes, minimum))
+            if maximum is None:
+                stop = self._len
+            elif inclusive[1]:
+                stop = self._position_right(maximum, bisect_right(self._maxes, maximum))
+            else:
+                stop = self.rank(maximum)
+            items = self._slice(start, stop)
+        return iter(items)
+
+    def _slice(self, start: int, stop: int) -> List[T]:
+        # Must be called with self._lock held; copies the items in [start, stop)
+        result: List[T] = []
+        if start >= stop:
+            return result
+        pos, idx = self._locate(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = self._lists[pos][idx:idx + remaining]
+            result.extend(chunk)
+            remaining -= len(chunk)
+            pos, idx = pos + 1, 0
+        return result
+
+    def __contains__(self, item: Any) -> bool:
+        with self._lock:
+            return self._find(item)[0] >= 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[T]:
+        with self._lock:
+            snapshot = [item for sublist in self._lists for item in sublist]
+        return iter(snapshot)
+
+    def __repr__(self) -> str:
+        return f"ConcurrentSortedBag({list(self)!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Thread-safe equality comparison.
+        Two ConcurrentSortedBag instances are equal if they contain the same items.
+        """
+        if not isinstance(other, ConcurrentSortedBag):
+            return False
+        if other is self:
+            return True
+        return list(self) == list(other)
+
+    def __hash__(self) -> int:
+        """
+        Thread-safe hash computation, based on a snapshot of the items.
+        Note: The hash will change if the bag is modified.
+        """
+        return hash(tuple(self))
@@ -0,0 +1,355 @@
+import sys
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, MutableMapping, Optional, Tuple, TypeVar
+
+from .concurrent_dict import ConcurrentDictionary
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+# Maximum number of dead entries removed by a single store operation.
+# Cleanup is spread over subsequent operations instead of being done in one go.
+_PURGE_BATCH = 64
+
+_MISSING: Any = object()
+
+
+class _Referent:
+    pass
+
+
+# Size of the weak reference stored in place of a weakly held key or value
+_REF_SIZE = sys.getsizeof(weakref.KeyedRef(_Referent(), None, None))
+
+
+class _WeakStoreBase:
+    """
+    Common machinery of the weak stores.
+
+    Weakref callbacks may run in any thread, at any time (including while another
+    thread holds the owning dictionary's lock). They therefore never touch the
+    underlying dict: they only push the dead reference onto a deque, whose append
+    is thread-safe. The entries are then removed by the next operations on the
+    store, which always run under the owning dictionary's lock.
+
+    on_evict, when set, is called (under that lock) with the key and value of every
+    dead entry leaving the store, so the owner can keep its counters and lookup
+    filter up to date. For a weakly held value, None is passed instead of the value.
+    For a weakly held key, its dead weak reference is passed instead of the key:
+    it still hashes like the key did.
+
+    The concrete stores define _remove_dead(wr), which drops the entry of a dead
+    reference taken from the queue.
+    """
+    def __init__(self) -> None:
+        self._pending: Deque[Any] = deque()
+        self.on_evict: Optional[Callable[[Any, Any], None]] = None
+        selfref = weakref.ref(self)
+
+        def _on_dead(wr: Any, selfref: Any = selfref) -> None:
+            store = selfref()
+            if store is not None:
+                store._pending.append(wr)
+
+        self._on_dead = _on_dead
+
+    def _purge(self, limit: Optional[int] = _PURGE_BATCH) -> None:
+        pending = self._pending
+        count = 0
+        while pending and (limit is None or count < limit):
+            try:
+                wr = pending.popleft()
+            except IndexError:
+                break
+            self._remove_dead(wr)  # type: ignore  # defined by each store
+            count += 1
+
+    def _evicted(self, key: Any, value: Any) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self._data)  # type: ignore
+
+
+class _WeakValueStore(_WeakStoreBase, MutableMapping[K, V]):
+    """
+    Mapping of keys to weakly referenced values.
+    Not thread-safe on its own: it is only accessed under the lock of a ConcurrentWeakValueDictionary.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._data: Dict[K, "weakref.KeyedRef"] = {}
+
+    def _remove_dead(self, wr: Any) -> None:
+        # The key may have been re-assigned to a live value since the referent died.
+        if self._data.get(wr.key) is wr:
+            del self._data[wr.key]
+            self._evicted(wr.key, None)
+
+    def __getitem__(self, key: K) -> V:
+        self._purge()
+        value = self._data[key]()
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._purge()
+        old = self._data.get(key)
+        self._data[key] = weakref.KeyedRef(value, self._on_dead, key)
+        if old is not None and old() is None:
+            self._evicted(key, None)
+
+    def __delitem__(self, key: K) -> None:
+        self.pop(key)
+
+    def __contains__(self, key: Any) -> bool:
+        wr = self._data.get(key)
+        return wr is not None and wr() is not None
+
+    def __iter__(self) -> Iterator[K]:
+        for key, wr in list(self._data.items()):
+            if wr() is not None:
+                yield key
+
+    def __len__(self) -> int:
+        self._purge(None)
+        return len(self._data)
+
+    # items() and values() read the references directly: going through __iter__ and
+    # __getitem__ (as ItemsView and ValuesView do) raises KeyError for a value
+    # collected in between.
+    def items(self) -> List[Tuple[K, V]]:  # type: ignore
+        items: List[Tuple[K, V]] = []
+        for key, wr in list(self._data.items()):
+            value = wr()
+            if value is not None:
+                items.append((key, value))
+        return items
+
+    def values(self) -> List[V]:  # type: ignore
+        return [value for _, value in self.items()]
+
+    def get(self, key: K, default: Any = None) -> Any:
+        wr = self._data.get(key)
+        if wr is None:
+            return default
+        value = wr()
+        return default if value is None else value
+
+    def pop(self, key: K, default: Any = _MISSING) -> Any:
+        self._purge()
+        wr = self._data.pop(key, None)
+        value = wr() if wr is not None else None
+        if value is None:
+            if wr is not None:
+                self._evicted(key, None)
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return value
+
+    def popitem(self) -> Any:
+        self._purge()
+        while self._data:
+            key, wr = self._data.popitem()
+            value = wr()
+            if value is not None:
+                return key, value
+            self._evicted(key, None)
+        raise KeyError("popitem(): dictionary is empty")
+
+    def setdefault(self, key: K, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = default
+            return default
+        return value
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._data.clear()
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _WeakKeyStore(_WeakStoreBase, MutableMapping[K, V]):
+    """
+    Mapping of weakly referenced keys to values.
+    Not thread-safe on its own: it is only accessed under the lock of a ConcurrentWeakKeyDictionary.
+    """
+    def __init__(self) -> None:
+        super().__init__()
+        self._data: Dict["weakref.ref[Any]", V] = {}
+
+    def _remove_dead(self, wr: Any) -> None:
+        # Dead references only compare equal to themselves, so this cannot hit a live key.
+        value = self._data.pop(wr, _MISSING)
+        if value is not _MISSING:
+            self._evicted(wr, value)
+
+    def __getitem__(self, key: K) -> V:
+        self._purge()
+        return self._data[weakref.ref(key)]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._purge()
+        self._data[weakref.ref(key, self._on_dead)] = value
+
+    def __delitem__(self, key: K) -> None:
+        self._purge()
+        del self._data[weakref.ref(key)]
+
+    def __contains__(self, key: Any) -> bool:
+        try:
+            wr = weakref.ref(key)
+        except TypeError:
+            return False
+        return wr in self._data
+
+    def __iter__(self) -> Iterator[K]:
+        for wr in list(self._data):
+            key = wr()
+            if key is not None:
+                yield key
+
+    def __len__(self) -> int:
+        self._purge(None)
+        return len(self._data)
+
+    def get(self, key: K, default: Any = None) -> Any:
+        try:
+            wr = weakref.ref(key)
+        except TypeError:
+            return default
+        return self._data.get(wr, default)
+
+    def pop(self, key: K, default: Any = _MISSING) -> Any:
+        self._purge()
+        if default is _MISSING:
+            return self._data.pop(weakref.ref(key))
+        return self._data.pop(weakref.ref(key), default)
+
+    def popitem(self) -> Any:
+        self._purge()
+        while self._data:
+            wr, value = self._data.popitem()
+            key = wr()
+            if key is not None:
+                return key, value
+            self._evicted(wr, value)
+        raise KeyError("popitem(): dictionary is empty")
+
+    def setdefault(self, key: K, default: Any = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            self[key] = default
+            return default
+        return value
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self._data.clear()
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class ConcurrentWeakValueDictionary(ConcurrentDictionary[K, V]):
+    """
+    A thread-safe dictionary holding weak references to its values.
+
+    An entry disappears automatically once its value is garbage collected.
+    Dead entries are never removed from inside the weakref callbacks (which can run
+    in any thread); they are queued and removed a few at a time by later operations,
+    so cleanup never re-enters the dictionary lock and never requires a full scan.
+
+    Example:
+        registry = ConcurrentWeakValueDictionary()
+        registry.assign_atomic('conn-1', connection)
+        del connection  # once collected, 'conn-1' is no longer in the registry
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self._dict = _WeakValueStore()  # type: ignore
+        self._dict.on_evict = self._evict
+        for key, value in dict(*args, **kwargs).items():
+            self._store(key, value)
+
+    def _value_size(self, value: Any) -> int:
+        # Only the weak reference is owned by the dictionary
+        return _REF_SIZE
+
+    def __len__(self) -> int:
+        # Unlike estimated_size(), this drops the entries whose value died first
+        with self._lock:
+            self._dict._purge(None)
+            return self._size
+
+    def __repr__(self) -> str:
+        with self._lock:
+            return f"ConcurrentWeakValueDictionary({self._dict!r})"
+
+
+class ConcurrentWeakKeyDictionary(ConcurrentDictionary[K, V]):
+    """
+    A thread-safe dictionary holding weak references to its keys.
+
+    An entry disappears automatically once its key is garbage collected.
+    As with ConcurrentWeakValueDictionary, dead entries are queued by the weakref
+    callbacks and removed incrementally by later operations under the lock.
+
+    Per-key locks (see key_lock() and get_locked()) are also held through weak
+    references, so they do not keep the keys alive.
+
+    Example:
+        metadata = ConcurrentWeakKeyDictionary()
+        metadata.assign_atomic(document, {'parsed': True})
+        del document  # once collected, its metadata is dropped too
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__()
+        self._dict = _WeakKeyStore()  # type: ignore
+        self._dict.on_evict = self._evict
+        self._key_locks = _WeakKeyStore()  # type: ignore
+        for key, value in dict(*args, **kwargs).items():
+            self._store(key, value)
+
+    def _key_size(self, key: Any) -> int:
+        # Only the weak reference is owned by the dictionary
+        return _REF_SIZE
+
+    def _new_entry_sizes(self) -> Dict[Any, int]:
+        # Recorded sizes must not keep the keys alive either: they are subtracted
+        # when this store drops the dead entries, see _size_evicted().
+        entry_sizes = _WeakKeyStore()
+        entry_sizes.on_evict = self._size_evicted
+        return entry_sizes  # type: ignore
+
+    def _evict(self, key: Any, value: Any) -> None:
+        # key is the dead weak reference: its recorded size is dropped by _size_evicted()
+        if self._lookup_filter is not None:
+            self._lookup_filter.remove(key)
+        self._size -= 1
+
+    def _size_evicted(self, key: Any, size: int) -> None:
+        self._entry_bytes -= size
+
+    def memory_estimate(self) -> int:
+        if self._entry_sizes is not None:
+            with self._lock:
+                self._entry_sizes._purge(None)  # type: ignore
+        return super().memory_estimate()
+
+    def __len__(self) -> int:
+        # Unlike estimated_size(), this drops the entries whose key died first
+        with self._lock:
+            self._dict._purge(None)
+            return self._size
+
+    def __repr__(self) -> str:
+        with self._lock:
+            return f"ConcurrentWeakKeyDictionary({self._dict!r})"
@@ -0,0 +1,209 @@
+import threading
+from collections import Counter, deque
+from typing import Any, Deque, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar('T')
+
+_EMPTY: Any = object()
+
+
+class _Segment(Generic[T]):
+    """
+    The items added by one thread. Only the owner thread adds to it and takes from
+    its tail; other threads only steal from its head. The lock is therefore almost
+    always uncontended.
+    """
+    def __init__(self, owner: threading.Thread) -> None:
+        self.lock = threading.Lock()
+        self.items: Deque[T] = deque()
+        self.owner = owner
+
+
+class ConcurrentWorkStealingBag(Generic[T]):
+    """
+    A thread-safe, unordered collection with per-thread storage, modelled after C#'s ConcurrentBag.
+
+    Each thread adds to and takes from its own segment, so producers and consumers
+    running in different threads do not contend on a shared lock. A thread whose
+    segment is empty steals from the other threads' segments (from the opposite end
+    to the one the owner works on).
+
+    This makes it well suited to workloads where the same threads both produce and
+    consume items, such as object pools. Unlike ConcurrentBag, it has no positional
+    access: items can only be added, taken, removed and iterated.
+
+    Example:
+        bag = ConcurrentWorkStealingBag()
+        bag.append(buffer)
+        item = bag.try_take()  # usually the item this thread added last
+    """
+    def __init__(self, iterable: Optional[Iterable[T]] = None) -> None:
+        self._local = threading.local()
+        self._segments_lock = threading.Lock()
+        self._segments: List[_Segment[T]] = []
+        if iterable is not None:
+            self.extend(iterable)
+
+    def _own_segment(self) -> _Segment[T]:
+        try:
+            return self._local.segment
+        except AttributeError:
+            segment: _Segment[T] = _Segment(threading.current_thread())
+            with self._segments_lock:
+                self._segments.append(segment)
+            self._local.segment = segment
+            return segment
+
+    def _locked_segments(self) -> List[_Segment[T]]:
+        # Acquire every segment lock, always in the same (creation) order
+        with self._segments_lock:
+            segments = list(self._segments)
+        for segment in segments:
+            segment.lock.acquire()
+        return segments
+
+    @staticmethod
+    def _release(segments: List[_Segment[T]]) -> None:
+        for segment in reversed(segments):
+            segment.lock.release()
+
+    def append(self, item: T) -> None:
+        segment = self._own_segment()
+        with segment.lock:
+            segment.items.append(item)
+
+    def extend(self, iterable: Iterable[T]) -> None:
+        items = list(iterable)
+        segment = self._own_segment()
+        with segment.lock:
+            segment.items.extend(items)
+
+    def _steal(self, own: _Segment[T]) -> Any:
+        with self._segments_lock:
+            segments = list(self._segments)
+        if len(segments) > 1:
+            # Start after our own segment so that threads spread their steals
+            start = segments.index(own) + 1 if own in segments else 0
+            segments = segments[start:] + segments[:start]
+        abandoned: List[_Segment[T]] = []
+        try:
+            for segment in segments:
+                if segment is own:
+                    continue
+                with segment.lock:
+                    if segment.items:
+                        return segment.items.popleft()
+                    if not segment.owner.is_alive():
+                        abandoned.append(segment)
+            return _EMPTY
+        finally:
+            if abandoned:
+                with self._segments_lock:
+                    for segment in abandoned:
+                        if segment in self._segments and not segment.items:
+                            self._segments.remove(segment)
+
+    def try_take(self, default: Optional[T] = None) -> Optional[T]:
+        """
+        Take an item, preferably the last one added by the calling thread.
+        Returns default if the bag is empty, without raising.
+        """
+        segment = self._own_segment()
+        with segment.lock:
+            if segment.items:
+                return segment.items.pop()
+        item = self._steal(segment)
+        return default if item is _EMPTY else item
+
+    def pop(self) -> T:
+        """
+        Take an item, like try_take(), but raise IndexError if the bag is empty.
+        """
+        segment = self._own_segment()
+        with segment.lock:
+            if segment.items:
+                return segment.items.pop()
+        item = self._steal(segment)
+        if item is _EMPTY:
+            raise IndexError("pop from an empty bag")
+        return item
+
+    def remove(self, value: T) -> None:
+        segment = self._own_segment()
+        with segment.lock:
+            try:
+                segment.items.remove(value)
+                return
+            except ValueError:
+                pass
+        with self._segments_lock:
+            segments = list(self._segments)
+        for other in segments:
+            if other is segment:
+                continue
+            with other.lock:
+                try:
+                    other.items.remove(value)
+                    return
+                except ValueError:
+                    pass
+        raise ValueError("ConcurrentWorkStealingBag.remove(x): x not in bag")
+
+    def __len__(self) -> int:
+        segments = self._locked_segments()
+        try:
+            return sum(len(segment.items) for segment in segments)
+        finally:
+            self._release(segments)
+
+    def __contains__(self, value: Any) -> bool:
+        with self._segments_lock:
+            segments = list(self._segments)
+        for segment in segments:
+            with segment.lock:
+                if value in segment.items:
+                    return True
+        return False
+
+    def _snapshot(self) -> List[T]:
+        segments = self._locked_segments()
+        try:
+            items: List[T] = []
+            for segment in segments:
+                items.extend(segment.items)
+            return items
+        finally:
+            self._release(segments)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self._snapshot())
+
+    def clear(self) -> None:
+        segments = self._locked_segments()
+        try:
+            for segment in segments:
+                segment.items.clear()
+        finally:
+            self._release(segments)
+
+    def __repr__(self) -> str:
+        return f"ConcurrentWorkStealingBag({self._snapshot()!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Thread-safe equality comparison.
+
+        Like ConcurrentBag, two bags are equal if they hold the same elements
+        with the same frequencies (multiset equality).
+        """
+        if not isinstance(other, ConcurrentWorkStealingBag):
+            return False
+        return Counter(self._snapshot()) == Counter(other._snapshot())
+
+    def __hash__(self) -> int:
+        """
+        Thread-safe hash computation, based on the multiset content.
+        Note: The hash will change if the bag is modified.
+        """
+        return hash(frozenset(Counter(self._snapshot()).items()))
+
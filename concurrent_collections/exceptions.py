@@ -0,0 +1,12 @@
+class CollectionClosedError(Exception):
+    """
+    Raised when adding to a closed collection, or when waiting for items
+    from a collection that has been closed and has no items left.
+    """
+
+
+class CollectionFullError(Exception):
+    """
+    Raised when adding to a bounded collection that is full, if its overflow
+    policy is to raise, or if no room was made before a timeout.
+    """
@@ -0,0 +1,94 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import operator
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentBag
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 7, 100000])
+def test_parallel_map_preserves_snapshot_order(chunk_size):
+    bag : ConcurrentBag[int] = ConcurrentBag(range(1000))
+    assert list(bag.parallel_map(square, chunk_size=chunk_size)) == [x * x for x in range(1000)]
+    assert list(bag.parallel_filter(lambda x: x % 3 == 0, chunk_size=chunk_size)) == list(range(0, 1000, 3))
+
+
+def test_parallel_map_works_on_a_snapshot():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(100))
+    results = bag.parallel_map(square, chunk_size=10)
+    bag.clear()
+    bag.append(1000)
+    assert list(results) == [x * x for x in range(100)]
+
+
+def test_parallel_map_is_lazy_and_bounded():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(10000))
+    calls : List[int] = []
+    lock = threading.Lock()
+
+    def record(x: int) -> int:
+        with lock:
+            calls.append(x)
+        return x
+
+    results = bag.parallel_map(record, chunk_size=10, max_workers=2)
+    assert next(results) == 0
+    time.sleep(0.05)
+    # At most two chunks per worker are in flight beyond the one consumed
+    assert len(calls) <= 10 * (2 * 2 + 1)
+    results.close()
+
+
+def test_parallel_reduce():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(1, 1001))
+    assert bag.parallel_reduce(operator.add) == 500500
+    assert bag.parallel_reduce(operator.add, 10, chunk_size=3) == 500510
+    assert bag.parallel_reduce(max, chunk_size=50) == 1000
+    assert bag.parallel_reduce(lambda acc, x: acc + x, combine=operator.add, chunk_size=64) == 500500
+    assert ConcurrentBag().parallel_reduce(operator.add, 0) == 0
+    with pytest.raises(TypeError):
+        ConcurrentBag().parallel_reduce(operator.add)
+
+
+def test_for_each_runs_on_given_executor():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(500))
+    seen : List[int] = []
+    threads = set()
+    lock = threading.Lock()
+
+    def visit(x: int) -> None:
+        time.sleep(0.0001)
+        with lock:
+            seen.append(x)
+            threads.add(threading.current_thread().name)
+
+    with ThreadPoolExecutor(4, thread_name_prefix="pool") as pool:
+        bag.for_each(visit, executor=pool, chunk_size=5)
+    assert sorted(seen) == list(range(500))
+    assert all(name.startswith("pool") for name in threads)
+
+
+def test_parallel_errors_propagate():
+    bag : ConcurrentBag[int] = ConcurrentBag([1, 2, 0, 4])
+    with pytest.raises(ZeroDivisionError):
+        list(bag.parallel_map(lambda x: 1 / x, chunk_size=1))
+
+
+def test_parallel_map_on_process_pool():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(200))
+    with ProcessPoolExecutor(2) as pool:
+        assert list(bag.parallel_map(square, executor=pool)) == [x * x for x in range(200)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
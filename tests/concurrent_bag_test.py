@@ -0,0 +1,680 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import array
+import asyncio
+import gc
+import threading
+from typing import List
+import pytest
+import time
+from concurrent_collections import CollectionClosedError, ConcurrentBag
+
+
+@pytest.mark.parametrize("ordered", [False, True])
+def test_hashed_bag_multiset_operations(ordered: bool):
+    bag : ConcurrentBag[str] = ConcurrentBag.hashed(['a', 'b', 'a', 'c'], ordered=ordered)
+    assert len(bag) == 4
+    assert bag.count('a') == 2
+    assert 'c' in bag
+    bag.remove('a')
+    assert bag.count('a') == 1
+    assert bag.discard('c')
+    assert not bag.discard('c')
+    assert 'c' not in bag
+    with pytest.raises(ValueError):
+        bag.remove('z')
+    assert sorted(bag) == ['a', 'b']
+    assert bag == ConcurrentBag(['b', 'a'])
+    assert hash(bag) == hash(ConcurrentBag(['b', 'a']))
+    bag.clear()
+    assert len(bag) == 0
+    with pytest.raises(IndexError):
+        bag.pop()
+
+
+def test_hashed_ordered_bag_keeps_insertion_order():
+    bag : ConcurrentBag[int] = ConcurrentBag.hashed([3, 1, 2, 1], ordered=True)
+    assert list(bag) == [3, 1, 2, 1]
+    assert bag[1] == 1 and bag[-1] == 1
+    bag[0] = 5
+    assert list(bag) == [5, 1, 2, 1]
+    assert bag.pop() == 1
+    assert bag.pop(0) == 5
+    del bag[0]
+    assert list(bag) == [2]
+
+
+def test_hashed_bag_positional_access():
+    bag : ConcurrentBag[int] = ConcurrentBag.hashed([1, 1, 2])
+    assert [bag[i] for i in range(3)] == [1, 1, 2]
+    bag[0] = 3
+    assert sorted(bag) == [1, 2, 3]
+    with pytest.raises(IndexError):
+        bag[3]
+
+
+def test_hashed_bag_thread_safety():
+    bag : ConcurrentBag[int] = ConcurrentBag.hashed()
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(2000):
+                bag.append(offset + i % 10)
+                if i % 2:
+                    bag.remove(offset + i % 10)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 100,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert len(bag) == 4000
+    assert all(bag.count(n * 100 + k) == (200 if k % 2 == 0 else 0) for n in range(4) for k in range(10))
+
+
+def test_fingerprint_tracks_every_mutation():
+    bag : ConcurrentBag[int] = ConcurrentBag([1, 2, 3])
+    bag.append(4)
+    bag.extend([5, 6])
+    bag.pop()
+    bag.remove(1)
+    bag.discard(2)
+    bag[0] = 7
+    del bag[1]
+    bag[0:1] = [8, 9]
+    del bag[-1:]
+    expected = ConcurrentBag(list(bag))
+    assert bag._fingerprint == expected._fingerprint
+    assert bag == expected
+    assert hash(bag) == hash(expected)
+    bag.clear()
+    assert bag._fingerprint == ConcurrentBag()._fingerprint
+
+
+def test_fingerprint_rejects_unequal_bags_and_handles_collisions():
+    assert ConcurrentBag([1, 4]) != ConcurrentBag([2, 3])
+    assert ConcurrentBag([1, 1]) != ConcurrentBag([1])
+    # Equal fingerprints must still be checked element by element
+    a, b = ConcurrentBag([1, 2]), ConcurrentBag([3, 4])
+    b._fingerprint = a._fingerprint
+    assert a != b
+
+
+def test_unhashable_items_fall_back_to_full_comparison():
+    bag : ConcurrentBag[object] = ConcurrentBag([1])
+    bag.append([2])
+    assert bag._fingerprint is None
+    assert bag != ConcurrentBag([1])
+    with pytest.raises(TypeError):
+        hash(bag)
+    bag.clear()
+    bag.append(1)
+    assert hash(bag) == hash(ConcurrentBag([1]))
+
+
+def test_equal_bags_hash_equal_after_holding_unhashable_items():
+    a : ConcurrentBag[object] = ConcurrentBag([1.0, 2.0])
+    b : ConcurrentBag[object] = ConcurrentBag([[1]])
+    b.pop()
+    b.extend([1.0, 2.0])
+    assert a == b
+    assert hash(a) == hash(b)
+    # The fingerprint is maintained again once it could be computed
+    assert b._fingerprint == a._fingerprint
+
+def test_cross_equality_does_not_deadlock():
+    a : ConcurrentBag[int] = ConcurrentBag(range(100))
+    b : ConcurrentBag[int] = ConcurrentBag(range(100))
+    results : List[bool] = []
+
+    def compare(x: ConcurrentBag[int], y: ConcurrentBag[int]):
+        for _ in range(2000):
+            results.append(x == y)
+
+    threads = [threading.Thread(target=compare, args=(a, b)), threading.Thread(target=compare, args=(b, a))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert not any(t.is_alive() for t in threads)
+    assert all(results)
+
+
+@pytest.mark.parametrize("make_bag", [ConcurrentBag, ConcurrentBag.hashed])
+def test_try_take_take_many_and_drain(make_bag):
+    bag : ConcurrentBag[int] = make_bag(range(10))
+    assert bag.try_take() is not None
+    assert len(bag.take_many(3)) == 3
+    assert bag.take_many(0) == []
+    assert len(bag) == 6
+    drained = bag.drain()
+    assert len(drained) == 6
+    assert len(bag) == 0
+    assert bag == ConcurrentBag()
+    assert bag.try_take(-1) == -1
+    assert bag.take_many(5) == []
+    bag.append(1)
+    assert bag.take_many(5) == [1]
+
+
+def test_take_many_thread_safety():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(20000))
+    taken : List[int] = []
+    lock = threading.Lock()
+
+    def consumer():
+        while True:
+            batch = bag.take_many(7)
+            if not batch:
+                break
+            with lock:
+                taken.extend(batch)
+
+    threads = [threading.Thread(target=consumer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(taken) == list(range(20000))
+    assert bag == ConcurrentBag()
+
+
+def test_take_blocks_until_item_added():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    results : List[int] = []
+    consumer = threading.Thread(target=lambda: results.append(bag.take(timeout=5)))
+    consumer.start()
+    time.sleep(0.05)
+    assert consumer.is_alive()
+    bag.append(42)
+    consumer.join(timeout=5)
+    assert results == [42]
+    assert len(bag) == 0
+
+
+def test_take_timeout():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        bag.take(timeout=0.05)
+    assert time.monotonic() - start >= 0.04
+    assert bag.take_many(3, block=True, timeout=0.01) == []
+
+
+def test_close_releases_blocked_consumers():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    outcomes : List[str] = []
+    lock = threading.Lock()
+
+    def consumer():
+        try:
+            bag.take()
+            outcome = "item"
+        except CollectionClosedError:
+            outcome = "closed"
+        with lock:
+            outcomes.append(outcome)
+
+    threads = [threading.Thread(target=consumer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    bag.close()
+    for t in threads:
+        t.join(timeout=5)
+
+    assert outcomes == ["closed"] * 4
+    assert bag.closed
+    with pytest.raises(CollectionClosedError):
+        bag.append(1)
+
+
+def test_close_lets_remaining_items_be_taken():
+    bag : ConcurrentBag[int] = ConcurrentBag([1, 2, 3])
+    bag.close()
+    assert sorted(bag.take_many(2, block=True) + [bag.take()]) == [1, 2, 3]
+    with pytest.raises(CollectionClosedError):
+        bag.take_many(1, block=True)
+
+
+def test_blocking_producer_consumer():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    taken : List[int] = []
+    errors : List[Exception] = []
+    lock = threading.Lock()
+
+    def producer(offset: int):
+        for i in range(0, 1000, 10):
+            bag.extend(range(offset + i, offset + i + 10))
+
+    def consumer():
+        try:
+            while True:
+                try:
+                    batch = bag.take_many(8, block=True, timeout=5)
+                except CollectionClosedError:
+                    return
+                with lock:
+                    taken.extend(batch)
+        except Exception as e:
+            errors.append(e)
+
+    consumers = [threading.Thread(target=consumer) for _ in range(4)]
+    producers = [threading.Thread(target=producer, args=(n * 1000,)) for n in range(3)]
+    for t in consumers + producers:
+        t.start()
+    for t in producers:
+        t.join()
+    bag.close()
+    for t in consumers:
+        t.join(timeout=10)
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert sorted(taken) == list(range(3000))
+
+
+def test_chunked_bag_behaves_like_list_bag():
+    bag : ConcurrentBag[int] = ConcurrentBag.chunked(range(10), chunk_size=3)
+    assert list(bag) == list(range(10))
+    bag.extend([10, 11])
+    bag.append(12)
+    assert len(bag) == 13
+    assert bag[4] == 4 and bag[-1] == 12
+    bag[4] = 40
+    del bag[0]
+    bag.remove(5)
+    assert bag.pop() == 12
+    assert bag.pop(0) == 1
+    assert list(bag) == [2, 3, 40, 6, 7, 8, 9, 10, 11]
+    assert bag.count(40) == 1 and 9 in bag
+    assert bag == ConcurrentBag([2, 3, 40, 6, 7, 8, 9, 10, 11])
+    assert sorted(bag.take_many(3)) == [9, 10, 11]
+    assert len(bag.drain()) == 6
+    bag.extend(range(5))
+    assert bag._items._chunks == [[0, 1, 2], [3, 4]]
+
+
+def test_chunked_bag_iteration_is_a_snapshot():
+    bag : ConcurrentBag[int] = ConcurrentBag.chunked(range(10), chunk_size=4)
+    it = iter(bag)
+    bag.append(10)
+    bag[0] = 100
+    bag.remove(5)
+    assert list(it) == list(range(10))
+    assert list(bag) == [100, 1, 2, 3, 4, 6, 7, 8, 9, 10]
+
+
+def test_chunked_bag_thread_safety():
+    bag : ConcurrentBag[int] = ConcurrentBag.chunked(chunk_size=16)
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(1000):
+                bag.append(offset + i)
+                if i % 3 == 0:
+                    bag.pop()
+                if i % 50 == 0:
+                    list(bag)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert len(bag) == 4 * (1000 - 334)
+    assert len(list(bag)) == len(bag)
+
+
+def test_iteration_does_not_copy_without_writers():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(1000))
+    storage = bag._items
+    assert sum(bag) == sum(range(1000))
+    assert list(bag) == list(range(1000))
+    assert bag._items is storage
+    assert bag._readers == 0
+
+
+@pytest.mark.parametrize("factory", [ConcurrentBag, ConcurrentBag.hashed, ConcurrentBag.chunked])
+def test_writes_during_iteration_copy_on_write(factory):
+    bag : ConcurrentBag[int] = factory(range(10))
+    it = iter(bag)
+    assert next(it) == 0
+    bag.append(10)
+    bag.remove(5)
+    bag.clear()
+    bag.extend([1, 2])
+    assert list(it) == list(range(1, 10))
+    assert sorted(bag) == [1, 2]
+    # The finished iterator belonged to an older generation: no reader is left behind
+    assert bag._readers == 0
+    storage = bag._items
+    bag.append(3)
+    assert bag._items is storage
+
+
+def test_drain_during_iteration_returns_independent_list():
+    bag : ConcurrentBag[int] = ConcurrentBag([1, 2, 3])
+    it = iter(bag)
+    drained = bag.drain()
+    drained.append(4)
+    assert list(it) == [1, 2, 3]
+
+
+def test_repr_is_bounded():
+    assert repr(ConcurrentBag([1, 2])) == "ConcurrentBag([1, 2])"
+    text = repr(ConcurrentBag(range(1_000_000)))
+    assert text.startswith("ConcurrentBag([0, 1, 2, ")
+    assert text.endswith("99, ...], size=1000000)")
+
+
+def test_iteration_thread_safety_with_writers():
+    bag : ConcurrentBag[int] = ConcurrentBag(range(1000))
+    errors : List[Exception] = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                snapshot = list(bag)
+                if len(snapshot) < 1000:
+                    errors.append(AssertionError(f"Inconsistent snapshot of {len(snapshot)} items"))
+        except Exception as e:
+            errors.append(e)
+
+    def writer():
+        try:
+            for i in range(2000):
+                bag.append(i)
+                bag.pop()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    writers = [threading.Thread(target=writer) for _ in range(2)]
+    for t in readers + writers:
+        t.start()
+    for t in writers:
+        t.join()
+    stop.set()
+    for t in readers:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert sorted(bag) == list(range(1000))
+
+
+def test_typed_bag_operations():
+    bag : ConcurrentBag[float] = ConcurrentBag.typed("d", [1.0, 2.0, 3.0])
+    bag.append(4.0)
+    bag.extend([5, 6])
+    assert isinstance(bag._items, array.array)
+    assert len(bag) == 6 and bag[-1] == 6.0
+    bag.remove(2.0)
+    assert 3.0 in bag and bag.count(1.0) == 1
+    bag[0:2] = [10.0, 30.0]
+    assert list(bag) == [10.0, 30.0, 4.0, 5.0, 6.0]
+    assert bag == ConcurrentBag([6.0, 5.0, 4.0, 30.0, 10.0])
+    assert hash(bag) == hash(ConcurrentBag.typed("d", [10.0, 30.0, 4.0, 5.0, 6.0]))
+    assert bag.take_many(2) == [5.0, 6.0]
+    assert bag.drain() == [10.0, 30.0, 4.0]
+    bag.append(1.0)
+    assert bag.pop() == 1.0
+    with pytest.raises(TypeError):
+        bag.append("not a number")  # type: ignore
+
+
+def test_typed_bag_hashes_like_equal_untyped_bag():
+    typed : ConcurrentBag[float] = ConcurrentBag.typed("d", [1.0, 2.0])
+    untyped : ConcurrentBag[float] = ConcurrentBag([1.0, 2.0])
+    assert typed == untyped
+    assert hash(typed) == hash(untyped)
+    assert hash(ConcurrentBag.typed("q", [3, 1, 2])) == hash(ConcurrentBag([1, 2, 3]))
+
+def test_typed_bag_extend_from_buffers():
+    bag : ConcurrentBag[int] = ConcurrentBag.typed("q")
+    bag.extend(array.array("q", range(5)))
+    bag.extend(memoryview(array.array("q", [5, 6])))
+    bag.extend(array.array("i", [7, 8]))  # different item type: converted item by item
+    bag.extend(range(9, 11))
+    assert list(bag) == list(range(11))
+
+
+def test_typed_bag_memoryview_is_a_zero_copy_snapshot():
+    bag : ConcurrentBag[float] = ConcurrentBag.typed("d", [1.0, 2.0])
+    view = bag.to_memoryview()
+    assert view.readonly and view.format == "d"
+    assert view.obj is bag._items
+    bag.append(3.0)  # copies the exported storage once instead of failing to resize it
+    bag[0] = 100.0
+    assert view.tolist() == [1.0, 2.0]
+    assert list(bag) == [100.0, 2.0, 3.0]
+    with pytest.raises(TypeError):
+        ConcurrentBag([1.0]).to_memoryview()
+
+
+def test_typed_bag_writes_after_an_export_copy_at_most_once():
+    bag : ConcurrentBag[float] = ConcurrentBag.typed("d", [1.0, 2.0])
+    view = bag.to_memoryview()
+    bag.append(3.0)  # copies the exported storage
+    storage = bag._items
+    bag.append(4.0)
+    bag[0] = 100.0
+    assert bag._items is storage
+    assert view.tolist() == [1.0, 2.0]
+    # A view collected before any write doesn't cost a copy
+    view = bag.to_memoryview()
+    del view
+    gc.collect()
+    assert bag._readers == 0
+    bag.append(5.0)
+    assert bag._items is storage
+    assert list(bag) == [100.0, 2.0, 3.0, 4.0, 5.0]
+
+
+def test_typed_bag_to_numpy():
+    numpy = pytest.importorskip("numpy")
+    bag : ConcurrentBag[float] = ConcurrentBag.typed("d", [1.0, 2.0, 3.0])
+    values = bag.to_numpy()
+    assert values.dtype == numpy.float64
+    assert values.sum() == 6.0
+    bag.extend(numpy.array([4.0, 5.0]))
+    assert len(bag) == 5
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_spilling_bag_moves_cold_chunks_to_disk(tmp_path):
+    bag : ConcurrentBag[int] = ConcurrentBag.spilling(100, range(1000), chunk_size=50, directory=str(tmp_path))
+    storage = bag._items
+    assert wait_for(lambda: storage.items_in_memory() <= 100)
+    assert storage.spilled_items() == 900
+    assert len(os.listdir(tmp_path)) == 18
+
+    assert len(bag) == 1000
+    assert list(bag) == list(range(1000))
+    assert bag[10] == 10 and 500 in bag and bag.count(3) == 1
+    assert sorted(bag.sample(1000)) == list(range(1000))
+    bag.remove(20)
+    bag.append(20)
+    assert bag == ConcurrentBag(range(1000))
+
+    storage = None  # the segment files are deleted once no storage references them
+    bag.clear()
+    gc.collect()
+    assert os.listdir(tmp_path) == []
+
+
+def test_spilling_bag_pages_chunks_back_in_on_pop(tmp_path):
+    bag : ConcurrentBag[int] = ConcurrentBag.spilling(10, range(100), chunk_size=10, directory=str(tmp_path))
+    assert wait_for(lambda: bag._items.items_in_memory() <= 10)
+    it = iter(bag)
+    assert [bag.pop() for _ in range(95)] == list(range(99, 4, -1))
+    assert list(bag) == [0, 1, 2, 3, 4]
+    # The iterator still sees its snapshot, including the chunks popped since
+    assert list(it) == list(range(100))
+    del it
+    gc.collect()
+    assert len(os.listdir(tmp_path)) <= 1
+
+
+def test_spilling_bag_never_loads_chunks_under_the_lock(tmp_path, monkeypatch):
+    from concurrent_collections.concurrent_bag import _SpilledChunk
+    bag : ConcurrentBag[int] = ConcurrentBag.spilling(10, range(100), chunk_size=10, directory=str(tmp_path))
+    storage = bag._items
+    assert wait_for(lambda: storage.items_in_memory() <= 10)
+    loads_under_lock : List[str] = []
+    load = _SpilledChunk.load
+
+    def checked_load(chunk: _SpilledChunk) -> List[int]:
+        if bag._lock._is_owned():  # type: ignore
+            loads_under_lock.append(chunk.path)
+        return load(chunk)
+
+    monkeypatch.setattr(_SpilledChunk, "load", checked_load)
+    assert bag[5] == 5 and 42 in bag and bag.count(7) == 1 and 1000 not in bag
+    assert sorted(bag.sample(100)) == list(range(100))
+    assert bag == ConcurrentBag(range(100)) and hash(bag) == hash(ConcurrentBag(range(100)))
+    assert repr(bag).startswith("ConcurrentBag([0, 1, 2")
+    assert storage.spilled_items() == 90
+
+    # Only the chunk holding the removed item is brought back into memory
+    bag.remove(15)
+    assert storage.spilled_items() == 80
+    assert not bag.discard(1000)
+    assert storage.spilled_items() == 80
+
+    bag[0] = -1
+    del bag[1]
+    assert bag.take_many(25) == list(range(99, 74, -1))
+    bag.append(100)
+    assert sorted(bag.drain()) == sorted([-1, 100] + [i for i in range(2, 75) if i != 15])
+    assert not loads_under_lock
+
+def test_spilling_bag_thread_safety(tmp_path):
+    bag : ConcurrentBag[int] = ConcurrentBag.spilling(200, chunk_size=32, directory=str(tmp_path))
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(2000):
+                bag.append(offset + i)
+                if i % 4 == 0:
+                    bag.pop()
+                if i % 500 == 0:
+                    list(bag)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert len(bag) == 4 * 1500
+    assert len(list(bag)) == 4 * 1500
+    assert wait_for(lambda: bag._items.items_in_memory() <= 200)
+
+
+def test_spilling_bag_keeps_unpicklable_items_in_memory(tmp_path):
+    bag : ConcurrentBag[object] = ConcurrentBag.spilling(1, chunk_size=2, directory=str(tmp_path))
+    bag.extend([lambda: None for _ in range(10)])
+    assert wait_for(lambda: bag._items._spiller.error is not None)
+    assert len(list(bag)) == 10
+    assert os.listdir(tmp_path) == []
+
+
+def test_extend_reads_streams_outside_the_lock():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    lock_free : List[bool] = []
+
+    def check_lock():
+        acquired = bag._lock.acquire(timeout=1)
+        if acquired:
+            bag._lock.release()
+        lock_free.append(acquired)
+
+    def generate():
+        for i in range(3000):
+            if i % 1000 == 0:
+                # Another thread can use the bag while the stream is being read
+                checker = threading.Thread(target=check_lock)
+                checker.start()
+                checker.join()
+            yield i
+
+    bag.extend(generate())
+    assert lock_free == [True, True, True]
+    assert sorted(bag) == list(range(3000))
+
+
+def test_ingest_publishes_in_batches():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    sizes : List[int] = []
+
+    def generate():
+        for i in range(25):
+            sizes.append(len(bag))
+            yield i
+
+    assert bag.ingest(generate(), batch_size=10) == 25
+    # Items become visible batch by batch while the stream is still being read
+    assert sizes[9] == 0 and sizes[10] == 10 and sizes[24] == 20
+    assert sorted(bag) == list(range(25))
+    with pytest.raises(ValueError):
+        bag.ingest([1], batch_size=0)
+
+
+def test_ingest_max_delay_flushes_partial_batches():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+    sizes : List[int] = []
+
+    def slow():
+        for i in range(4):
+            sizes.append(len(bag))
+            time.sleep(0.03)
+            yield i
+
+    bag.ingest(slow(), batch_size=100, max_delay=0.01)
+    # The pending batch is added along with the first item arriving after max_delay
+    assert sizes == [0, 0, 2, 2]
+    assert len(bag) == 4
+
+
+def test_async_ingest():
+    bag : ConcurrentBag[int] = ConcurrentBag()
+
+    async def produce():
+        for i in range(50):
+            await asyncio.sleep(0)
+            yield i
+
+    assert asyncio.run(bag.async_ingest(produce(), batch_size=8)) == 50
+    assert asyncio.run(bag.async_ingest(range(50, 60))) == 10
+    assert sorted(bag) == list(range(60))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
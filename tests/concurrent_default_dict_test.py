@@ -0,0 +1,73 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import threading
+import time
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentDefaultDictionary
+
+
+def test_default_created_on_miss_only():
+    calls : List[int] = []
+
+    def factory() -> List[int]:
+        calls.append(1)
+        return []
+
+    d : ConcurrentDefaultDictionary[str, List[int]] = ConcurrentDefaultDictionary(factory)
+    d.append_to('x', 1)
+    d.append_to('x', 2)
+    assert d['x'] == [1, 2]
+    assert d.get('y') is None
+    assert 'y' not in d
+    assert len(calls) == 1
+
+
+def test_no_factory_raises_key_error():
+    d : ConcurrentDefaultDictionary[str, int] = ConcurrentDefaultDictionary()
+    with pytest.raises(KeyError):
+        d['missing']
+
+
+def test_mutate_and_add_to():
+    d : ConcurrentDefaultDictionary[str, set] = ConcurrentDefaultDictionary(set)
+    d.add_to('s', 1)
+    d.add_to('s', 1)
+    assert d.mutate('s', len) == 1
+    assert repr(ConcurrentDefaultDictionary(list, {'a': [1]})) == "ConcurrentDefaultDictionary(<class 'list'>, {'a': [1]})"
+
+
+def test_factory_called_once_per_key_under_contention():
+    calls : List[int] = []
+
+    def slow_factory() -> List[int]:
+        calls.append(1)
+        time.sleep(0.01)
+        return []
+
+    d : ConcurrentDefaultDictionary[int, List[int]] = ConcurrentDefaultDictionary(slow_factory)
+    errors : List[Exception] = []
+
+    def worker():
+        try:
+            for i in range(1000):
+                d.append_to(i % 10, i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert len(calls) == 10
+    assert sum(len(d[k]) for k in d) == 8000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,461 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import asyncio
+import threading
+import time
+from typing import List
+import pytest
+from concurrent_collections import CollectionClosedError, CollectionFullError, ConcurrentQueue
+
+
+def test_extend_from_stream_keeps_order_and_lock_free():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    lock_free : List[bool] = []
+
+    def check_lock():
+        acquired = q._lock.acquire(timeout=1)
+        if acquired:
+            q._lock.release()
+        lock_free.append(acquired)
+
+    def generate():
+        for i in range(2500):
+            if i % 1000 == 0:
+                checker = threading.Thread(target=check_lock)
+                checker.start()
+                checker.join()
+            yield i
+
+    q.extend(generate())
+    assert lock_free == [True, True, True]
+    assert list(q) == list(range(2500))
+
+    q.clear()
+    q.extendleft(iter(range(3000)))
+    assert list(q) == list(range(2999, -1, -1))
+
+
+def test_ingest_publishes_in_batches():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    sizes : List[int] = []
+
+    def generate():
+        for i in range(7):
+            sizes.append(len(q))
+            yield i
+
+    assert q.ingest(generate(), batch_size=3) == 7
+    assert sizes == [0, 0, 0, 3, 3, 3, 6]
+    assert list(q) == list(range(7))
+
+
+def test_async_ingest():
+    q : ConcurrentQueue[str] = ConcurrentQueue()
+
+    async def produce():
+        for i in range(20):
+            await asyncio.sleep(0)
+            yield str(i)
+
+    assert asyncio.run(q.async_ingest(produce(), batch_size=6)) == 20
+    assert list(q) == [str(i) for i in range(20)]
+
+
+def test_try_pop_and_non_blocking_pop():
+    q : ConcurrentQueue[int] = ConcurrentQueue([1, 2, 3])
+    assert q.try_popleft() == 1
+    assert q.try_pop() == 3
+    assert q.popleft() == 2
+    assert q.try_popleft() is None
+    assert q.try_pop(-1) == -1
+    with pytest.raises(IndexError):
+        q.popleft()
+    with pytest.raises(IndexError):
+        q.pop()
+
+
+def test_popleft_blocks_until_item_added():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    results : List[int] = []
+    consumers = [threading.Thread(target=lambda: results.append(q.popleft(block=True, timeout=5)))
+                 for _ in range(3)]
+    for t in consumers:
+        t.start()
+    while q._waiting < 3:
+        time.sleep(0.001)
+    q.append(1)
+    q.extend([2, 3])
+    for t in consumers:
+        t.join()
+    assert sorted(results) == [1, 2, 3]
+
+
+def test_blocking_pop_timeout():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    with pytest.raises(TimeoutError):
+        q.popleft(block=True, timeout=0.05)
+    with pytest.raises(TimeoutError):
+        q.pop(block=True, timeout=0)
+
+
+def test_close_releases_blocked_consumers():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    errors : List[Exception] = []
+
+    def consume():
+        try:
+            q.popleft(block=True)
+        except Exception as e:
+            errors.append(e)
+
+    consumers = [threading.Thread(target=consume) for _ in range(4)]
+    for t in consumers:
+        t.start()
+    while q._waiting < 4:
+        time.sleep(0.001)
+    q.close()
+    for t in consumers:
+        t.join(5)
+    assert len(errors) == 4 and all(isinstance(e, CollectionClosedError) for e in errors)
+    assert q.closed
+    with pytest.raises(CollectionClosedError):
+        q.append(1)
+    with pytest.raises(CollectionClosedError):
+        q.extendleft([1])
+
+
+def test_close_lets_consumers_drain_remaining_items():
+    q : ConcurrentQueue[int] = ConcurrentQueue([1, 2])
+    q.close()
+    assert q.popleft(block=True) == 1
+    assert q.pop(block=True) == 2
+    with pytest.raises(CollectionClosedError):
+        q.popleft(block=True)
+
+
+def test_bounded_queue_drop_newest():
+    q : ConcurrentQueue[int] = ConcurrentQueue(maxsize=3, overflow="drop_newest")
+    q.extend([1, 2])
+    q.extend([3, 4, 5])
+    q.append(6)
+    assert list(q) == [1, 2, 3]
+    assert q.dropped == 3
+
+
+def test_bounded_queue_drop_oldest():
+    q : ConcurrentQueue[int] = ConcurrentQueue([1, 2], maxsize=3, overflow="drop_oldest")
+    q.extend([3, 4])
+    assert list(q) == [2, 3, 4]
+    q.extend(range(10, 15))
+    assert list(q) == [12, 13, 14]
+    q.appendleft(0)
+    assert list(q) == [0, 12, 13]
+    assert q.dropped == 1 + 5 + 1
+
+
+def test_bounded_queue_raise_is_all_or_nothing():
+    q : ConcurrentQueue[int] = ConcurrentQueue(maxsize=3, overflow="raise")
+    q.extend([1, 2])
+    with pytest.raises(CollectionFullError):
+        q.extend([3, 4])
+    assert list(q) == [1, 2]
+    q.append(3)
+    with pytest.raises(CollectionFullError):
+        q.append(4)
+    assert q.dropped == 0
+    with pytest.raises(ValueError):
+        ConcurrentQueue(maxsize=0)
+    with pytest.raises(ValueError):
+        ConcurrentQueue(maxsize=1, overflow="spill")
+
+
+def test_bounded_queue_blocks_until_room():
+    q : ConcurrentQueue[int] = ConcurrentQueue(maxsize=2)
+    q.extend([1, 2])
+    with pytest.raises(CollectionFullError):
+        q.append(3, timeout=0.05)
+
+    producer = threading.Thread(target=lambda: q.extend([3, 4, 5], timeout=5))
+    producer.start()
+    consumed : List[int] = []
+    while len(consumed) < 5:
+        consumed.append(q.popleft(block=True, timeout=5))
+    producer.join(5)
+    assert consumed == [1, 2, 3, 4, 5]
+
+
+def test_bounded_queue_partial_extend_on_timeout():
+    q : ConcurrentQueue[int] = ConcurrentQueue([1], maxsize=3)
+    with pytest.raises(CollectionFullError, match="2 of 4 items"):
+        q.extend([2, 3, 4, 5], timeout=0.01)
+    assert list(q) == [1, 2, 3]
+
+
+def test_bounded_queue_close_releases_blocked_producers():
+    q : ConcurrentQueue[int] = ConcurrentQueue([0], maxsize=1)
+    errors : List[Exception] = []
+
+    def produce():
+        try:
+            q.append(1)
+        except Exception as e:
+            errors.append(e)
+
+    producers = [threading.Thread(target=produce) for _ in range(3)]
+    for t in producers:
+        t.start()
+    while q._waiting_producers < 3:
+        time.sleep(0.001)
+    q.close()
+    for t in producers:
+        t.join(5)
+    assert len(errors) == 3 and all(isinstance(e, CollectionClosedError) for e in errors)
+
+
+def test_bounded_queue_thread_safety():
+    q : ConcurrentQueue[int] = ConcurrentQueue(maxsize=8)
+    errors : List[Exception] = []
+    consumed : List[int] = []
+    lock = threading.Lock()
+
+    def produce(offset: int):
+        try:
+            for i in range(0, 500, 5):
+                q.extend(range(offset + i, offset + i + 5), timeout=5)
+        except Exception as e:
+            errors.append(e)
+
+    def consume():
+        try:
+            for _ in range(500):
+                item = q.popleft(block=True, timeout=5)
+                assert len(q) <= 8
+                with lock:
+                    consumed.append(item)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+    threads += [threading.Thread(target=consume) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert sorted(consumed) == [n * 1000 + i for n in range(4) for i in range(500)]
+
+
+def test_popleft_many_pop_many_and_drain_to():
+    q : ConcurrentQueue[int] = ConcurrentQueue(range(10))
+    assert q.popleft_many(3) == [0, 1, 2]
+    assert q.pop_many(2) == [9, 8]
+    assert q.popleft_many(0) == []
+    target : List[int] = []
+    assert q.drain_to(target, max_n=2) == 2
+    assert target == [3, 4]
+    seen : List[int] = []
+    assert q.drain_to(seen.append) == 3
+    assert seen == [5, 6, 7]
+    assert q.popleft_many(5) == [] and q.pop_many(5) == []
+    q.extend([1, 2, 3])
+    assert q.pop_many(10) == [3, 2, 1]
+    with pytest.raises(ValueError):
+        q.popleft_many(-1)
+    with pytest.raises(ValueError):
+        q.popleft_many(5, min_n=6)
+
+
+def test_popleft_many_blocking():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    assert q.popleft_many(10, block=True, timeout=0.01) == []
+
+    results : List[List[int]] = []
+    consumer = threading.Thread(target=lambda: results.append(q.popleft_many(10, block=True, timeout=5)))
+    consumer.start()
+    while q._waiting < 1:
+        time.sleep(0.001)
+    q.extend([1, 2, 3])
+    consumer.join(5)
+    assert results == [[1, 2, 3]]
+
+    q.close()
+    with pytest.raises(CollectionClosedError):
+        q.popleft_many(10, block=True)
+
+
+def test_popleft_many_min_n_and_linger():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    results : List[List[int]] = []
+    consumer = threading.Thread(target=lambda: results.append(q.popleft_many(10, block=True, min_n=3, timeout=5)))
+    consumer.start()
+    for i in range(5):
+        q.append(i)
+        time.sleep(0.01)
+    consumer.join(5)
+    assert results and len(results[0]) >= 3
+    assert results[0] == list(range(len(results[0])))
+
+    q.clear()
+    q.append(0)
+    start = time.monotonic()
+    assert q.popleft_many(10, block=True, min_n=5, linger=0.05) == [0]
+    assert 0.04 <= time.monotonic() - start < 2
+
+
+def test_batch_consumers_and_single_consumers_thread_safety():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    errors : List[Exception] = []
+    consumed : List[int] = []
+    lock = threading.Lock()
+    total = 4000
+
+    def produce(offset: int):
+        for i in range(0, 1000, 10):
+            q.extend(range(offset + i, offset + i + 10))
+            if i % 100 == 0:
+                q.append(-1)
+
+    def consume(batch: bool):
+        try:
+            while True:
+                if batch:
+                    items = q.popleft_many(50, block=True, min_n=20, linger=0.005)
+                else:
+                    items = [q.popleft(block=True)]
+                with lock:
+                    consumed.extend(items)
+        except CollectionClosedError:
+            pass
+        except Exception as e:
+            errors.append(e)
+
+    producers = [threading.Thread(target=produce, args=(n * 1000,)) for n in range(4)]
+    consumers = [threading.Thread(target=consume, args=(n % 2 == 0,)) for n in range(4)]
+    for t in producers + consumers:
+        t.start()
+    for t in producers:
+        t.join()
+    q.close()
+    for t in consumers:
+        t.join(5)
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert sorted(item for item in consumed if item >= 0) == list(range(total))
+    assert consumed.count(-1) == 40
+
+
+def test_async_popleft_from_thread_producers():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+
+    async def consume() -> List[int]:
+        producers = [threading.Thread(target=lambda n=n: q.extend(range(n * 100, n * 100 + 100)))
+                     for n in range(3)]
+        for t in producers:
+            t.start()
+        items = [await q.async_popleft(timeout=5) for _ in range(300)]
+        for t in producers:
+            t.join()
+        return items
+
+    assert sorted(asyncio.run(consume())) == list(range(300))
+
+
+def test_async_popleft_timeout_and_close():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await q.async_popleft(timeout=0.01)
+        assert not q._async_getters
+        waiter = asyncio.ensure_future(q.async_popleft())
+        await asyncio.sleep(0.01)
+        threading.Thread(target=q.close).start()
+        with pytest.raises(CollectionClosedError):
+            await asyncio.wait_for(waiter, 5)
+
+    asyncio.run(main())
+
+
+def test_async_wakeups_are_coalesced():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+    calls : List[int] = []
+
+    async def main() -> List[int]:
+        loop = asyncio.get_running_loop()
+        call_soon_threadsafe = loop.call_soon_threadsafe
+
+        def counting(*args):
+            calls.append(1)
+            return call_soon_threadsafe(*args)
+
+        loop.call_soon_threadsafe = counting  # type: ignore
+        waiter = asyncio.ensure_future(q.async_popleft())
+        await asyncio.sleep(0.01)
+        producer = threading.Thread(target=lambda: [q.append(i) for i in range(1000)])
+        producer.start()
+        producer.join()
+        first = await asyncio.wait_for(waiter, 5)
+        return [first] + [await q.async_popleft() for _ in range(999)]
+
+    assert asyncio.run(main()) == list(range(1000))
+    assert len(calls) == 1
+
+
+def test_async_cancelled_waiter_passes_wakeup_on():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+
+    async def main():
+        first = asyncio.ensure_future(q.async_popleft())
+        second = asyncio.ensure_future(q.async_popleft())
+        await asyncio.sleep(0.01)
+        q.append(1)
+        while len(q._async_getters._waiters.get(asyncio.get_running_loop(), ())) > 1:
+            await asyncio.sleep(0)
+        first.cancel()  # woken up for the item, but cancelled before taking it
+        assert await asyncio.wait_for(second, 5) == 1
+        assert first.cancelled()
+
+    asyncio.run(main())
+
+
+def test_async_append_waits_for_room():
+    q : ConcurrentQueue[int] = ConcurrentQueue([0], maxsize=1)
+
+    async def main():
+        with pytest.raises(CollectionFullError):
+            await q.async_append(1, timeout=0.01)
+        consumer = threading.Thread(target=lambda: [q.popleft(block=True, timeout=5) for _ in range(3)])
+        consumer.start()
+        for i in range(1, 4):
+            await q.async_append(i, timeout=5)
+        await asyncio.get_running_loop().run_in_executor(None, consumer.join)
+        assert list(q) == [3]
+
+    asyncio.run(main())
+
+
+def test_async_stream_until_closed():
+    q : ConcurrentQueue[int] = ConcurrentQueue()
+
+    def produce():
+        for i in range(0, 500, 50):
+            q.extend(range(i, i + 50))
+            time.sleep(0.001)
+        q.close()
+
+    async def main() -> List[int]:
+        producer = threading.Thread(target=produce)
+        producer.start()
+        items = [item async for item in q.stream()]
+        producer.join()
+        return items
+
+    assert asyncio.run(main()) == list(range(500))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
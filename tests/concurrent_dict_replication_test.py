@@ -0,0 +1,155 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import gc
+import multiprocessing
+import threading
+import time
+from typing import Callable
+import pytest
+from concurrent_collections import (ConcurrentDictionary, ConcurrentWeakKeyDictionary, ConcurrentWeakValueDictionary,
+                                    ReplicationFollower, ReplicationLeader)
+from concurrent_collections.concurrent_dict_replication import _compact
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_follower_receives_snapshot_and_mutations():
+    d : ConcurrentDictionary[str, int] = ConcurrentDictionary({'a': 1, 'b': 2})
+    leader_conn, follower_conn = multiprocessing.Pipe()
+    with ReplicationLeader(d, flush_interval=0.01) as leader:
+        leader.add_follower(leader_conn)
+        with ReplicationFollower(follower_conn) as follower:
+            assert follower.wait_until_synced(5)
+            assert follower.dictionary == d
+
+            d.assign_atomic('c', 3)
+            d.update_atomic('a', lambda v: v + 10)
+            d.remove_atomic('b')
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert follower.dictionary == ConcurrentDictionary({'a': 11, 'c': 3})
+
+            d.clear()
+            d.assign_atomic('z', 26)
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert follower.dictionary == ConcurrentDictionary({'z': 26})
+            assert follower.staleness() < 5
+
+
+def test_lagging_follower_resyncs_from_snapshot():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary()
+    leader_conn, follower_conn = multiprocessing.Pipe()
+    with ReplicationLeader(d, flush_interval=0.01, max_batch=10, max_backlog=50) as leader:
+        leader.add_follower(leader_conn)
+        with ReplicationFollower(follower_conn) as follower:
+            assert follower.wait_until_synced(5)
+            for i in range(1000):
+                d.assign_atomic(i % 100, i)
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert follower.dictionary == d
+
+
+def test_concurrent_writers_are_replicated():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary()
+    leader_conn, follower_conn = multiprocessing.Pipe()
+    with ReplicationLeader(d, flush_interval=0.01) as leader:
+        leader.add_follower(leader_conn)
+        with ReplicationFollower(follower_conn) as follower:
+            def worker(offset: int):
+                for i in range(500):
+                    d.assign_atomic(offset + i, i)
+                    if i % 3 == 0:
+                        d.remove_atomic(offset + i)
+
+            threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert follower.dictionary == d
+
+
+def test_compact_keeps_last_operation_per_key():
+    ops = [("s", 1, 'a'), ("s", 2, 'b'), ("d", 1), ("c",), ("s", 3, 'c'), ("s", 3, 'd')]
+    assert _compact(ops) == [("c",), ("s", 3, 'd')]
+    assert _compact([("s", 1, 'a'), ("d", 2), ("s", 1, 'b')]) == [("d", 2), ("s", 1, 'b')]
+
+
+class Resource:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Resource) and other.name == self.name
+
+
+def test_collected_weak_values_are_replicated_as_deletions():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    kept, dropped = Resource("kept"), Resource("dropped")
+    d.assign_atomic('kept', kept)
+    d.assign_atomic('dropped', dropped)
+    leader_conn, follower_conn = multiprocessing.Pipe()
+    with ReplicationLeader(d, flush_interval=0.01) as leader:
+        leader.add_follower(leader_conn)
+        with ReplicationFollower(follower_conn) as follower:
+            assert follower.wait_until_synced(5)
+            assert 'dropped' in follower.dictionary
+
+            del dropped
+            gc.collect()
+            assert len(d) == 1  # purges the dead entry
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert 'dropped' not in follower.dictionary
+            assert follower.dictionary.get('kept') == kept
+
+
+def test_weak_values_assigned_after_attaching_are_not_kept_alive():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    leader_conn, follower_conn = multiprocessing.Pipe()
+    with ReplicationLeader(d, flush_interval=0.01) as leader:
+        leader.add_follower(leader_conn)
+        with ReplicationFollower(follower_conn) as follower:
+            assert follower.wait_until_synced(5)
+            late = Resource("late")
+            d.assign_atomic('late', late)
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert follower.dictionary.get('late') == late
+
+            # The backlog only records the key, so the value can be collected
+            del late
+            gc.collect()
+            assert len(d) == 0
+            assert wait_for(lambda: follower.last_seq == leader.seq)
+            assert 'late' not in follower.dictionary
+
+
+def test_batches_carry_current_values():
+    d : ConcurrentDictionary[str, int] = ConcurrentDictionary()
+    leader = ReplicationLeader(d)
+    d.assign_atomic('a', 1)
+    d.assign_atomic('b', 2)
+    d.remove_atomic('b')
+    assert leader._log == [("s", 'a'), ("s", 'b'), ("d", 'b')]
+    d.assign_atomic('a', 3)
+    assert leader._resolve(leader._log) == [("s", 'a', 3), ("d", 'b'), ("d", 'b'), ("s", 'a', 3)]
+    leader.close()
+
+def test_weak_key_dictionary_cannot_be_replicated():
+    d : ConcurrentWeakKeyDictionary[Resource, int] = ConcurrentWeakKeyDictionary()
+    with pytest.raises(TypeError):
+        ReplicationLeader(d)
+    assert d._journal is None
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -5,7 +5,7 @@ if True:
 
 import threading
 import time
-from typing import List
+from typing import Any, List
 from concurrent_collections import ConcurrentDictionary
 import pytest
 
@@ -184,6 +184,173 @@ def test_modify_without_get_locked_causes_race_condition():
         "Modifying without get_locked should result in incorrect value due to race conditions, "
         f"but got {d['x']}"
     )
-    
+
+
+def test_lookup_filter_answers_misses_and_tracks_mutations():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary({i: i for i in range(100)})
+    d.enable_lookup_filter(capacity=1000, false_positive_rate=0.01)
+
+    assert all(i in d for i in range(100))
+    assert d.get(500) is None
+    with pytest.raises(KeyError):
+        d[500]
+
+    d.assign_atomic(500, 1)
+    assert d[500] == 1
+    d.remove_atomic(500)
+    assert 500 not in d
+    d.put_if_absent(600, 2)
+    assert d.get(600) == 2
+    d.clear()
+    assert 0 not in d
+    assert d.get(600, -1) == -1
+
+
+def test_lookup_filter_false_positive_rate_and_memory_budget():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary({i: i for i in range(10000)})
+    d.enable_lookup_filter(capacity=10000, false_positive_rate=0.01)
+    lookup_filter = d._lookup_filter
+    assert lookup_filter is not None
+    false_positives = sum(lookup_filter.might_contain(i) for i in range(10000, 30000))
+    assert false_positives < 20000 * 0.03
+
+    d.enable_lookup_filter(capacity=10000, false_positive_rate=0.01, max_bytes=4096)
+    assert d._lookup_filter is not None and d._lookup_filter.memory_bytes == 4096
+    assert all(i in d for i in range(10000))
+
+
+def test_lookup_filter_false_positive_rate_with_interleaved_keys():
+    # Small ints hash to themselves: the probes must not follow the key order
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary({i: i for i in range(0, 20000, 2)})
+    d.enable_lookup_filter(capacity=10000, false_positive_rate=0.01)
+    lookup_filter = d._lookup_filter
+    assert lookup_filter is not None
+    false_positives = sum(lookup_filter.might_contain(i) for i in range(1, 20000, 2))
+    assert false_positives < 10000 * 0.03
+
+    d = ConcurrentDictionary({i * 1024: i for i in range(10000)})
+    d.enable_lookup_filter(capacity=10000, false_positive_rate=0.01)
+    lookup_filter = d._lookup_filter
+    assert lookup_filter is not None
+    false_positives = sum(lookup_filter.might_contain(i * 1024 + 512) for i in range(10000))
+    assert false_positives < 10000 * 0.03
+
+
+def test_lookup_filter_thread_safe():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary()
+    d.enable_lookup_filter(capacity=10000)
+    errors : List[Exception] = []
+
+    def writer(offset: int):
+        for i in range(2000):
+            d.assign_atomic(offset + i, i)
+            if i % 2:
+                d.remove_atomic(offset + i)
+
+    def reader(offset: int):
+        for i in range(2000):
+            try:
+                d.get(offset + i)
+                (offset + i) in d
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n * 10000,)) for n in range(4)]
+    threads += [threading.Thread(target=reader, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    for n in range(4):
+        for i in range(2000):
+            assert ((n * 10000 + i) in d) == (i % 2 == 0)
+
+
+def test_len_and_estimated_size_track_mutations():
+    d : ConcurrentDictionary[str, int] = ConcurrentDictionary({'a': 1, 'b': 2})
+    assert len(d) == d.estimated_size() == 2
+    d.assign_atomic('c', 3)
+    d.assign_atomic('c', 4)
+    d.put_if_absent('a', 5)
+    assert len(d) == 3
+    d.remove_atomic('a')
+    d.remove_if_exists('missing')
+    d.popitem()
+    assert len(d) == d.estimated_size() == 1
+    d.clear()
+    assert len(d) == 0
+
+
+def test_len_does_not_block_behind_writers():
+    d : ConcurrentDictionary[str, int] = ConcurrentDictionary({'a': 1})
+    d.enable_memory_tracking()
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with d._lock:
+            acquired.set()
+            release.wait(5)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    acquired.wait(5)
+    try:
+        assert len(d) == 1
+        assert d.estimated_size() == 1
+        assert d.memory_estimate() > 0
+    finally:
+        release.set()
+        t.join()
+
+
+def test_memory_estimate_counts_container_elements():
+    d : ConcurrentDictionary[int, List[int]] = ConcurrentDictionary()
+    empty = d.memory_estimate()
+    d.assign_atomic(1, list(range(1000)))
+    grown = d.memory_estimate()
+    assert grown >= empty + sys.getsizeof(list(range(1000))) + sum(sys.getsizeof(i) for i in range(1000))
+    assert d._entry_sizes is None  # measured on demand unless tracking is enabled
+    d.enable_memory_tracking()
+    assert d.memory_estimate() == grown
+    d.remove_atomic(1)
+    assert d.memory_estimate() < grown
+    d.clear()
+    assert d.memory_estimate() == sys.getsizeof(d._dict)
+
+
+def test_memory_estimate_subtracts_recorded_size_after_in_place_growth():
+    d : ConcurrentDictionary[str, Any] = ConcurrentDictionary()
+    d.enable_memory_tracking()
+    empty_table = sys.getsizeof(d._dict)
+    d.assign_atomic('x', [])
+    d.get('x').extend(range(100000))
+    # The list grew in place: the size recorded when it was stored is the one removed
+    d.assign_atomic('x', 0)
+    assert d.memory_estimate() == sys.getsizeof(d._dict) + sys.getsizeof('x') + sys.getsizeof(0)
+    d.remove_atomic('x')
+    assert d.memory_estimate() == sys.getsizeof(d._dict) >= empty_table
+
+
+def test_len_thread_safe():
+    d : ConcurrentDictionary[int, int] = ConcurrentDictionary()
+
+    def worker(offset: int):
+        for i in range(2000):
+            d.assign_atomic(offset + i, i)
+            if i % 2:
+                d.remove_atomic(offset + i)
+
+    threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(d) == len(d.keys()) == 4000
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,138 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import threading
+import time
+from typing import List
+import pytest
+from concurrent_collections import CollectionClosedError, ConcurrentLinkedQueue
+import concurrent_collections.concurrent_linked_queue as linked_queue_module
+
+
+@pytest.fixture(autouse=True)
+def small_segments(monkeypatch):
+    # Exercise the crossing of segment boundaries with few items
+    monkeypatch.setattr(linked_queue_module, "_SEGMENT_SIZE", 4)
+
+
+def test_linked_queue_fifo_order():
+    q : ConcurrentLinkedQueue[int] = ConcurrentLinkedQueue(range(3))
+    q.append(3)
+    q.extend(range(4, 11))
+    assert len(q) == 11
+    assert list(q) == list(range(11))
+    assert q.popleft() == 0
+    assert q.popleft_many(6) == [1, 2, 3, 4, 5, 6]
+    assert q.try_popleft() == 7
+    assert q.popleft_many(10) == [8, 9, 10]
+    assert q.try_popleft(-1) == -1
+    assert q.popleft_many(3) == []
+    assert not q and len(q) == 0
+    with pytest.raises(IndexError):
+        q.popleft()
+    q.extend(range(9))
+    assert q == ConcurrentLinkedQueue(range(9))
+    assert hash(q) == hash(ConcurrentLinkedQueue(range(9)))
+    q.clear()
+    assert len(q) == 0 and list(q) == []
+    q.append(1)
+    assert repr(q) == "ConcurrentLinkedQueue([1])"
+
+
+def test_linked_queue_releases_references():
+    q : ConcurrentLinkedQueue[object] = ConcurrentLinkedQueue()
+    q.extend(object() for _ in range(3))
+    q.popleft()
+    q.popleft_many(1)
+    assert q._head.items[:2] == [None, None]
+
+
+def test_linked_queue_blocking_popleft():
+    q : ConcurrentLinkedQueue[int] = ConcurrentLinkedQueue()
+    with pytest.raises(TimeoutError):
+        q.popleft(block=True, timeout=0.01)
+
+    results : List[int] = []
+    consumers = [threading.Thread(target=lambda: results.append(q.popleft(block=True, timeout=5)))
+                 for _ in range(3)]
+    for t in consumers:
+        t.start()
+    while q._waiting < 3:
+        time.sleep(0.001)
+    q.append(1)
+    q.extend([2, 3])
+    for t in consumers:
+        t.join(5)
+    assert sorted(results) == [1, 2, 3]
+
+
+def test_linked_queue_close():
+    q : ConcurrentLinkedQueue[int] = ConcurrentLinkedQueue()
+    errors : List[Exception] = []
+
+    def consume():
+        try:
+            q.popleft(block=True)
+        except Exception as e:
+            errors.append(e)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    while q._waiting < 1:
+        time.sleep(0.001)
+    q.close()
+    consumer.join(5)
+    assert len(errors) == 1 and isinstance(errors[0], CollectionClosedError)
+    assert q.closed
+    with pytest.raises(CollectionClosedError):
+        q.append(1)
+
+
+def test_linked_queue_producers_and_consumers():
+    q : ConcurrentLinkedQueue[int] = ConcurrentLinkedQueue()
+    errors : List[Exception] = []
+    consumed : List[List[int]] = [[] for _ in range(4)]
+
+    def produce(offset: int):
+        try:
+            for i in range(0, 2000, 10):
+                q.append(offset + i)
+                q.extend(range(offset + i + 1, offset + i + 10))
+        except Exception as e:
+            errors.append(e)
+
+    def consume(index: int):
+        try:
+            while True:
+                if index % 2:
+                    consumed[index].extend(q.popleft_many(7))
+                consumed[index].append(q.popleft(block=True))
+        except CollectionClosedError:
+            pass
+        except Exception as e:
+            errors.append(e)
+
+    producers = [threading.Thread(target=produce, args=(n * 10000,)) for n in range(4)]
+    consumers = [threading.Thread(target=consume, args=(n,)) for n in range(4)]
+    for t in producers + consumers:
+        t.start()
+    for t in producers:
+        t.join()
+    q.close()
+    for t in consumers:
+        t.join(5)
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert sorted(item for items in consumed for item in items) == \
+        [n * 10000 + i for n in range(4) for i in range(2000)]
+    # Each consumer sees the items of each producer in the order they were appended
+    for items in consumed:
+        for n in range(4):
+            mine = [item for item in items if n * 10000 <= item < (n + 1) * 10000]
+            assert mine == sorted(mine)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,156 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import itertools
+import threading
+import time
+from typing import List
+import pytest
+from concurrent_collections import CollectionClosedError, ConcurrentObjectPool
+
+
+class Resource:
+    _ids = itertools.count()
+
+    def __init__(self) -> None:
+        self.id = next(Resource._ids)
+        self.healthy = True
+        self.closed = False
+        self.users = 0
+
+
+def test_pool_reuses_objects():
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(Resource)
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        assert second is first
+    stats = pool.stats()
+    assert stats["created"] == 1 and stats["acquisitions"] == 2
+    assert stats["idle"] == 1 and stats["in_use"] == 0
+
+
+def test_pool_prefers_the_object_released_by_the_same_thread():
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(Resource, min_size=4)
+    a, b = pool.get(), pool.get()
+    pool.release(a)
+    pool.release(b)
+    assert pool.get() is b
+    assert len(pool) == 4
+
+
+def test_pool_blocks_at_max_size():
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(Resource, max_size=1)
+    held = pool.get()
+    with pytest.raises(TimeoutError):
+        pool.get(timeout=0.05)
+
+    results : List[Resource] = []
+    waiter = threading.Thread(target=lambda: results.append(pool.get(timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(held)
+    waiter.join(timeout=5)
+    assert results == [held]
+    stats = pool.stats()
+    assert stats["timeouts"] == 1 and stats["waits"] == 2
+    assert stats["utilization"] == 1.0
+
+
+def test_pool_validation_and_idle_eviction():
+    destroyed : List[Resource] = []
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(
+        Resource, min_size=1, validate=lambda r: r.healthy, idle_timeout=0.05, destroy=destroyed.append)
+    r = pool.get()
+    r.healthy = False
+    pool.release(r)
+    replacement = pool.get()
+    assert replacement is not r and destroyed == [r]
+    assert pool.stats()["validation_failures"] == 1
+
+    extra = pool.get()
+    pool.release(replacement)
+    pool.release(extra)
+    assert len(pool) == 2
+    time.sleep(0.1)
+    assert pool.evict_idle() == 1  # min_size objects are kept
+    assert len(pool) == 1 and len(destroyed) == 2
+    with pool.acquire():
+        pass
+
+
+def test_pool_close():
+    closed : List[Resource] = []
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(Resource, min_size=2, max_size=2,
+                                                                 destroy=closed.append)
+    held = pool.get()
+    outcome : List[Exception] = []
+    other = pool.get()
+
+    def waiter():
+        try:
+            pool.get()
+        except CollectionClosedError as e:
+            outcome.append(e)
+
+    t = threading.Thread(target=waiter)
+    t.start()
+    time.sleep(0.05)
+    pool.release(other)  # the waiter may take it
+    t.join(timeout=0.2)
+    pool.close()
+    t.join(timeout=5)
+    pool.release(held)
+    assert held in closed
+    with pytest.raises(CollectionClosedError):
+        pool.get()
+
+
+def test_pool_factory_failure_frees_the_slot():
+    calls = itertools.count()
+
+    def flaky() -> Resource:
+        if next(calls) == 0:
+            raise RuntimeError("cannot connect")
+        return Resource()
+
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(flaky, max_size=1)
+    with pytest.raises(RuntimeError):
+        pool.get()
+    assert len(pool) == 0
+    with pool.acquire(timeout=1):
+        pass
+
+
+def test_pool_thread_safety():
+    pool : ConcurrentObjectPool[Resource] = ConcurrentObjectPool(Resource, max_size=3)
+    errors : List[Exception] = []
+
+    def worker():
+        try:
+            for _ in range(500):
+                with pool.acquire(timeout=5) as r:
+                    r.users += 1
+                    if r.users != 1:
+                        errors.append(AssertionError("object shared between threads"))
+                    r.users -= 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    stats = pool.stats()
+    assert stats["acquisitions"] == 8 * 500
+    assert stats["created"] <= 3 and stats["peak_in_use"] <= 3
+    assert stats["in_use"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
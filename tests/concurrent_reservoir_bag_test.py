@@ -0,0 +1,103 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import threading
+from collections import Counter
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentBag, ConcurrentReservoirBag
+
+
+def test_sample_returns_distinct_positions():
+    for factory in (ConcurrentBag, ConcurrentBag.hashed, ConcurrentBag.chunked):
+        bag : ConcurrentBag[int] = factory(range(50))
+        assert sorted(bag.sample(50)) == list(range(50))
+        picked = bag.sample(5)
+        assert len(set(picked)) == 5 and set(picked) <= set(range(50))
+        assert bag.sample(0) == []
+        with pytest.raises(ValueError):
+            bag.sample(51)
+        assert len(bag) == 50
+
+
+def test_reservoir_keeps_first_items_until_full():
+    bag : ConcurrentReservoirBag[int] = ConcurrentReservoirBag(5, range(3))
+    bag.append(3)
+    assert sorted(bag) == [0, 1, 2, 3]
+    bag.extend(range(4, 100))
+    assert len(bag) == 5
+    assert bag.seen == 100
+    assert set(bag) <= set(range(100))
+
+
+def test_reservoir_sample_is_uniform():
+    counts : Counter = Counter()
+    for seed in range(2000):
+        bag : ConcurrentReservoirBag[int] = ConcurrentReservoirBag(10, seed=seed)
+        if seed % 2:
+            bag.extend(range(100))
+        else:
+            for i in range(100):
+                bag.append(i)
+        counts.update(bag)
+    # Each of the 100 items is expected 2000 * 10 / 100 = 200 times
+    assert set(counts) == set(range(100))
+    assert all(140 < count < 260 for count in counts.values()), counts
+
+
+def test_reservoir_drain_restarts_the_stream():
+    bag : ConcurrentReservoirBag[int] = ConcurrentReservoirBag(3, range(10))
+    assert len(bag.drain()) == 3
+    assert bag.seen == 0
+    bag.extend([7, 8])
+    assert sorted(bag) == [7, 8]
+    bag.clear()
+    bag.append(1)
+    assert list(bag) == [1] and bag.seen == 1
+
+
+def test_reservoir_extend_reads_streams_in_batches():
+    bag : ConcurrentReservoirBag[int] = ConcurrentReservoirBag(10, seed=1)
+    seen_while_reading : List[int] = []
+
+    def generate():
+        for i in range(100000):
+            if i % 10000 == 0:
+                seen_while_reading.append(bag.seen)
+            yield i
+
+    bag.extend(generate())
+    # The stream is not materialized: earlier batches were offered while later items were produced
+    assert all(i * 10000 - seen < 2048 for i, seen in enumerate(seen_while_reading))
+    assert bag.seen == 100000
+    assert len(bag) == 10
+
+def test_reservoir_thread_safety():
+    bag : ConcurrentReservoirBag[int] = ConcurrentReservoirBag(100)
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(5000):
+                bag.append(offset + i)
+                if i % 500 == 0:
+                    bag.extend(range(offset, offset + 10))
+                    bag.sample(10)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert bag.seen == 4 * (5000 + 100)
+    assert len(bag) == 100
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
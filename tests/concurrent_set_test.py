@@ -0,0 +1,122 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import threading
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentSet
+
+
+def test_set_basic_operations():
+    s : ConcurrentSet[int] = ConcurrentSet([1, 2, 3])
+    s.add(4)
+    assert s.add_if_absent(5) is True
+    assert s.add_if_absent(5) is False
+    s.discard(1)
+    s.discard(100)
+    s.remove(2)
+    with pytest.raises(KeyError):
+        s.remove(2)
+    assert 3 in s and 2 not in s and [1] not in s
+    assert len(s) == 3
+    assert sorted(s) == [3, 4, 5]
+    assert s.pop() in {3, 4, 5}
+    assert len(s) == 2
+    s.clear()
+    with pytest.raises(KeyError):
+        s.pop()
+    assert repr(s) == "ConcurrentSet()"
+    with pytest.raises(ValueError):
+        ConcurrentSet(shards=3)
+
+
+def test_set_algebra():
+    a : ConcurrentSet[int] = ConcurrentSet(range(10), shards=4)
+    b : ConcurrentSet[int] = ConcurrentSet(range(5, 15))
+    assert set(a.union(b, [100])) == set(range(15)) | {100}
+    assert set(a | b) == set(range(15))
+    assert set(a.intersection(b, range(8))) == {5, 6, 7}
+    assert set(a & b) == set(range(5, 10))
+    assert set(a.difference(b, [0])) == set(range(1, 5))
+    assert set(a - [0, 1]) == set(range(2, 10))
+    assert not a.isdisjoint(b) and a.isdisjoint([20, 30])
+    assert set(a) == set(range(10))  # unchanged by the non-mutating operations
+
+    a.update([20], {21})
+    a.difference_update(range(5))
+    assert set(a) == set(range(5, 10)) | {20, 21}
+    a.intersection_update(b, range(7))
+    assert set(a) == {5, 6}
+
+
+def test_set_equality_and_hash():
+    a : ConcurrentSet[str] = ConcurrentSet(['x', 'y'])
+    b : ConcurrentSet[str] = ConcurrentSet(['y', 'x'], shards=2)
+    assert a == b and hash(a) == hash(b)
+    assert a != {'x', 'y'}
+    assert a.copy() == a and a.copy() is not a
+
+
+def test_add_if_absent_is_atomic():
+    s : ConcurrentSet[int] = ConcurrentSet()
+    winners : List[int] = []
+    lock = threading.Lock()
+
+    def worker():
+        for i in range(2000):
+            if s.add_if_absent(i):
+                with lock:
+                    winners.append(i)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(winners) == list(range(2000))
+
+
+def test_set_thread_safety_with_bulk_operations():
+    s : ConcurrentSet[int] = ConcurrentSet()
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(1000):
+                s.add(offset + i)
+                if i % 2:
+                    s.discard(offset + i)
+                if i % 250 == 0:
+                    s.update(range(offset + 5000, offset + 5010))
+                    s.difference_update(range(offset + 5000, offset + 5010))
+                    list(s)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert set(s) == {n * 10000 + i for n in range(4) for i in range(0, 1000, 2)}
+
+
+
+def test_aligned_ints_spread_over_the_shards():
+    s : ConcurrentSet[int] = ConcurrentSet(range(0, 16 * 1024, 16), shards=16)
+    sizes: List[int] = [len(shard.items) for shard in s._shards]
+    assert sum(sizes) == 1024
+    assert min(sizes) > 0
+    assert max(sizes) < 1024 // 4
+    for i in range(16 * 1024, 16 * 2048, 16):
+        s.add(i)
+    assert max(len(shard.items) for shard in s._shards) < 2048 // 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
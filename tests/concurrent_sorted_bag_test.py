@@ -0,0 +1,129 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import math
+import random
+import threading
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentSortedBag
+import concurrent_collections.concurrent_sorted_bag as sorted_bag_module
+
+
+@pytest.fixture
+def small_sublists(monkeypatch):
+    # Exercise the splitting and merging of sublists with few items
+    monkeypatch.setattr(sorted_bag_module, "_LOAD", 4)
+
+
+def test_sorted_bag_basic_operations():
+    bag : ConcurrentSortedBag[int] = ConcurrentSortedBag([5, 1, 3, 3])
+    bag.add(2)
+    assert list(bag) == [1, 2, 3, 3, 5]
+    assert len(bag) == 5 and bag[0] == 1 and bag[-1] == 5
+    assert 3 in bag and 4 not in bag
+    assert bag.count(3) == 2
+    bag.remove(3)
+    assert bag.count(3) == 1
+    with pytest.raises(ValueError):
+        bag.remove(4)
+    assert bag.discard(4) is False
+    assert bag.pop() == 5 and bag.pop(0) == 1
+    assert list(bag) == [2, 3]
+    with pytest.raises(IndexError):
+        bag[2]
+    bag.clear()
+    assert len(bag) == 0
+    with pytest.raises(IndexError):
+        bag.percentile(50)
+
+
+def test_sorted_bag_queries():
+    bag : ConcurrentSortedBag[int] = ConcurrentSortedBag(range(1, 101))
+    assert bag.rank(1) == 0 and bag.rank(50) == 49 and bag.rank(1000) == 100
+    assert bag.percentile(0) == 1
+    assert bag.percentile(50) == 50
+    assert bag.percentile(99) == 99
+    assert bag.percentile(100) == 100
+    with pytest.raises(ValueError):
+        bag.percentile(101)
+    assert bag.top_k(3) == [100, 99, 98]
+    assert bag.top_k(0) == []
+    assert list(bag.irange(10, 13)) == [10, 11, 12, 13]
+    assert list(bag.irange(10, 13, inclusive=(False, False))) == [11, 12]
+    assert list(bag.irange(maximum=2)) == [1, 2]
+    assert list(bag.irange(99)) == [99, 100]
+
+
+def test_sorted_bag_matches_sorted_list(small_sublists):
+    rng = random.Random(42)
+    bag : ConcurrentSortedBag[int] = ConcurrentSortedBag()
+    reference : List[int] = []
+    for _ in range(2000):
+        value = rng.randint(0, 50)
+        choice = rng.random()
+        if choice < 0.5:
+            bag.add(value)
+            reference.append(value)
+        elif choice < 0.55:
+            values = [rng.randint(0, 50) for _ in range(rng.randint(0, 30))]
+            bag.update(values)
+            reference.extend(values)
+        else:
+            assert bag.discard(value) == (value in reference)
+            if value in reference:
+                reference.remove(value)
+        reference.sort()
+        assert len(bag) == len(reference)
+
+    assert list(bag) == reference
+    for value in range(-1, 52):
+        assert bag.rank(value) == sum(1 for item in reference if item < value)
+    for index in range(len(reference)):
+        assert bag[index] == reference[index]
+    for p in (1, 10, 50, 90, 99):
+        assert bag.percentile(p) == reference[max(0, math.ceil(p / 100 * len(reference)) - 1)]
+    assert bag.top_k(7) == sorted(reference, reverse=True)[:7]
+    assert list(bag.irange(10, 20, inclusive=(False, True))) == [item for item in reference if 10 < item <= 20]
+
+
+def test_sorted_bag_thread_safety(small_sublists):
+    bag : ConcurrentSortedBag[int] = ConcurrentSortedBag()
+    errors : List[Exception] = []
+
+    def writer(offset: int):
+        try:
+            for i in range(500):
+                bag.add(offset + i)
+                if i % 3 == 0:
+                    bag.remove(offset + i)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(200):
+                top = bag.top_k(5)
+                assert top == sorted(top, reverse=True)
+                snapshot = list(bag)
+                assert snapshot == sorted(snapshot)
+                if snapshot:
+                    bag.percentile(90)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n * 1000,)) for n in range(4)]
+    threads += [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert list(bag) == [n * 1000 + i for n in range(4) for i in range(500) if i % 3]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
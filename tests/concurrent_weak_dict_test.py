@@ -0,0 +1,194 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import gc
+import threading
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentWeakKeyDictionary, ConcurrentWeakValueDictionary
+
+
+class Resource:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+def test_weak_value_entry_dropped_when_value_collected():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    r1, r2 = Resource("a"), Resource("b")
+    d.assign_atomic("a", r1)
+    d.assign_atomic("b", r2)
+    assert d["a"] is r1
+    assert len(d) == 2
+
+    del r1
+    gc.collect()
+
+    assert "a" not in d
+    assert d.get("a") is None
+    assert d.keys() == ["b"]
+    assert len(d) == 1
+
+
+def test_weak_value_reassigned_key_survives_old_value_death():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    old, new = Resource("old"), Resource("new")
+    d.assign_atomic("x", old)
+    d.assign_atomic("x", new)
+    del old
+    gc.collect()
+
+    assert d["x"] is new
+    assert len(d) == 1
+
+
+def test_weak_key_entry_dropped_when_key_collected():
+    d : ConcurrentWeakKeyDictionary[Resource, int] = ConcurrentWeakKeyDictionary()
+    k1, k2 = Resource("a"), Resource("b")
+    d.assign_atomic(k1, 1)
+    d.assign_atomic(k2, 2)
+    with d.get_locked(k1) as value:
+        assert value == 1
+
+    del k1
+    gc.collect()
+
+    assert len(d) == 1
+    assert d.items() == [(k2, 2)]
+    # The per-key lock must not keep the key alive either
+    assert len(d._key_locks) == 0
+
+
+def test_weak_dicts_atomic_methods():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    r = Resource("r")
+    assert d.put_if_absent("r", r) is None
+    assert d.put_if_absent("r", Resource("other")) is r
+    assert d.remove_atomic("r") is r
+    assert d.remove_atomic("r") is None
+
+
+def test_weak_value_dictionary_thread_safe_under_collection():
+    d : ConcurrentWeakValueDictionary[int, Resource] = ConcurrentWeakValueDictionary()
+    keep : List[Resource] = []
+    errors : List[Exception] = []
+
+    def worker(offset: int):
+        try:
+            for i in range(2000):
+                r = Resource(str(i))
+                if i % 2 == 0:
+                    keep.append(r)
+                d.assign_atomic(offset + i, r)
+                d.get(offset + i // 2)
+                if i % 100 == 0:
+                    gc.collect()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 10000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    gc.collect()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    assert len(d) == len(keep)
+
+
+def test_weak_value_counters_follow_collection():
+    d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+    resources = [Resource(str(i)) for i in range(10)]
+    for resource in resources:
+        d.assign_atomic(resource.name, resource)
+    assert d.estimated_size() == 10
+    with_entries = d.memory_estimate()
+
+    del resource, resources[5:]
+    gc.collect()
+    assert len(d) == 5
+    assert d.estimated_size() == 5
+    assert d.memory_estimate() < with_entries
+
+    # Re-using the key of a dead, not yet purged, entry must not be double counted
+    r = Resource("0")
+    del resources[0]
+    gc.collect()
+    d.assign_atomic("0", r)
+    assert len(d) == 5
+
+
+def test_weak_dicts_lookup_filter_forgets_collected_entries():
+    values : ConcurrentWeakValueDictionary[int, Resource] = ConcurrentWeakValueDictionary()
+    values.enable_lookup_filter(capacity=1024)
+    keys : ConcurrentWeakKeyDictionary[Resource, int] = ConcurrentWeakKeyDictionary()
+    keys.enable_lookup_filter(capacity=1024)
+    for i in range(5000):
+        values.assign_atomic(i, Resource(str(i)))  # the value dies right away
+        keys.assign_atomic(Resource(str(i)), i)  # so does the key
+        if i % 500 == 0:
+            gc.collect()
+    gc.collect()
+    assert len(values) == 0 and len(keys) == 0
+
+    values_filter, keys_filter = values._lookup_filter, keys._lookup_filter
+    assert values_filter is not None and keys_filter is not None
+    assert not any(values_filter._counters) and not any(keys_filter._counters)
+    assert sum(values_filter.might_contain(i) for i in range(5000, 10000)) == 0
+
+
+def test_weak_key_memory_estimate_drops_collected_entries():
+    d : ConcurrentWeakKeyDictionary[Resource, List[int]] = ConcurrentWeakKeyDictionary()
+    d.enable_memory_tracking()
+    keys = [Resource(str(i)) for i in range(10)]
+    for key in keys:
+        d.assign_atomic(key, [])
+    for key in keys:
+        d.get(key).extend(range(1000))  # grown in place, not re-measured
+    del key, keys
+    gc.collect()
+    assert len(d) == 0
+    # Only the (not shrunk) hash table is left
+    assert d.memory_estimate() == sys.getsizeof(d._dict)
+
+def test_failed_stores_leave_the_counters_unchanged():
+    values : ConcurrentWeakValueDictionary[str, int] = ConcurrentWeakValueDictionary()
+    keys : ConcurrentWeakKeyDictionary[int, str] = ConcurrentWeakKeyDictionary()
+    for d, key, value in ((values, 'k', 1), (keys, 1, 'x')):
+        d.enable_lookup_filter()
+        empty = d.memory_estimate()
+        with pytest.raises(TypeError):
+            d.assign_atomic(key, value)  # ints cannot be weakly referenced
+        with pytest.raises(TypeError):
+            d.put_if_absent(key, value)
+        assert len(d) == 0 and d.estimated_size() == 0
+        assert d.memory_estimate() == empty
+        assert not any(d._lookup_filter._counters)
+
+def test_weak_value_items_skip_values_collected_while_iterating(monkeypatch):
+    from concurrent_collections.concurrent_weak_dict import _WeakValueStore
+    original_getitem = _WeakValueStore.__getitem__
+    for read in ("items", "values"):
+        d : ConcurrentWeakValueDictionary[str, Resource] = ConcurrentWeakValueDictionary()
+        values: List[Resource] = [Resource("first"), Resource("second")]
+        d.assign_atomic('first', values[0])
+        d.assign_atomic('second', values[1])
+
+        def collect_the_other_value(self: _WeakValueStore, key: str) -> Resource:
+            if len(values) == 2:
+                values.remove(values[1] if key == 'first' else values[0])
+                gc.collect()
+            return original_getitem(self, key)
+
+        # Yield every key, as if each value had been checked alive just before the lookup
+        monkeypatch.setattr(_WeakValueStore, "__iter__", lambda self: iter(list(self._data)))
+        monkeypatch.setattr(_WeakValueStore, "__getitem__", collect_the_other_value)
+        result = getattr(d, read)()
+        monkeypatch.undo()
+        assert len(result) == len(values)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
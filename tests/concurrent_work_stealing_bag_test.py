@@ -0,0 +1,85 @@
+if True:
+    import sys, os
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    os.environ["concurrent_collections_test"] = "True"
+
+import threading
+from typing import List
+import pytest
+from concurrent_collections import ConcurrentWorkStealingBag
+
+
+def test_owner_takes_its_own_items_last_in_first_out():
+    bag : ConcurrentWorkStealingBag[int] = ConcurrentWorkStealingBag([1, 2, 3])
+    assert len(bag) == 3
+    assert bag.pop() == 3
+    assert bag.try_take() == 2
+    assert 1 in bag
+    bag.remove(1)
+    assert bag.try_take("empty") == "empty"
+    with pytest.raises(IndexError):
+        bag.pop()
+
+
+def test_steals_from_other_threads():
+    bag : ConcurrentWorkStealingBag[int] = ConcurrentWorkStealingBag()
+    t = threading.Thread(target=bag.extend, args=(range(10),))
+    t.start()
+    t.join()
+
+    # Stealing takes from the head of the other thread's segment
+    assert bag.pop() == 0
+    assert sorted(bag) == list(range(1, 10))
+    taken = [bag.try_take() for _ in range(9)]
+    assert sorted(taken) == list(range(1, 10))  # type: ignore
+    assert len(bag) == 0
+    # The next steal attempt drops the empty segment of the finished thread
+    assert bag.try_take() is None
+    assert len(bag._segments) == 1
+
+
+def test_multiset_equality():
+    assert ConcurrentWorkStealingBag([1, 2, 2]) == ConcurrentWorkStealingBag([2, 1, 2])
+    assert ConcurrentWorkStealingBag([1, 2]) != ConcurrentWorkStealingBag([1, 2, 2])
+    assert hash(ConcurrentWorkStealingBag([1, 2])) == hash(ConcurrentWorkStealingBag([2, 1]))
+
+
+def test_producer_consumer_thread_safety():
+    bag : ConcurrentWorkStealingBag[int] = ConcurrentWorkStealingBag()
+    taken : List[int] = []
+    taken_lock = threading.Lock()
+    errors : List[Exception] = []
+
+    def producer(offset: int):
+        try:
+            for i in range(5000):
+                bag.append(offset + i)
+        except Exception as e:
+            errors.append(e)
+
+    def consumer():
+        try:
+            local : List[int] = []
+            for _ in range(5000):
+                item = bag.try_take()
+                if item is not None:
+                    local.append(item)
+            with taken_lock:
+                taken.extend(local)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=producer, args=(n * 10000,)) for n in range(4)]
+    threads += [threading.Thread(target=consumer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors, f"Thread safety errors occurred: {errors}"
+    remaining = list(bag)
+    assert sorted(taken + remaining) == sorted(n * 10000 + i for n in range(4) for i in range(5000))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])